@@ -0,0 +1,232 @@
+"""A headless HTTP API for babbelfish.ai translation and transcription, served without Streamlit.
+
+Run with several worker processes:
+
+    uvicorn api:app --workers 4
+
+or ./run-api.sh, which reads API_HOST, API_PORT and API_WORKERS from .env.
+"""
+import os
+import asyncio
+import contextlib
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from logging_config import get_logger
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from langflow_runner import LANGUAGE_COMPONENT_ID, LangflowClient, LangflowRunner
+from translation_cache import TranslationCache
+from single_flight import SingleFlight
+from listen_and_convert import TranscribeAudio
+from recognition_pool import get_recognition_pool
+from vad_segmenter import VALID_SAMPLERATES
+import telemetry
+import resilience
+
+# Load environment variables from .env file
+load_dotenv()
+FLOW_ID = os.getenv('FLOW_ID')
+LANGUAGE_TO_SPEAK = os.getenv('LANGUAGE_TO_SPEAK')
+API_HOST = os.getenv('API_HOST', '0.0.0.0')
+API_PORT = int(os.getenv('API_PORT', '8000'))
+API_WORKERS = int(os.getenv('API_WORKERS', '2'))
+API_MAX_AUDIO_BYTES = int(os.getenv('API_MAX_AUDIO_BYTES', str(16000 * 2 * 120)))
+
+# Configure logging
+logger = get_logger(__name__)
+
+class BadRequest(ValueError):
+    """Raised for invalid client input; answered with HTTP 400."""
+
+def make_runner(app_state: Any, language: str) -> LangflowRunner:
+    """
+    Create a LangflowRunner targeting a language on the worker's shared client, cache and single-flight group.
+    """
+    tweaks = {LANGUAGE_COMPONENT_ID: {"input_value": language}}
+    return LangflowRunner(flow_id=FLOW_ID or "",
+                          api_key=None,
+                          tweaks=tweaks,
+                          client=app_state.client,
+                          cache=app_state.cache,
+                          single_flight=app_state.single_flight)
+
+async def run_translation(app_state: Any, text: str, language: str) -> Dict[str, str]:
+    """
+    Translate text, answering from the shared cache when possible.
+
+    The flow runs on the client's thread pool so identical requests from any
+    connection are coalesced and cached like in the Streamlit app.
+    """
+    runner = make_runner(app_state, language)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app_state.client.executor, telemetry.in_context(runner.run_and_extract, text))
+
+async def run_transcription(pcm: bytes, samplerate: int, language: str) -> Optional[str]:
+    """
+    Gate, segment and recognize 16-bit mono PCM on the worker's shared recognition pool.
+    """
+    transcriber = TranscribeAudio(samplerate=samplerate, pool=get_recognition_pool())
+    loop = asyncio.get_running_loop()
+    # VAD and gating are CPU work, keep them off the event loop
+    future = await loop.run_in_executor(None, telemetry.in_context(transcriber.transcribe_async, pcm, language))
+    return await asyncio.wrap_future(future)
+
+async def read_json(request: Request) -> Dict[str, Any]:
+    """
+    Parse a JSON object request body.
+    """
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise BadRequest("Request body must be JSON") from e
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object")
+    return body
+
+async def read_pcm(request: Request) -> bytes:
+    """
+    Read a raw 16-bit mono PCM request body.
+    """
+    pcm = await request.body()
+    if not pcm:
+        raise BadRequest("Request body must be 16-bit mono PCM audio")
+    if len(pcm) > API_MAX_AUDIO_BYTES:
+        raise BadRequest(f"Audio is larger than {API_MAX_AUDIO_BYTES} bytes")
+    return pcm[:len(pcm) - len(pcm) % 2]
+
+def audio_params(request: Request) -> Dict[str, Any]:
+    """
+    Read the sample rate and speaking language query parameters of an audio request.
+    """
+    try:
+        samplerate = int(request.query_params.get('samplerate', '16000'))
+    except ValueError as e:
+        raise BadRequest("samplerate must be an integer") from e
+    if samplerate not in VALID_SAMPLERATES:
+        raise BadRequest(f"samplerate must be one of {', '.join(map(str, VALID_SAMPLERATES))}")
+    return {
+        'samplerate': samplerate,
+        'speaking_language': request.query_params.get('speaking_language', 'en-US')
+    }
+
+def translation_response(results: Dict[str, str], **extra) -> JSONResponse:
+    """
+    Answer with the flow results, or 502 if the flow returned no translation.
+    """
+    if results.get('translation', 'N/A') == 'N/A':
+        return JSONResponse({'error': "Translation flow returned no translation", **extra, **results}, status_code=502)
+    return JSONResponse({**extra, **results})
+
+async def translate(request: Request) -> JSONResponse:
+    """
+    POST /translate with {"text": ..., "language": ...}; language defaults to LANGUAGE_TO_SPEAK.
+
+    Returns the translation, explanation, detected language and sentiment.
+    """
+    body = await read_json(request)
+    text = body.get('text')
+    language = body.get('language') or LANGUAGE_TO_SPEAK
+    if not isinstance(text, str) or not text.strip():
+        raise BadRequest("text is required")
+    if not language:
+        raise BadRequest("language is required")
+
+    with telemetry.utterance(request.headers.get('x-request-id')), resilience.deadline():
+        results = await run_translation(request.app.state, text, language)
+    return translation_response(results)
+
+async def transcribe(request: Request) -> JSONResponse:
+    """
+    POST /transcribe?samplerate=16000&speaking_language=en-US with a PCM body.
+
+    Returns the transcription, or null if no speech was recognized.
+    """
+    params = audio_params(request)
+    pcm = await read_pcm(request)
+    with telemetry.utterance(request.headers.get('x-request-id')), resilience.deadline():
+        transcription = await run_transcription(pcm, params['samplerate'], params['speaking_language'])
+    return JSONResponse({'transcription': transcription})
+
+async def speech_to_translation(request: Request) -> JSONResponse:
+    """
+    POST /speech-to-translation?samplerate=16000&speaking_language=en-US&language=French with a PCM body.
+
+    Transcribes the audio and translates the transcription in one round trip.
+    """
+    params = audio_params(request)
+    language = request.query_params.get('language') or LANGUAGE_TO_SPEAK
+    if not language:
+        raise BadRequest("language is required")
+    pcm = await read_pcm(request)
+
+    with telemetry.utterance(request.headers.get('x-request-id')), resilience.deadline():
+        transcription = await run_transcription(pcm, params['samplerate'], params['speaking_language'])
+        if not transcription:
+            return JSONResponse({'transcription': None, 'error': "No speech recognized"}, status_code=422)
+        results = await run_translation(request.app.state, transcription, language)
+    return translation_response(results, transcription=transcription)
+
+async def health(request: Request) -> JSONResponse:
+    """
+    GET /health: liveness and the shared cache and pool counters of this worker.
+    """
+    return JSONResponse({
+        'status': 'ok',
+        'translation_cache': request.app.state.cache.stats(),
+        'single_flight': request.app.state.single_flight.stats(),
+        'recognition_pool': get_recognition_pool().stats(),
+        'langflow_breaker': request.app.state.client.breaker.stats()
+    })
+
+async def metrics(request: Request) -> PlainTextResponse:
+    """
+    GET /metrics: stage latency histograms, error counts and the pool and cache counters of this worker,
+    in the Prometheus text format.
+    """
+    return PlainTextResponse(telemetry.REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+async def bad_request(request: Request, exc: BadRequest) -> JSONResponse:
+    """
+    Answer invalid input with 400 and the reason.
+    """
+    return JSONResponse({'error': str(exc)}, status_code=400)
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    """
+    Create the pooled clients of a worker process after it starts, and close them on shutdown.
+
+    Each uvicorn worker is a separate process, so every worker gets its own
+    connection pool, cache and recognition pool, shared by all of its requests.
+    """
+    app.state.client = LangflowClient()
+    app.state.cache = TranslationCache()
+    app.state.single_flight = SingleFlight()
+    telemetry.register_stats('recognition_pool', get_recognition_pool().stats, telemetry.POOL_METRICS)
+    telemetry.register_stats('translation_cache', app.state.cache.stats, telemetry.CACHE_METRICS, cache="translation")
+    telemetry.register_stats('single_flight', app.state.single_flight.stats, telemetry.SINGLE_FLIGHT_METRICS)
+    telemetry.register_stats('langflow_breaker', app.state.client.breaker.stats, telemetry.BREAKER_METRICS,
+                             upstream="langflow")
+    telemetry.start_profiler()
+    logger.info("API worker %d ready", os.getpid())
+    try:
+        yield
+    finally:
+        await app.state.client.aclose()
+        app.state.client.close()
+
+routes = [
+    Route('/translate', translate, methods=['POST']),
+    Route('/transcribe', transcribe, methods=['POST']),
+    Route('/speech-to-translation', speech_to_translation, methods=['POST']),
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, exception_handlers={BadRequest: bad_request})
+
+if __name__ == '__main__':
+    uvicorn.run('api:app', host=API_HOST, port=API_PORT, workers=API_WORKERS)
@@ -0,0 +1,139 @@
+"""Vectorized per-frame features of 16-bit PCM audio used to gate speech before recognition."""
+from typing import Dict, Optional, Union
+import numpy as np
+
+INT16_FULL_SCALE = 32768.0
+VOICE_BAND = (300.0, 3400.0)  # Hz, the band the audio component filters to
+EPSILON = 1e-10
+
+def pcm_to_array(audio_data: Union[bytes, bytearray, memoryview, np.ndarray]) -> np.ndarray:
+    """
+    View 16-bit little-endian PCM bytes as an int16 array without copying.
+
+    :param audio_data: PCM bytes, or an array which is returned unchanged.
+    :return: A 1-D int16 array.
+    """
+    if isinstance(audio_data, np.ndarray):
+        return audio_data
+    return np.frombuffer(audio_data, dtype='<i2')
+
+def frame_signal(samples: np.ndarray, frame_size: int, hop_size: Optional[int] = None) -> np.ndarray:
+    """
+    Split a signal into frames using a strided view, without copying.
+
+    Trailing samples that do not fill a whole frame are ignored.
+
+    :param samples: A 1-D array of samples.
+    :param frame_size: Number of samples per frame.
+    :param hop_size: Number of samples between frame starts (defaults to frame_size, i.e. no overlap).
+    :return: A read-only (n_frames, frame_size) view of samples.
+    """
+    hop_size = hop_size or frame_size
+    if len(samples) < frame_size:
+        return np.empty((0, frame_size), dtype=samples.dtype)
+    n_frames = 1 + (len(samples) - frame_size) // hop_size
+    stride = samples.strides[0]
+    return np.lib.stride_tricks.as_strided(samples,
+                                           shape=(n_frames, frame_size),
+                                           strides=(hop_size * stride, stride),
+                                           writeable=False)
+
+def frame_rms(frames: np.ndarray) -> np.ndarray:
+    """
+    Root mean square of each frame, computed in float64 so int16 input cannot overflow.
+
+    :param frames: A (n_frames, frame_size) array.
+    :return: A (n_frames,) float64 array.
+    """
+    frames = frames.astype(np.float64, copy=False)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / max(frames.shape[1], 1))
+
+def rms_to_dbfs(rms: np.ndarray) -> np.ndarray:
+    """
+    Convert int16-scaled RMS values to dB relative to full scale.
+
+    :param rms: RMS values on the int16 scale.
+    :return: dBFS values; digital silence maps to about -200 dBFS.
+    """
+    return 20.0 * np.log10(np.maximum(rms, EPSILON) / INT16_FULL_SCALE)
+
+def zero_crossing_rate(frames: np.ndarray) -> np.ndarray:
+    """
+    Fraction of adjacent sample pairs in each frame whose sign differs.
+
+    :param frames: A (n_frames, frame_size) array.
+    :return: A (n_frames,) float64 array in [0, 1].
+    """
+    signs = np.signbit(frames)
+    crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+    return crossings / max(frames.shape[1] - 1, 1)
+
+def band_energy_ratio(frames: np.ndarray,
+                      samplerate: int,
+                      band: tuple = VOICE_BAND) -> np.ndarray:
+    """
+    Fraction of each frame's spectral energy that falls inside a frequency band.
+
+    :param frames: A (n_frames, frame_size) array.
+    :param samplerate: Sample rate of the audio in Hz.
+    :param band: The (low, high) band edges in Hz; defaults to the 300-3400 Hz voice band.
+    :return: A (n_frames,) float64 array in [0, 1].
+    """
+    if not len(frames):
+        return np.empty(0)
+    frame_size = frames.shape[1]
+    spectrum = np.fft.rfft(frames.astype(np.float32, copy=False) * np.hanning(frame_size).astype(np.float32), axis=1)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+    freqs = np.fft.rfftfreq(frame_size, d=1.0 / samplerate)
+    in_band = (freqs >= band[0]) & (freqs <= band[1])
+    return power[:, in_band].sum(axis=1) / (power.sum(axis=1) + EPSILON)
+
+def extract_features(audio_data: Union[bytes, bytearray, memoryview, np.ndarray],
+                     samplerate: int = 16000,
+                     frame_duration: int = 30,
+                     gate_rms: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute per-frame RMS, dBFS, zero-crossing rate and voice-band energy ratio.
+
+    The voice-band ratio needs an FFT per frame and dominates the cost. When
+    gate_rms is given, it is only computed for frames louder than gate_rms and
+    left at 0 for the others, which is all a speech gate needs.
+
+    :param audio_data: 16-bit PCM bytes or an int16 array.
+    :param samplerate: Sample rate of the audio in Hz.
+    :param frame_duration: Frame length in ms.
+    :param gate_rms: Optional RMS below which the voice-band ratio is skipped.
+    :return: A dictionary of (n_frames,) arrays keyed by 'rms', 'dbfs', 'zcr' and 'voice_ratio'.
+    """
+    frames = frame_signal(pcm_to_array(audio_data), int(samplerate * frame_duration / 1000))
+    rms = frame_rms(frames)
+    if gate_rms is None:
+        voice_ratio = band_energy_ratio(frames, samplerate)
+    else:
+        voice_ratio = np.zeros(len(frames))
+        loud = rms > gate_rms
+        if loud.any():
+            voice_ratio[loud] = band_energy_ratio(frames[loud], samplerate)
+    return {
+        'rms': rms,
+        'dbfs': rms_to_dbfs(rms),
+        'zcr': zero_crossing_rate(frames),
+        'voice_ratio': voice_ratio
+    }
+
+def speech_frame_mask(features: Dict[str, np.ndarray],
+                      rms_threshold: float,
+                      min_voice_ratio: float = 0.25,
+                      max_zcr: float = 0.35) -> np.ndarray:
+    """
+    Flag frames that look like speech: loud enough, mostly in the voice band and not hiss-like.
+
+    :param features: Output of extract_features.
+    :param rms_threshold: Minimum frame RMS on the int16 scale.
+    :param min_voice_ratio: Minimum fraction of energy in the voice band.
+    :param max_zcr: Maximum zero-crossing rate; broadband noise crosses zero far more often than voiced speech.
+    :return: A (n_frames,) boolean array.
+    """
+    return ((features['rms'] > rms_threshold)
+            & (features['voice_ratio'] >= min_voice_ratio)
+            & (features['zcr'] <= max_zcr))
@@ -0,0 +1,116 @@
+"""Parsing and buffering of the chunked PCM packets streamed by the audio component while the user speaks."""
+import struct
+from typing import NamedTuple, Optional, Union
+import numpy as np
+
+# Packet header: stream id, sequence number of the first chunk, bytes per chunk, flags (all uint32, little-endian)
+PACKET_HEADER = struct.Struct('<IIII')
+FLAG_FINAL = 0x1
+
+class AudioPacket(NamedTuple):
+    """One packet from the audio component: every unacknowledged chunk of a recording, in order."""
+    stream_id: int
+    first_seq: int
+    chunk_bytes: int
+    final: bool
+    pcm: memoryview
+
+    @property
+    def num_chunks(self) -> int:
+        """
+        Number of chunks in the packet; the last chunk of a final packet may be short.
+        """
+        return -(-len(self.pcm) // self.chunk_bytes) if self.chunk_bytes else 0
+
+def parse_audio_packet(data: Union[bytes, bytearray, memoryview]) -> Optional[AudioPacket]:
+    """
+    Parse a streamed audio packet without copying its PCM payload.
+
+    :param data: The raw component value.
+    :return: The parsed packet, or None if data is too short to hold a header.
+    """
+    view = memoryview(data)
+    if len(view) < PACKET_HEADER.size:
+        return None
+    stream_id, first_seq, chunk_bytes, flags = PACKET_HEADER.unpack_from(view)
+    pcm = view[PACKET_HEADER.size:]
+    return AudioPacket(stream_id, first_seq, chunk_bytes, bool(flags & FLAG_FINAL), pcm[:len(pcm) - len(pcm) % 2])
+
+class PCMStreamBuffer:
+    """
+    A growable byte buffer with read and write cursors for incremental PCM processing.
+
+    Incoming chunks are copied in once; consumers read memoryviews of the unread
+    region and numpy arrays viewing the same memory, and then consume what they
+    processed. Consumed space is reclaimed by moving the unread tail to the front,
+    so a long recording does not grow the buffer. Views returned by readable() and
+    samples() must be released (or dropped) before the next write().
+    """
+
+    def __init__(self, capacity: int = 16000 * 2 * 10):
+        """
+        Initialize the buffer.
+
+        :param capacity: Initial capacity in bytes (10 s of 16 kHz int16 audio by default).
+        """
+        self.data = bytearray(capacity)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def write(self, chunk: Union[bytes, bytearray, memoryview]):
+        """
+        Append a chunk, compacting or growing the buffer as needed.
+
+        :param chunk: The bytes to append.
+        """
+        size = len(chunk)
+        if self.end + size > len(self.data):
+            unread = self.end - self.start
+            if unread + size > len(self.data):
+                grown = bytearray(max(len(self.data) * 2, unread + size))
+                grown[:unread] = self.data[self.start:self.end]
+                self.data = grown
+            else:
+                self.data[:unread] = self.data[self.start:self.end]
+            self.start, self.end = 0, unread
+        self.data[self.end:self.end + size] = chunk
+        self.end += size
+
+    def readable(self, size: Optional[int] = None) -> memoryview:
+        """
+        View the unread bytes without copying.
+
+        :param size: Optional maximum number of bytes to view.
+        :return: A memoryview of the unread region.
+        """
+        end = self.end if size is None else min(self.end, self.start + size)
+        return memoryview(self.data)[self.start:end]
+
+    def samples(self, size: Optional[int] = None) -> np.ndarray:
+        """
+        View the unread bytes as int16 samples without copying.
+
+        :param size: Optional maximum number of bytes to view.
+        :return: A 1-D int16 array sharing memory with the buffer.
+        """
+        view = self.readable(size)
+        return np.frombuffer(view[:len(view) - len(view) % 2], dtype='<i2')
+
+    def consume(self, size: int):
+        """
+        Mark bytes as read.
+
+        :param size: Number of bytes to drop from the front of the unread region.
+        """
+        self.start = min(self.end, self.start + size)
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def clear(self):
+        """
+        Drop all unread bytes, keeping the allocated memory.
+        """
+        self.start = self.end = 0
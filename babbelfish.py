@@ -1,49 +1,97 @@
 """An application to translate any language to any other language using Langflow and Streamlit."""
+import io
 import os
-import logging
+import time
+import uuid
+import itertools
 import threading
+from concurrent.futures import Future, as_completed
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
 from dotenv import load_dotenv
-import coloredlogs
-from langflow_runner import LangflowRunner
-from listen_and_convert import TranscribeAudio
+from logging_config import get_logger
+from translation_cache import TranslationCache
+from single_flight import SingleFlight
+from recognition_pool import RecognitionPool
+from history_store import HistoryStore
+import telemetry
+import resilience
 from components.audio_component import audio_component
 from components.elevenlabs_component import elevenlabs_component
 
-# Configure logger
-logger = logging.getLogger("BabbelfishLogger")
-coloredlogs.install(level='INFO',
-                    logger=logger,
-                    fmt='%(filename)s %(levelname)s %(message)s',
-                    level_styles={
-                        'debug': {'color': 'green'},
-                        'info': {'color': 'blue'},
-                        'warning': {'color': 'yellow'},
-                        'error': {'color': 'red'},
-                        'critical': {'color': 'magenta'}
-                    }
-)
+# Module imports are cached after the first run, so timing from here measures what a rerun really costs
+RUN_STARTED = time.perf_counter()
+
+# Speech recognition, the Langflow client and TTS pull in numpy, requests, httpx,
+# speech_recognition and webrtcvad; they are imported on first use, not on first render
+if TYPE_CHECKING:
+    from langflow_runner import LangflowClient, LangflowRunner
+    from listen_and_convert import TranscribeAudio
+    from tts_service import TTSService
+
+# Configure logging
+logger = get_logger("BabbelfishLogger")
 
 # Load environment variables from .env file
 load_dotenv()
 
 FLOW_ID = os.getenv('FLOW_ID')
+FAST_FLOW_ID = os.getenv('FAST_FLOW_ID')
 VOICE_ID = os.getenv('VOICE_ID')
 MODEL_ID = os.getenv('MODEL_ID')
 LANGUAGE_TO_SPEAK = os.getenv('LANGUAGE_TO_SPEAK')
+STREAM_TRANSLATION = os.getenv('STREAM_TRANSLATION', 'true').lower() == 'true'
+STREAM_AUDIO = os.getenv('STREAM_AUDIO', 'false').lower() == 'true'
+STREAM_SPEECH = os.getenv('STREAM_SPEECH', 'true').lower() == 'true'
+CHAT_WINDOW_SIZE = int(os.getenv('CHAT_WINDOW_SIZE', '50'))
 
 # -------------- Streamlit app config ---------------
 st.set_page_config(page_title="Babbelfish.ai", page_icon="🐠", layout="wide")
 logger.info("\n\n")
 logger.info("--- Streamlit start app ---")
 
+@st.cache_resource
+def start_telemetry() -> Optional[int]:
+    """
+    Start the optional metrics endpoint and sampling profiler, once per process.
+    """
+    telemetry.start_profiler()
+    return telemetry.start_metrics_server()
+
+start_telemetry()
+
+# -------------- Shared recognition workers ---------------
+@st.cache_resource
+def get_recognition_pool() -> RecognitionPool:
+    """
+    Create the process-wide recognition pool, shared by every Streamlit session.
+    """
+    logger.info("Creating shared recognition pool")
+    pool = RecognitionPool()
+    telemetry.register_stats('recognition_pool', pool.stats, telemetry.POOL_METRICS)
+    return pool
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    """
+    Create the process-wide chat history store, which bounds the memory used by all sessions.
+    """
+    logger.info("Creating shared history store")
+    return HistoryStore()
+
 # -------------- Initialize session state variables ---------------
 session_vars = {
-    "messages": [],
-    "transcriber": TranscribeAudio(),
+    "messages": None,
+    "chat_window": CHAT_WINDOW_SIZE,
+    "transcriber": None,
+    "runs": 0,
     "is_recording": False,
-    "history": [],
+    "transcribing": False,
     "audio_data": None,
+    "audio_ack": None,
+    "pending_utterances": [],
+    "pending_reply_start": None,
     "detected_language": None,
     "sentiment": None,
     "explanation": None
@@ -53,17 +101,37 @@ for var, default in session_vars.items():
     if var not in st.session_state:
         st.session_state[var] = default
 
+# Recent messages stay in memory, older ones are spilled to the shared history store
+if st.session_state.messages is None:
+    st.session_state.messages = get_history_store().session(uuid.uuid4().hex)
+
+def get_transcriber() -> "TranscribeAudio":
+    """
+    Get the session's transcriber, creating it on first use of voice input.
+
+    Transcribers hold per-session gating state only; recognition runs on the shared pool.
+    Sessions that only type never load the speech recognition stack.
+    """
+    if st.session_state.transcriber is None:
+        with telemetry.span('load_asr'):
+            from listen_and_convert import TranscribeAudio  # pylint: disable=import-outside-toplevel
+            st.session_state.transcriber = TranscribeAudio(pool=get_recognition_pool())
+    return st.session_state.transcriber
+
 # -------------- Define Layout ---------------
 with st.sidebar:
     st.caption("🚀 A Streamlit translation chatbot powered by Langflow")
     st.image("./static/fish_ear.webp", use_column_width=True)
 
     translate_language_options = ["English", "French", "Japanese", "Spanish", "Urdu", "Other"]
-    language_option = st.selectbox("Language to translate to", translate_language_options)
-    if language_option == "Other":
-        st.session_state.language = st.text_input("Please specify the language")
-    else:
-        st.session_state.language = language_option
+    language_selection = st.multiselect("Languages to translate to", translate_language_options, default=["English"])
+    languages = [option for option in language_selection if option != "Other"]
+    if "Other" in language_selection:
+        other_languages = st.text_input("Please specify the language(s), separated by commas")
+        languages += [other.strip() for other in other_languages.split(",") if other.strip()]
+    # Every selected language gets its own translation; the first one is streamed when it is the only one
+    st.session_state.languages = list(dict.fromkeys(languages))
+    st.session_state.language = st.session_state.languages[0] if st.session_state.languages else ""
 
     speaking_language_options = ["en-US", "fr-FR", "en-ES", "fil-PH", "Other"]
     speaking_option = st.selectbox("Language I'm speaking in", speaking_language_options)
@@ -97,23 +165,56 @@ with st.sidebar:
         st.session_state.is_recording = False
 
     # Render the audio component
-    st.session_state.audio_data = audio_component(is_recording=st.session_state.is_recording)
+    st.session_state.audio_data = audio_component(is_recording=st.session_state.is_recording,
+                                                  streaming=STREAM_AUDIO,
+                                                  ack=st.session_state.audio_ack)
+
+    # Exporting reads the whole history back from the spill file, so it only runs on request
+    if st.button("Export chat history"):
+        history = io.StringIO()
+        st.session_state.messages.export_jsonl(history)
+        st.download_button("Download chat history", history.getvalue(), file_name="babbelfish-history.jsonl",
+                           mime="application/x-ndjson")
 
 # Fixed title
 st.markdown('<div class="fixed-header"><h1>Babbelfish.ai 💬🐠💬</h1></div>', unsafe_allow_html=True)
 
 # Scrollable container for chat messages
 chat_placeholder = st.empty()
+# Assistant message shown while a translation is still streaming in
+stream_placeholder = st.empty()
 
 # -------------- Render chat messages ---------------
 lock = threading.Lock()
+# Position of the next stored message a reply rendered again may skip, see chat_message_write
+reply_cursor: Optional[int] = None
 
-def render_chat():
-    """Render chat messages in a scrollable container."""
+def load_earlier_messages():
+    """
+    Widen the chat window by another page of older messages.
+    """
+    st.session_state.chat_window += CHAT_WINDOW_SIZE
+
+def render_chat() -> DeltaGenerator:
+    """
+    Render the most recent chat messages in a scrollable container, once per run.
+
+    Only the last chat_window messages are drawn; older ones are loaded a page at a
+    time with a button, so a long session does not redraw its whole history on every
+    rerun. Messages added during the run are appended to the returned container.
+    """
     with chat_placeholder.container():
         st.markdown('<div class="scrollable-container">', unsafe_allow_html=True)
-        for message in st.session_state.messages:
-            st.chat_message(message['role']).write(message['content'])
+        oldest = st.session_state.messages.oldest
+        first = max(oldest, len(st.session_state.messages) - st.session_state.chat_window)
+        hidden = first - oldest
+        if hidden:
+            st.button(f"Load {min(hidden, CHAT_WINDOW_SIZE)} earlier messages ({hidden} hidden)",
+                      on_click=load_earlier_messages)
+        messages_container = st.container()
+        with messages_container:
+            for message in st.session_state.messages.page(first, st.session_state.chat_window):
+                st.chat_message(message['role']).write(message['content'])
         
         st.markdown(
             """
@@ -128,68 +229,298 @@ def render_chat():
             unsafe_allow_html=True,
         )
         st.markdown('</div>', unsafe_allow_html=True)
+    return messages_container
 
 # Initial render of chat messages
-render_chat()
+chat_messages = render_chat()
 
 # -------------- Translate speech ---------------
-def translate_speech(flow_id: str, message: str, language_to_speak: str) -> dict:
+@st.cache_resource
+def get_langflow_client() -> "LangflowClient":
     """
-    Translate the given message to the specified language using Langflow.
+    Create the process-wide Langflow client, shared by every Streamlit session.
+    """
+    logger.info("Creating shared Langflow client")
+    with telemetry.span('load_translation'):
+        from langflow_runner import LangflowClient  # pylint: disable=import-outside-toplevel
+        client = LangflowClient()
+    telemetry.register_stats('langflow_breaker', client.breaker.stats, telemetry.BREAKER_METRICS, upstream="langflow")
+    return client
+
+@st.cache_resource
+def get_translation_cache() -> TranslationCache:
+    """
+    Create the process-wide translation cache, shared by every Streamlit session.
+    """
+    logger.info("Creating shared translation cache")
+    cache = TranslationCache()
+    telemetry.register_stats('translation_cache', cache.stats, telemetry.CACHE_METRICS, cache="translation")
+    return cache
+
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    """
+    Create the process-wide single-flight group that coalesces identical translations across sessions.
+    """
+    single_flight = SingleFlight()
+    telemetry.register_stats('single_flight', single_flight.stats, telemetry.SINGLE_FLIGHT_METRICS)
+    return single_flight
+
+@st.cache_resource
+def get_tts_service() -> "TTSService":
+    """
+    Create the process-wide TTS service and its audio cache, shared by every Streamlit session.
+    """
+    logger.info("Creating shared TTS service")
+    with telemetry.span('load_tts'):
+        from tts_service import TTSService  # pylint: disable=import-outside-toplevel
+        tts = TTSService()
+    telemetry.register_stats('tts_cache', tts.stats, telemetry.CACHE_METRICS, cache="tts")
+    return tts
+
+def speak(text: str, stream_id: Optional[str] = None, seq: int = 0) -> int:
+    """
+    Synthesize the text through the cached TTS service and play it in the browser.
+
+    With STREAM_SPEECH, playback starts on the first chunk of audio: every chunk is
+    rendered as its own player, and the players schedule their audio back to back.
+    Passing the stream_id and next seq of earlier speech queues this speech after it
+    instead of playing both at once.
+
+    :return: The seq to continue the stream with.
+    """
+    from tts_service import TTSError  # pylint: disable=import-outside-toplevel
+    try:
+        tts = get_tts_service()
+    except TTSError as e:
+        logger.warning("Speech synthesis is unavailable, skipping audio: %s", e)
+        return seq
+    try:
+        if not STREAM_SPEECH:
+            speech = tts.synthesize(text, st.session_state.voice_id, st.session_state.model_id)
+            if stream_id is None:
+                elevenlabs_component(audio=speech.audio, audio_key=speech.key, output_format=speech.output_format)
+            else:
+                elevenlabs_component(audio=speech.audio, audio_key=f"{stream_id}-{seq}",
+                                     output_format=speech.output_format, stream_id=stream_id, seq=seq)
+            return seq + 1
+
+        stream_id = stream_id or uuid.uuid4().hex
+        for chunk in tts.stream(text, st.session_state.voice_id, st.session_state.model_id):
+            elevenlabs_component(audio=chunk.audio, audio_key=f"{stream_id}-{seq}", output_format=chunk.output_format,
+                                 stream_id=stream_id, seq=seq)
+            seq += 1
+    except TTSError as e:
+        logger.error("Speech synthesis failed: %s", e)
+    return seq
+
+def make_flow_runner(flow_id: str, language_to_speak: str) -> "LangflowRunner":
     """
+    Create a LangflowRunner targeting the specified language on the shared client, cache and single-flight group.
+    """
+    from langflow_runner import LANGUAGE_COMPONENT_ID, LangflowRunner  # pylint: disable=import-outside-toplevel
     tweaks = {
-        "TextInput-UFUC6": {
+        LANGUAGE_COMPONENT_ID: {
             "input_value": f"{language_to_speak}"
         }
     }
 
     api_key = None
 
-    flow_runner = LangflowRunner(flow_id=flow_id, api_key=api_key, tweaks=tweaks)
-    # Async version
-    #flow_runner.run_flow_async(message=message)  # Use the async method instead
-    #response_json = flow_runner.get_response()   # Wait for the async response
-    
-    #results = flow_runner.extract_output_message(response_json)
-    #return results
+    return LangflowRunner(flow_id=flow_id,
+                          api_key=api_key,
+                          tweaks=tweaks,
+                          client=get_langflow_client(),
+                          cache=get_translation_cache(),
+                          single_flight=get_single_flight())
 
-    # Sync version    
-    response_json = flow_runner.run_flow(message=message)
-    
-    results = flow_runner.extract_output_message(response_json)
-    return results
+def make_fast_runner(language_to_speak: str) -> Optional["LangflowRunner"]:
+    """
+    Create a runner for the optional translation-only flow, if FAST_FLOW_ID is configured.
+    """
+    return make_flow_runner(FAST_FLOW_ID, language_to_speak) if FAST_FLOW_ID else None
+
+def translate_speech(flow_id: str, message: str, language_to_speak: str) -> Tuple[str, Future]:
+    """
+    Translate the given message to the specified language using Langflow.
+
+    Returns the translation as soon as it is available, along with a Future for the
+    full results (explanation, detected language and sentiment) still being generated.
+    """
+    flow_runner = make_flow_runner(flow_id, language_to_speak)
+
+    translation_future, results_future = flow_runner.run_progressive(message,
+                                                                     fast_runner=make_fast_runner(language_to_speak),
+                                                                     stream=STREAM_TRANSLATION)
+    try:
+        translation = translation_future.result()
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Translation to %s failed: %s", language_to_speak, e)
+        translation = "No translation found"
+    return translation, results_future
+
+def fan_out_translation(flow_id: str, message: str, languages: List[str]) -> Dict[Future, Tuple[str, Future]]:
+    """
+    Translate the message into several languages at once, with one concurrent flow run per language.
 
-def chat_message_write(role: str, content: str):
+    :return: A dictionary mapping each language's translation Future to the language
+             and the Future of its full results, ready for as_completed.
+    """
+    runs = {}
+    for language_to_speak in languages:
+        flow_runner = make_flow_runner(flow_id, language_to_speak)
+        translation_future, results_future = flow_runner.run_progressive(
+            message, fast_runner=make_fast_runner(language_to_speak), stream=STREAM_TRANSLATION)
+        runs[translation_future] = (language_to_speak, results_future)
+    return runs
+
+def stream_translation(flow_id: str, message: str, language_to_speak: str) -> Tuple[str, Future]:
+    """
+    Translate the given message using Langflow's streaming endpoint, writing the
+    translation into a temporary assistant message as it is generated.
+
+    Returns once the translation is complete, along with a Future for the full results.
+    """
+    flow_runner = make_flow_runner(flow_id, language_to_speak)
+    fast_runner = make_fast_runner(language_to_speak)
+    executor = get_langflow_client().executor
+
+    results_future = None
+    if fast_runner:
+        # The full flow runs alongside the translation-only flow we stream from
+        results_future = executor.submit(telemetry.in_context(flow_runner.run_and_extract, message))
+        flow_runner = fast_runner
+
+    events = flow_runner.stream_and_extract(message=message)
+    translation = ""
+
+    def translation_chunks():
+        nonlocal translation
+        for event in events:
+            if event["type"] == "translation":
+                yield event["text"]
+            elif event["type"] == "translation_done":
+                translation = event["text"]
+                return
+
+    try:
+        with stream_placeholder.container():
+            st.chat_message("assistant").write_stream(translation_chunks())
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Translation to %s failed: %s", language_to_speak, e)
+    stream_placeholder.empty()
+
+    if results_future is None:
+        # Keep reading the same stream in the background for the other outputs
+        results_future = executor.submit(telemetry.in_context(flow_runner.collect_results, events))
+    return translation or "No translation found", results_future
+
+def chat_message_write(role: str, content: str) -> bool:
     """
-    Write a chat message to the session state and re-render the chat.
+    Write a chat message to the session state and append it to the rendered chat.
+
+    While a reply cut short by a rerun is rendered again, every message up to the
+    number it already stored is skipped by position, whatever its new content:
+    render_chat has drawn the stored ones.
+
+    :return: False if the message was skipped as already stored.
     """
+    global reply_cursor  # pylint: disable=global-statement
     with lock:
-        st.session_state.messages.append({"role": role, "content": content})
-        render_chat()  # Re-render chat messages after adding a new message
+        if reply_cursor is not None:
+            if reply_cursor < len(st.session_state.messages):
+                reply_cursor += 1
+                return False
+            reply_cursor = None
+        st.session_state.messages.append(role, content)
+        with chat_messages:
+            st.chat_message(role).write(content)
+        return True
 
 # -------------- Call chat_and_speak based on input message ---------------
+def fan_out_and_speak(in_message: str, languages: List[str]) -> Dict[str, str]:
+    """
+    Translate the message into every language concurrently, writing and speaking each
+    translation in the order they finish.
+
+    Speech of all languages goes into one stream, so each plays after the previous one.
+
+    :return: The combined results: the detected language and sentiment of the message,
+             and the explanations of all languages.
+    """
+    runs = fan_out_translation(FLOW_ID or "", in_message, languages)
+    stream_id = uuid.uuid4().hex
+    seq = 0
+    for translation_future in as_completed(runs):
+        language_to_speak, _ = runs[translation_future]
+        try:
+            translation = translation_future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Translation to %s failed: %s", language_to_speak, e)
+            translation = "No translation found"
+        written = chat_message_write("assistant", f"**{language_to_speak}:** {translation}")
+        # A translation already stored before a rerun was spoken then too
+        if written and voice_checkbox and translation != "No translation found":
+            seq = speak(translation, stream_id, seq)
+
+    combined: Dict[str, str] = {}
+    explanations = []
+    with st.spinner("Fetching explanations and sentiment..."):
+        for language_to_speak, results_future in runs.values():
+            try:
+                response = results_future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Flow for %s failed: %s", language_to_speak, e)
+                continue
+            for key in ('detected_language', 'sentiment'):
+                if combined.get(key, 'N/A') == 'N/A':
+                    combined[key] = response.get(key, 'N/A')
+            explanations.append(f"**{language_to_speak}:** {response.get('explanation', 'N/A')}")
+    combined['explanation'] = "\n\n".join(explanations)
+    return combined
+
+@telemetry.traced('reply')
 def chat_and_speak(in_message: str):
     """
     Handle chat input, translate it, and update the session state.
+
+    The translation is written and spoken as soon as it arrives; the explanation,
+    detected language and sentiment are filled in once the rest of the flow finishes.
+    With several target languages, their flows run concurrently and each translation
+    appears as soon as its own flow delivers it.
     """
     chat_message_write("user", in_message)
-    response = translate_speech(FLOW_ID or "", in_message, st.session_state.language)
-    translation = response.get('translation', 'No translation found')
+    if len(st.session_state.languages) > 1:
+        response = fan_out_and_speak(in_message, st.session_state.languages)
+    else:
+        if STREAM_TRANSLATION:
+            translation, results_future = stream_translation(FLOW_ID or "", in_message, st.session_state.language)
+        else:
+            translation, results_future = translate_speech(FLOW_ID or "", in_message, st.session_state.language)
+
+        written = chat_message_write("assistant", translation)
+        # A translation already stored before a rerun was spoken then too
+        if written and voice_checkbox and translation != "No translation found":
+            speak(translation)
+
+        with st.spinner("Fetching explanation and sentiment..."):
+            try:
+                response = results_future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Flow for %s failed: %s", st.session_state.language, e)
+                response = {}
     st.session_state.detected_language = response.get('detected_language', 'No detected_language found')
     st.session_state.sentiment = response.get('sentiment', 'No sentiment found')
     st.session_state.explanation = response.get('explanation', 'No sentiment found')
 
-    chat_message_write("assistant", translation)
     st.subheader("Note:")
     st.write(st.session_state.explanation)
-    if voice_checkbox:
-        elevenlabs_component(text=translation, voice_id=st.session_state.voice_id, model_id=st.session_state.model_id)
 
     add_detected_language.text(st.session_state.detected_language)
     add_sentiment.text(st.session_state.sentiment)
 
 # -------------- Call transcribe_audio based on updated state ---------------
-def transcribe_audio(transcriber: TranscribeAudio, is_recording: bool, language: str = ""):
+def transcribe_audio(transcriber: "TranscribeAudio", is_recording: bool, language: str = ""):
     """
     Start or stop the transcription process based on the recording state.
     """
@@ -200,26 +531,88 @@ def transcribe_audio(transcriber: TranscribeAudio, is_recording: bool, language:
         transcriber.stop()
         logger.info("Transcription stopped")
 
-if voice_checkbox:
-    language = st.session_state.language or ""
-    transcribe_audio(st.session_state.transcriber, st.session_state.is_recording, language)
-
-# Process audio if transcriber and audio data are available
-if st.session_state.transcriber and st.session_state.audio_data:
-    audio_message = st.session_state.transcriber.process_audio(st.session_state.audio_data, st.session_state.speaking_language)
+# The transcriber is only created once the user starts recording
+if voice_checkbox and st.session_state.is_recording:
+    transcribe_audio(get_transcriber(), True, st.session_state.language or "")
+    st.session_state.transcribing = True
+
+# Process audio if audio data is available
+if STREAM_AUDIO and st.session_state.audio_data:
+    from audio_stream import parse_audio_packet  # pylint: disable=import-outside-toplevel
+    # Utterances are recognized as soon as they end; the ack tells the component which chunks to drop
+    packet = parse_audio_packet(st.session_state.audio_data)
+    if packet:
+        # Acked chunks are never resent, so their utterances are kept in the session until replied to:
+        # the next packet reruns the script, and a run cut short leaves them for the next one
+        st.session_state.pending_utterances.extend(
+            get_transcriber().feed_stream(packet, st.session_state.speaking_language))
+        st.session_state.audio_ack = get_transcriber().stream_ack
+elif st.session_state.audio_data:
+    # One utterance ID ties recognition, translation and speech of the recording together
+    with telemetry.utterance(), resilience.deadline():
+        audio_message = get_transcriber().process_audio(st.session_state.audio_data,
+                                                        st.session_state.speaking_language)
+        if audio_message:
+            logger.info("Audio message: %s", audio_message)
+            chat_and_speak(audio_message)
+
+while st.session_state.pending_utterances:
+    audio_message = st.session_state.pending_utterances[0].result()
     if audio_message:
         logger.info("Audio message: %s", audio_message)
-        chat_and_speak(audio_message)
+        # A reply cut short by a rerun is rendered again on the next run, skipping the messages it stored
+        if st.session_state.pending_reply_start is None:
+            st.session_state.pending_reply_start = len(st.session_state.messages)
+        reply_cursor = st.session_state.pending_reply_start
+        with telemetry.utterance(), resilience.deadline():
+            chat_and_speak(audio_message)
+    # Only dropped once its reply has been rendered in full
+    st.session_state.pending_utterances.pop(0)
+    st.session_state.pending_reply_start = None
+    reply_cursor = None
+
+# Stopped once recording is turned off, after this run's packet has been fed and its utterances replied to,
+# so stopping only cancels recognition jobs that no pending utterance waits for
+if st.session_state.transcribing and not st.session_state.is_recording:
+    transcribe_audio(get_transcriber(), False)
+    st.session_state.transcribing = False
 
 # -------------- Start the chat ---------------
 if prompt := st.chat_input("Type your message here..."):
     if prompt:
-        chat_and_speak(prompt)
+        with telemetry.utterance(), resilience.deadline():
+            chat_and_speak(prompt)
 
-if not st.session_state.history:
+if not st.session_state.messages:
     INITIAL_BOT_MESSAGE = """
         Hi there, I'm Babbelfish.ai, 
         choose a language from the menu and type something to translate into any language.\n
     """
-    st.session_state.history.append({"role": "assistant", "content": INITIAL_BOT_MESSAGE})
     chat_message_write("assistant", INITIAL_BOT_MESSAGE)
+
+# -------------- Report the cost of this run ---------------
+@st.cache_resource
+def get_run_counter() -> Iterator[int]:
+    """
+    Count the script runs of this process, so the first one can be reported as the cold start.
+    """
+    return itertools.count()
+
+def report_run_time(seconds: float):
+    """
+    Log how long this script run took and record it as a metric.
+
+    The first run of the process is the cold start, the first run of any other
+    session a session start, and every later run a rerun.
+    """
+    if next(get_run_counter()) == 0:
+        stage = 'app_cold_start'
+    elif st.session_state.runs == 0:
+        stage = 'app_session_start'
+    else:
+        stage = 'app_rerun'
+    st.session_state.runs += 1
+    telemetry.record(stage, seconds)
+    logger.info("Script run took %.1f ms (%s)", seconds * 1000, stage)
+
+report_run_time(time.perf_counter() - RUN_STARTED)
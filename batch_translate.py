@@ -0,0 +1,366 @@
+"""Translate a JSONL or text file of utterances through the babbelfish.ai flow, without the Streamlit app.
+
+Each input line is translated with bounded concurrency and an optional rate limit,
+and its results are appended to a JSONL output file as soon as they arrive:
+
+    python batch_translate.py faq.txt --language French --concurrency 8
+    python batch_translate.py transcripts.jsonl --output transcripts.fr.jsonl --rate 5
+
+Input lines are read lazily. Text files hold one utterance per line; JSONL files hold
+objects with a "text" field and optional "id" and "language" fields. Output records
+carry the input line number, so an interrupted run picks up where it left off when
+started again with the same output file.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Set, TextIO
+from dotenv import load_dotenv
+from logging_config import get_logger
+from langflow_runner import LANGUAGE_COMPONENT_ID, LangflowClient, LangflowRunner
+from translation_cache import TranslationCache
+from single_flight import SingleFlight
+import telemetry
+import resilience
+
+# Load environment variables from .env file
+load_dotenv()
+FLOW_ID = os.getenv('FLOW_ID')
+LANGUAGE_TO_SPEAK = os.getenv('LANGUAGE_TO_SPEAK')
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_RATE = float(os.getenv('BATCH_RATE', '0'))
+
+# Configure logging
+logger = get_logger(__name__)
+
+RESULT_FIELDS = ('translation', 'explanation', 'detected_language', 'sentiment')
+
+class BatchItem(NamedTuple):
+    """One utterance of the input file."""
+    line: int
+    id: Optional[str]
+    text: str
+    language: Optional[str]
+
+def read_items(path: str, input_format: str = "auto", field: str = "text") -> Iterator[BatchItem]:
+    """
+    Read the utterances of a file one line at a time.
+
+    Blank lines are skipped, as are JSONL lines that are malformed or lack the text field.
+
+    :param path: The input file.
+    :param input_format: "jsonl", "text", or "auto" to decide by the .jsonl extension.
+    :param field: The JSONL field holding the utterance.
+    :return: An iterator of BatchItems, numbered by their line in the file starting at 1.
+    """
+    if input_format == "auto":
+        input_format = "jsonl" if path.endswith(('.jsonl', '.ndjson')) else "text"
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line, raw in enumerate(f, start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            if input_format == "text":
+                yield BatchItem(line, None, raw, None)
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                logger.warning("Skipping malformed JSON on line %d", line)
+                continue
+            text = record.get(field) if isinstance(record, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                logger.warning("Skipping line %d without a %r field", line, field)
+                continue
+            item_id = record.get('id')
+            yield BatchItem(line, None if item_id is None else str(item_id), text, record.get('language'))
+
+class RateLimiter:
+    """
+    A token bucket: acquire() blocks until a token is available.
+
+    Tokens are added at rate per second up to burst, so short bursts go through
+    at once while the long-run rate stays at rate.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the bucket, full.
+
+        :param rate: Tokens added per second; 0 or less disables limiting.
+        :param burst: Bucket size; defaults to one second worth of tokens (at least 1).
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, waiting for it if the bucket is empty.
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class Checkpoint:
+    """
+    The input lines already translated, kept compact for large files.
+
+    Lines up to a watermark are all done; lines done out of order above it are kept
+    in a set until the gap below them closes, so memory stays proportional to the
+    number of lines in flight rather than to the size of the file.
+    """
+
+    def __init__(self):
+        self.watermark = 0
+        self.above: Set[int] = set()
+
+    def add(self, line: int):
+        """
+        Mark a line as done.
+        """
+        if line <= self.watermark:
+            return
+        self.above.add(line)
+        while self.watermark + 1 in self.above:
+            self.watermark += 1
+            self.above.remove(self.watermark)
+
+    def __contains__(self, line: int) -> bool:
+        return line <= self.watermark or line in self.above
+
+    def __len__(self) -> int:
+        return self.watermark + len(self.above)
+
+def load_checkpoint(output_path: str, line_numbers: Optional[Iterator[int]] = None) -> Checkpoint:
+    """
+    Rebuild the checkpoint of an interrupted run from its output file.
+
+    The output file is the checkpoint: every record is flushed as it completes, so
+    the lines it holds are exactly the lines done. Blank input lines, which are never
+    written, are marked done through line_numbers so they do not hold the watermark
+    back. A record cut off by a crash is truncated so new records start on a fresh line.
+
+    :param output_path: The output file of the earlier run.
+    :param line_numbers: Optional iterator of the input line numbers to translate, in order.
+    :return: The lines already translated.
+    """
+    checkpoint = Checkpoint()
+    if not os.path.exists(output_path):
+        return checkpoint
+
+    complete = 0
+    with open(output_path, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            complete += len(raw)
+            try:
+                checkpoint.add(int(json.loads(raw)['line']))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring malformed record in %s", output_path)
+    if complete < os.path.getsize(output_path):
+        logger.warning("Truncating an incomplete record at the end of %s", output_path)
+        with open(output_path, 'r+b') as f:
+            f.truncate(complete)
+
+    if line_numbers is not None and checkpoint.above:
+        # Lines that produce no record, like blank ones, would otherwise hold the watermark back
+        last = max(checkpoint.above)
+        previous = 0
+        for line in line_numbers:
+            if line > last:
+                break
+            for skipped in range(previous + 1, line):
+                checkpoint.add(skipped)
+            previous = line
+    return checkpoint
+
+class BatchTranslator:
+    """
+    Runs utterances through the flow concurrently and writes each result as it completes.
+
+    At most concurrency flow runs are in flight, and at most twice that many lines are
+    read ahead of them, so the input is never loaded whole. Results are written in
+    completion order, not input order.
+    """
+
+    def __init__(self,
+                 flow_id: str,
+                 language: Optional[str],
+                 concurrency: int = BATCH_CONCURRENCY,
+                 rate: float = BATCH_RATE,
+                 burst: Optional[int] = None,
+                 client: Optional[LangflowClient] = None,
+                 cache: Optional[TranslationCache] = None):
+        """
+        Initialize the translator.
+
+        :param flow_id: The ID of the flow to run.
+        :param language: The target language of lines without their own.
+        :param concurrency: Maximum number of flow runs in flight.
+        :param rate: Maximum lines started per second; 0 for no limit.
+        :param burst: Lines that may start at once before the rate applies.
+        :param client: Optional LangflowClient; one with a connection per worker is created if omitted.
+        :param cache: Optional TranslationCache, so repeated lines are translated once.
+        """
+        self.flow_id = flow_id
+        self.language = language
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst)
+        self.client = client or LangflowClient(pool_size=concurrency)
+        self.cache = cache
+        self.single_flight = SingleFlight()
+        self.runners: Dict[str, LangflowRunner] = {}
+        self.runners_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.translated = 0
+        self.failed = 0
+
+    def runner(self, language: str) -> LangflowRunner:
+        """
+        Get the runner targeting a language, sharing the client, cache and single-flight group.
+        """
+        with self.runners_lock:
+            runner = self.runners.get(language)
+            if runner is None:
+                runner = self.runners[language] = LangflowRunner(
+                    flow_id=self.flow_id,
+                    tweaks={LANGUAGE_COMPONENT_ID: {"input_value": language}},
+                    client=self.client,
+                    cache=self.cache,
+                    single_flight=self.single_flight)
+            return runner
+
+    def translate(self, item: BatchItem) -> Dict[str, Any]:
+        """
+        Translate one line.
+
+        :return: The output record of the line.
+        :raises RuntimeError: If the flow returned no translation.
+        """
+        language = item.language or self.language
+        if not language:
+            raise RuntimeError("no target language")
+        with telemetry.utterance(item.id), resilience.deadline(), telemetry.span('batch_line'):
+            results = self.runner(language).run_and_extract(item.text)
+        if results.get('translation', 'N/A') == 'N/A':
+            raise RuntimeError("flow returned no translation")
+        record: Dict[str, Any] = {'line': item.line}
+        if item.id is not None:
+            record['id'] = item.id
+        record.update({'text': item.text, 'language': language})
+        record.update({field: results.get(field, 'N/A') for field in RESULT_FIELDS})
+        return record
+
+    def run(self, items: Iterator[BatchItem], out: TextIO, checkpoint: Optional[Checkpoint] = None) -> Dict[str, Any]:
+        """
+        Translate every item not in the checkpoint, appending records to out as they complete.
+
+        :param items: The lines to translate, e.g. from read_items.
+        :param out: A text file opened for appending.
+        :param checkpoint: Lines done by an earlier run, skipped.
+        :return: Counters of the run: translated, failed, skipped, seconds and lines per second.
+        """
+        checkpoint = checkpoint or Checkpoint()
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        skipped = 0
+        start = last_report = time.perf_counter()
+
+        def on_done(item: BatchItem, future: Future):
+            try:
+                record = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                with self.write_lock:
+                    self.failed += 1
+                logger.warning("Line %d failed: %s", item.line, e)
+            else:
+                with self.write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    self.translated += 1
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            for item in items:
+                if item.line in checkpoint:
+                    skipped += 1
+                    continue
+                slots.acquire()
+                self.limiter.acquire()
+                future = executor.submit(self.translate, item)
+                future.add_done_callback(lambda f, item=item: on_done(item, f))
+
+                now = time.perf_counter()
+                if now - last_report >= 10:
+                    last_report = now
+                    logger.info("%d lines translated, %d failed, %.1f lines/s",
+                                self.translated, self.failed, self.translated / (now - start))
+
+        seconds = time.perf_counter() - start
+        return {
+            'translated': self.translated,
+            'failed': self.failed,
+            'skipped': skipped,
+            'seconds': seconds,
+            'lines_per_second': self.translated / seconds if seconds else 0.0
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help="Text file with one utterance per line, or a JSONL file")
+    parser.add_argument('--output', help="JSONL file the results are appended to (default: <input>.translated.jsonl)")
+    parser.add_argument('--language', default=LANGUAGE_TO_SPEAK, help="Target language of lines without their own")
+    parser.add_argument('--flow-id', default=FLOW_ID, help="Flow to run (default: FLOW_ID)")
+    parser.add_argument('--format', default="auto", choices=["auto", "jsonl", "text"], help="Input format")
+    parser.add_argument('--field', default="text", help="JSONL field holding the utterance")
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY, help="Flow runs in flight")
+    parser.add_argument('--rate', type=float, default=BATCH_RATE, help="Maximum lines started per second; 0 for none")
+    parser.add_argument('--burst', type=int, help="Lines that may start at once before the rate applies")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the translation cache")
+    parser.add_argument('--restart', action='store_true', help="Discard the output of an earlier run")
+    args = parser.parse_args()
+
+    if not args.flow_id:
+        parser.error("--flow-id or FLOW_ID is required")
+    output = args.output or f"{os.path.splitext(args.input)[0]}.translated.jsonl"
+    if args.restart and os.path.exists(output):
+        os.remove(output)
+
+    checkpoint = load_checkpoint(output, (item.line for item in read_items(args.input, args.format, args.field)))
+    if len(checkpoint):
+        logger.info("Resuming from %s: %d lines already done", output, len(checkpoint))
+
+    translator = BatchTranslator(args.flow_id, args.language, args.concurrency, args.rate, args.burst,
+                                 cache=None if args.no_cache else TranslationCache())
+    try:
+        with open(output, 'a', encoding='utf-8') as out:
+            stats = translator.run(read_items(args.input, args.format, args.field), out, checkpoint)
+    finally:
+        translator.client.close()
+
+    logger.info("%d lines translated in %.1f s (%.1f lines/s), %d failed, %d already done",
+                stats['translated'], stats['seconds'], stats['lines_per_second'], stats['failed'], stats['skipped'])
+    if stats['failed']:
+        logger.warning("Run again with the same output file to retry the failed lines")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
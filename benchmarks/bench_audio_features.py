@@ -0,0 +1,67 @@
+"""Micro-benchmark of the vectorized audio features used to gate speech before recognition.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_audio_features --minutes 5
+"""
+import argparse
+import time
+import numpy as np
+from audio_features import (band_energy_ratio, extract_features, frame_rms, frame_signal,
+                            speech_frame_mask, zero_crossing_rate)
+
+def synthetic_audio(minutes: float, samplerate: int = 16000, seed: int = 0) -> np.ndarray:
+    """
+    Generate int16 audio alternating between one second of harmonic "speech" and one second of low noise.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * samplerate)) / samplerate
+    voiced = sum(np.sin(2 * np.pi * f0 * t) / (i + 1) for i, f0 in enumerate(range(200, 2200, 200)))
+    envelope = (np.floor(t) % 2 == 0) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    signal = 4000 * voiced * envelope + rng.normal(0, 20, len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def timeit(fn, repeat: int) -> float:
+    """
+    Return the best wall time of fn over repeat runs, in milliseconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=5.0, help="Length of the synthetic audio")
+    parser.add_argument('--samplerate', type=int, default=16000)
+    parser.add_argument('--frame-duration', type=int, default=30, help="Frame length in ms")
+    parser.add_argument('--threshold', type=float, default=100.0, help="RMS gate used by the gated runs")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    samples = synthetic_audio(args.minutes, args.samplerate)
+    pcm = samples.tobytes()
+    frame_size = int(args.samplerate * args.frame_duration / 1000)
+    frames = frame_signal(samples, frame_size)
+
+    cases = {
+        'frame_signal (strided view)': lambda: frame_signal(samples, frame_size),
+        'frame_rms': lambda: frame_rms(frames),
+        'zero_crossing_rate': lambda: zero_crossing_rate(frames),
+        'band_energy_ratio (all frames)': lambda: band_energy_ratio(frames, args.samplerate),
+        'extract_features (ungated)': lambda: extract_features(pcm, args.samplerate, args.frame_duration),
+        'extract_features (gated)': lambda: extract_features(pcm, args.samplerate, args.frame_duration,
+                                                             gate_rms=args.threshold),
+        'speech gate (gated features + mask)': lambda: speech_frame_mask(
+            extract_features(pcm, args.samplerate, args.frame_duration, gate_rms=args.threshold), args.threshold),
+    }
+
+    print(f"{args.minutes:g} min of {args.samplerate} Hz audio, {len(frames)} frames of {args.frame_duration} ms")
+    for name, fn in cases.items():
+        elapsed = timeit(fn, args.repeat)
+        print(f"{name:<40} {elapsed:9.2f} ms  ({elapsed / args.minutes:7.2f} ms per audio minute)")
+
+if __name__ == '__main__':
+    main()
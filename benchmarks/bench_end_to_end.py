@@ -0,0 +1,180 @@
+"""End-to-end latency benchmark of speech gating, ASR, the flow call, result extraction and TTS.
+
+Runs entirely on local stand-ins: a mock Langflow server, the stub ASR backend and
+the stub TTS synthesizer, each with a configurable delay. Run from the repository root:
+
+    python -m benchmarks.bench_end_to_end --concurrency 1,4,16 --requests 64
+    python -m benchmarks.bench_end_to_end --fixtures benchmarks/fixtures --json results.json
+
+Inject flow failures to see the effect of hedging, deadlines and the circuit breaker:
+
+    python -m benchmarks.bench_end_to_end --stall-rate 0.05 --stall 10000 --deadline 5
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import resilience
+from listen_and_convert import TranscribeAudio, get_asr_backend
+from recognition_pool import RecognitionPool
+from tts_service import StubSynthesizer, TTSService
+from benchmarks.fixtures import load_fixtures, synthetic_fixtures
+from benchmarks.mock_langflow import LANGUAGE_COMPONENT_ID, MockLangflowServer
+
+APP_LOGGERS = ('langflow_runner', 'listen_and_convert', 'recognition_pool', 'resilience', 'tts_service',
+               'vad_segmenter')
+STAGES = ['gating', 'asr', 'flow', 'extract', 'tts', 'total']
+PERCENTILES = (50, 95, 99)
+
+def run_utterance(pcm: bytes, pool: RecognitionPool, runner: Any, tts: TTSService,
+                  deadline: float = 0.0) -> Dict[str, float]:
+    """
+    Take one utterance through the whole pipeline and time each stage, in milliseconds.
+
+    Each utterance gets its own TranscribeAudio, like a new session or API request.
+    """
+    with resilience.deadline(deadline):
+        return time_stages(pcm, pool, runner, tts)
+
+def time_stages(pcm: bytes, pool: RecognitionPool, runner: Any, tts: TTSService) -> Dict[str, float]:
+    """
+    Run the stages of one utterance and time each, in milliseconds.
+    """
+    timings = {}
+    start = last = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage] = (now - last) * 1000
+        last = now
+
+    transcriber = TranscribeAudio(backend="stub", pool=pool)
+    segments = transcriber.speech_segments(pcm)
+    lap('gating')
+    transcription = transcriber.recognize_segments(segments, "en-US").result()
+    lap('asr')
+    if not transcription:
+        raise RuntimeError("No speech recognized in fixture")
+    response = runner.run_flow(transcription)
+    lap('flow')
+    results = runner.extract_output_message(response)
+    lap('extract')
+    if results['translation'] == 'N/A':
+        raise RuntimeError("Flow returned no translation")
+    tts.synthesize(results['translation'], "Nicole", "eleven_multilingual_v2")
+    lap('tts')
+    timings['total'] = (last - start) * 1000
+    return timings
+
+def run_level(concurrency: int, requests: int, fixtures: List[Tuple[str, bytes]],
+              pool: RecognitionPool, runner: Any, tts: TTSService, deadline: float = 0.0) -> Dict[str, Any]:
+    """
+    Run requests utterances with concurrency in flight and summarize the stage latencies.
+    """
+    samples: Dict[str, List[float]] = defaultdict(list)
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_utterance, fixtures[i % len(fixtures)][1], pool, runner, tts, deadline)
+                   for i in range(requests)]
+        for future in futures:
+            try:
+                for stage, elapsed in future.result().items():
+                    samples[stage].append(elapsed)
+            except Exception as e:  # pylint: disable=broad-except
+                failed += 1
+                print(f"  request failed: {e}")
+    wall = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'failed': failed,
+        'seconds': wall,
+        'throughput': (requests - failed) / wall if wall else 0.0,
+        'stages': {stage: {f"p{p}": float(np.percentile(samples[stage], p)) for p in PERCENTILES}
+                   for stage in STAGES if samples[stage]}
+    }
+
+def print_level(level: Dict[str, Any]):
+    """
+    Print the summary of one concurrency level as a table.
+    """
+    print(f"\nconcurrency {level['concurrency']}: {level['requests']} utterances in {level['seconds']:.2f} s, "
+          f"{level['throughput']:.2f} utterances/s, {level['failed']} failed")
+    print(f"{'stage':<10}" + "".join(f"{f'p{p} ms':>12}" for p in PERCENTILES))
+    for stage, percentiles in level['stages'].items():
+        print(f"{stage:<10}" + "".join(f"{percentiles[f'p{p}']:>12.2f}" for p in PERCENTILES))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=48, help="Utterances per concurrency level")
+    parser.add_argument('--fixtures', help="Directory of 16 kHz mono WAV clips; synthetic clips if omitted")
+    parser.add_argument('--flow-delay', type=float, default=300.0, help="Mock Langflow response time, in ms")
+    parser.add_argument('--flow-jitter', type=float, default=50.0, help="Random extra flow delay, in ms")
+    parser.add_argument('--asr-delay', type=float, default=150.0, help="Stub ASR time per utterance, in ms")
+    parser.add_argument('--asr-workers', type=int, default=4, help="Recognition pool workers")
+    parser.add_argument('--tts-delay', type=float, default=100.0, help="Stub TTS time per synthesis, in ms")
+    parser.add_argument('--tts-cache', action='store_true', help="Serve repeated translations from the TTS cache")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of flow runs failing with a 500")
+    parser.add_argument('--stall-rate', type=float, default=0.0, help="Share of flow runs stalling")
+    parser.add_argument('--stall', type=float, default=10000.0, help="Extra delay of a stalled flow run, in ms")
+    parser.add_argument('--deadline', type=float, default=0.0, help="Time budget per utterance, in s; 0 for none")
+    parser.add_argument('--hedge-percentile', type=float, default=95.0, help="Hedge flow runs slower than this; 0 off")
+    parser.add_argument('--breaker-failures', type=int, default=5, help="Failures opening the breaker; 0 off")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--verbose', action='store_true', help="Keep the per-request INFO logs of the app modules")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures()
+    server = MockLangflowServer(delay=args.flow_delay, jitter=args.flow_jitter, error_rate=args.error_rate,
+                                stall_rate=args.stall_rate, stall=args.stall).start()
+    # langflow_runner reads BASE_API_URL on import, so import it once the mock is up
+    os.environ['BASE_API_URL'] = server.base_url
+    from langflow_runner import LangflowClient, LangflowRunner  # pylint: disable=import-outside-toplevel
+    if not args.verbose:
+        for name in APP_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    get_asr_backend("en-US", "stub").delay = args.asr_delay / 1000
+    pool = RecognitionPool(workers=args.asr_workers, queue_size=max(levels) * 4, policy='reject')
+    client = LangflowClient(base_url=server.base_url, pool_size=max(levels), hedge_percentile=args.hedge_percentile,
+                            hedge_min_delay=0.0, breaker_failures=args.breaker_failures)
+    runner = LangflowRunner(flow_id="benchmark", tweaks={LANGUAGE_COMPONENT_ID: {"input_value": "French"}},
+                            client=client)
+    tts = TTSService(StubSynthesizer(delay=args.tts_delay / 1000), cache_dir=None,
+                     max_memory_bytes=64 * 1024 * 1024 if args.tts_cache else 0)
+
+    print(f"{len(fixtures)} fixtures, flow {args.flow_delay:g}±{args.flow_jitter:g} ms, "
+          f"ASR {args.asr_delay:g} ms x {args.asr_workers} workers, TTS {args.tts_delay:g} ms")
+    try:
+        try:
+            run_utterance(fixtures[0][1], pool, runner, tts)  # warm up connections and models
+        except RuntimeError as e:
+            print(f"  warm-up failed: {e}")
+        results = []
+        for concurrency in levels:
+            level = run_level(concurrency, args.requests, fixtures, pool, runner, tts, args.deadline)
+            print_level(level)
+            results.append(level)
+        print(f"\nflow runs {server.requests} ({server.errors} failed, {server.stalls} stalled), "
+              f"breaker {client.breaker.stats()}")
+    finally:
+        pool.shutdown()
+        client.close()
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'levels': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
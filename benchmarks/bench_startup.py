@@ -0,0 +1,82 @@
+"""Cold import cost of the app's subsystems, each measured in a fresh interpreter.
+
+The "app" group is what babbelfish.py imports before its first render; the others
+are loaded on first use of voice input, translation and speech. Run from the
+repository root:
+
+    python -m benchmarks.bench_startup --repeat 5 --top 10
+
+The cost of each script run of the live app (cold start, session start and rerun),
+not counting the imports measured here, is logged by babbelfish.py and exported as
+babbelfish_stage_seconds.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+GROUPS = {
+    'streamlit': ['streamlit', 'streamlit.components.v1'],
+    'app': ['logging_config', 'translation_cache', 'single_flight', 'recognition_pool', 'history_store', 'telemetry',
+            'resilience'],
+    'asr': ['listen_and_convert', 'audio_stream'],
+    'translation': ['langflow_runner'],
+    'tts': ['tts_service'],
+}
+
+# Imported by the interpreter itself before any of the measured imports
+INTERPRETER_STARTUP = {'site', 'encodings', 'zipimport', '_frozen_importlib_external'}
+
+def import_seconds(modules: List[str]) -> float:
+    """
+    Import modules in a fresh interpreter and return the time the imports took, in seconds.
+    """
+    code = (f"import time; start = time.perf_counter(); import {', '.join(modules)}; "
+            "print(time.perf_counter() - start)")
+    env = dict(os.environ, BASE_API_URL=os.environ.get('BASE_API_URL') or "http://127.0.0.1:7860/api/v1/run")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(modules: List[str], top: int) -> List[Tuple[str, float]]:
+    """
+    List the imports with the highest cumulative time, from python -X importtime, in ms.
+    """
+    env = dict(os.environ, BASE_API_URL=os.environ.get('BASE_API_URL') or "http://127.0.0.1:7860/api/v1/run")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+                            capture_output=True, text=True, env=env, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() in INTERPRETER_STARTUP:
+            continue
+        times.append((name.strip(), int(cumulative) / 1000))
+    return sorted(times, key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per group")
+    parser.add_argument('--groups', default=",".join(GROUPS), help="Comma-separated groups to measure")
+    parser.add_argument('--top', type=int, default=0, help="Also list the N slowest imports of each group")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'group':<14}{'median ms':>12}{'min ms':>12}")
+    for group in args.groups.split(','):
+        samples = [import_seconds(GROUPS[group]) * 1000 for _ in range(args.repeat)]
+        results[group] = {'median_ms': statistics.median(samples), 'min_ms': min(samples)}
+        print(f"{group:<14}{results[group]['median_ms']:>12.1f}{results[group]['min_ms']:>12.1f}")
+        for name, ms in slowest_imports(GROUPS[group], args.top) if args.top else []:
+            print(f"    {name:<40}{ms:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'groups': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
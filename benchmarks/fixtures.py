@@ -0,0 +1,86 @@
+"""16 kHz mono PCM fixtures for the benchmarks: recorded WAV clips, or deterministic synthetic utterances.
+
+Write the synthetic set to disk, e.g. to replace some clips with real recordings:
+
+    python -m benchmarks.fixtures --out benchmarks/fixtures
+"""
+import os
+import wave
+import argparse
+from typing import List, Tuple
+import numpy as np
+
+SAMPLERATE = 16000
+
+def synthetic_utterance(speech_seconds: float, seed: int, samplerate: int = SAMPLERATE,
+                        silence_seconds: float = 0.5) -> bytes:
+    """
+    Generate one utterance: low noise, a burst of harmonic "speech" with a syllable-rate envelope, low noise.
+
+    :param speech_seconds: Length of the voiced part.
+    :param seed: Seed of the noise and pitch.
+    :param samplerate: Sample rate in Hz.
+    :param silence_seconds: Length of the noise before and after the voiced part.
+    :return: 16-bit little-endian mono PCM bytes.
+    """
+    rng = np.random.default_rng(seed)
+    f0 = rng.uniform(140, 260)
+    t = np.arange(int(speech_seconds * samplerate)) / samplerate
+    voiced = sum(np.sin(2 * np.pi * f0 * (i + 1) * t) / np.sqrt(i + 1) for i in range(12))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+    silence = np.zeros(int(silence_seconds * samplerate))
+    signal = np.concatenate([silence, 4000 * voiced * envelope, silence])
+    signal += rng.normal(0, 20, len(signal))
+    return np.clip(signal, -32768, 32767).astype('<i2').tobytes()
+
+def synthetic_fixtures(count: int = 8, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    Generate count utterances with speech lengths cycling from 1 to 4 seconds.
+
+    :return: A list of (name, PCM bytes).
+    """
+    return [(f"synthetic-{i:02d}", synthetic_utterance(1.0 + i % 4, seed + i)) for i in range(count)]
+
+def load_fixtures(directory: str) -> List[Tuple[str, bytes]]:
+    """
+    Load every 16 kHz 16-bit mono WAV file of a directory, sorted by name.
+
+    :return: A list of (name, PCM bytes).
+    """
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.wav'):
+            continue
+        with wave.open(os.path.join(directory, name), 'rb') as wav:
+            if (wav.getframerate(), wav.getsampwidth(), wav.getnchannels()) != (SAMPLERATE, 2, 1):
+                raise ValueError(f"{name} is not 16 kHz 16-bit mono")
+            fixtures.append((name[:-len('.wav')], wav.readframes(wav.getnframes())))
+    if not fixtures:
+        raise ValueError(f"No WAV fixtures in {directory}")
+    return fixtures
+
+def write_fixtures(directory: str, fixtures: List[Tuple[str, bytes]]):
+    """
+    Write fixtures as 16 kHz 16-bit mono WAV files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, pcm in fixtures:
+        with wave.open(os.path.join(directory, f"{name}.wav"), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLERATE)
+            wav.writeframes(pcm)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True, help="Directory to write the WAV files to")
+    parser.add_argument('--count', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fixtures = synthetic_fixtures(args.count, args.seed)
+    write_fixtures(args.out, fixtures)
+    print(f"Wrote {len(fixtures)} fixtures to {args.out}")
+
+if __name__ == '__main__':
+    main()
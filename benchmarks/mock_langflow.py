@@ -0,0 +1,254 @@
+"""A local stand-in for the Langflow run endpoint, answering like the Babbelfish.ai.json flow.
+
+Run from the repository root and point BASE_API_URL at it:
+
+    python -m benchmarks.mock_langflow --port 7862 --delay 800 --translation-delay 300
+    BASE_API_URL="http://127.0.0.1:7862/api/v1/run"
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Component display names and IDs of the ChatOutput nodes in Babbelfish.ai.json
+OUTPUT_COMPONENTS = [
+    ("Translation", "ChatOutput-Translation"),
+    ("Explanation", "ChatOutput-Explanation"),
+    ("Detected Language", "ChatOutput-DetectedLanguage"),
+    ("Sentiment", "ChatOutput-Sentiment"),
+]
+LANGUAGE_COMPONENT_ID = "TextInput-UFUC6"
+
+def flow_outputs(message: str, language: str) -> Dict[str, str]:
+    """
+    Build deterministic output texts for a message.
+    """
+    return {
+        "Translation": f"[{language}] {message}",
+        "Explanation": f"Translated {len(message.split())} words into {language}.",
+        "Detected Language": "English",
+        "Sentiment": "Neutral",
+    }
+
+def flow_response(message: str, language: str, session_id: str) -> Dict[str, Any]:
+    """
+    Build a run endpoint response shaped like the one of Babbelfish.ai.json.
+    """
+    texts = flow_outputs(message, language)
+    return {
+        "session_id": session_id,
+        "outputs": [{
+            "inputs": {"input_value": message},
+            "outputs": [{
+                "results": {"message": {"text": texts[name], "sender": "Machine", "sender_name": name,
+                                        "session_id": session_id}},
+                "artifacts": {"message": texts[name], "sender": "Machine", "sender_name": name},
+                "messages": [{"message": texts[name], "sender": "Machine", "sender_name": name,
+                              "component_id": component_id}],
+                "component_display_name": name,
+                "component_id": component_id,
+            } for name, component_id in OUTPUT_COMPONENTS]
+        }]
+    }
+
+class MockLangflowServer:
+    """
+    A threaded HTTP server answering POST {base}/api/v1/run/<flow_id>.
+
+    A plain run sleeps for delay ms (plus up to jitter ms) and returns the full
+    response. With ?stream=true it answers with an event stream like Langflow's:
+    the translation is streamed as tokens after translation_delay ms, and the
+    "end" event with the full response follows once delay ms have passed.
+
+    To exercise timeouts, hedging and circuit breaking, a share of the requests
+    can fail with a 500 (error_rate) or stall for an extra stall ms (stall_rate).
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 delay: float = 800.0,
+                 translation_delay: float = 300.0,
+                 jitter: float = 0.0,
+                 token_delay: float = 10.0,
+                 seed: int = 0,
+                 error_rate: float = 0.0,
+                 stall_rate: float = 0.0,
+                 stall: float = 30000.0):
+        """
+        Initialize the server.
+
+        :param host: Interface to listen on.
+        :param port: Port to listen on; 0 picks a free one.
+        :param delay: Time in ms until the whole flow has finished.
+        :param translation_delay: Time in ms until the translation starts streaming.
+        :param jitter: Maximum random extra delay in ms, added per request.
+        :param token_delay: Time in ms between streamed tokens.
+        :param seed: Seed of the jitter and fault generator.
+        :param error_rate: Share of requests answered with a 500 error right away.
+        :param stall_rate: Share of requests delayed by an extra stall ms, like a stuck LLM node.
+        :param stall: Extra delay of a stalled request, in ms.
+        """
+        self.delay = delay / 1000
+        self.translation_delay = translation_delay / 1000
+        self.jitter = jitter / 1000
+        self.token_delay = token_delay / 1000
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall / 1000
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.stalls = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        # Clients give up on stalled requests; do not print their broken connections
+        self.server.handle_error = lambda request, client_address: None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        The value to use for BASE_API_URL.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/run"
+
+    def request_faults(self) -> Tuple[float, bool]:
+        """
+        Draw the extra delay of one request, in seconds, and whether it fails.
+        """
+        with self.random_lock:
+            self.requests += 1
+            delay = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors += 1
+                return delay, True
+            if self.stall_rate and self.random.random() < self.stall_rate:
+                self.stalls += 1
+                delay += self.stall
+            return delay, False
+
+    def events(self, message: str, language: str, session_id: str, start: float) -> Iterator[Dict[str, Any]]:
+        """
+        Produce the streamed events of one run, sleeping to honour the configured delays.
+        """
+        translation = flow_outputs(message, language)["Translation"]
+        message_id = f"msg-{session_id}"
+        time.sleep(max(0.0, start + self.translation_delay - time.monotonic()))
+        yield {"event": "add_message", "data": {"id": message_id, "sender_name": "Translation", "text": ""}}
+        for i, token in enumerate(translation.split(" ")):
+            yield {"event": "token", "data": {"id": message_id, "chunk": token if i == 0 else " " + token}}
+            time.sleep(self.token_delay)
+        yield {"event": "add_message", "data": {"id": message_id, "sender_name": "Translation", "text": translation}}
+        time.sleep(max(0.0, start + self.delay - time.monotonic()))
+        yield {"event": "end", "data": {"result": flow_response(message, language, session_id)}}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers flow runs; any other request gets a 404."""
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+            def send_body(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                start = time.monotonic()
+                url = urlparse(self.path)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not url.path.startswith("/api/v1/run/"):
+                    self.send_body(404, b'{"detail": "Not Found"}')
+                    return
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_body(422, b'{"detail": "Invalid JSON"}')
+                    return
+
+                message = str(payload.get("input_value", ""))
+                language = (payload.get("tweaks") or {}).get(LANGUAGE_COMPONENT_ID, {}).get("input_value", "English")
+                flow_id = url.path.rsplit("/", 1)[-1]
+                delay, error = mock.request_faults()
+                if error:
+                    self.send_body(500, b'{"detail": "Injected error"}')
+                    return
+                start += delay
+
+                if parse_qs(url.query).get("stream") == ["true"]:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for event in mock.events(message, language, flow_id, start):
+                        data = f"data: {json.dumps(event)}\n\n".encode("utf-8")
+                        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+
+                time.sleep(max(0.0, start + mock.delay - time.monotonic()))
+                self.send_body(200, json.dumps(flow_response(message, language, flow_id)).encode("utf-8"))
+
+        return Handler
+
+    def start(self) -> "MockLangflowServer":
+        """
+        Serve in a background thread.
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-langflow", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockLangflowServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=7862)
+    parser.add_argument('--delay', type=float, default=800.0, help="ms until the whole flow has finished")
+    parser.add_argument('--translation-delay', type=float, default=300.0, help="ms until the translation streams")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Maximum random extra delay per request, in ms")
+    parser.add_argument('--token-delay', type=float, default=10.0, help="ms between streamed tokens")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failing with a 500")
+    parser.add_argument('--stall-rate', type=float, default=0.0, help="Share of requests stalling")
+    parser.add_argument('--stall', type=float, default=30000.0, help="Extra delay of a stalled request, in ms")
+    args = parser.parse_args()
+
+    server = MockLangflowServer(args.host, args.port, args.delay, args.translation_delay, args.jitter,
+                                args.token_delay, error_rate=args.error_rate, stall_rate=args.stall_rate,
+                                stall=args.stall)
+    print(f"Mock Langflow listening, set BASE_API_URL=\"{server.base_url}\"")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+if __name__ == '__main__':
+    main()
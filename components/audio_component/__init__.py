@@ -7,8 +7,13 @@ audio_component_func = components.declare_component(
     path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend/build"),
 )
 
-def audio_component(is_recording: bool):
+def audio_component(is_recording: bool, streaming: bool = False, ack: dict = None, chunk_ms: int = 480):
     #print("audio_component called from __init__, is_recording: ", is_recording)
-    # Call the component with the provided arguments
-    component_value = audio_component_func(is_recording=is_recording)
+    # Call the component with the provided arguments.
+    # In streaming mode the component sends packets of 16 kHz int16 chunks while recording
+    # (see audio_stream.parse_audio_packet) and drops the chunks acknowledged through ack.
+    component_value = audio_component_func(is_recording=is_recording,
+                                           streaming=streaming,
+                                           ack=ack,
+                                           chunk_ms=chunk_ms)
     return component_value
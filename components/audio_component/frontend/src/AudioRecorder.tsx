@@ -20,6 +20,14 @@ export interface ReactMicStopEvent {
     blobURL: string;
 }
 
+interface StreamChunk {
+    seq: number;
+    data: Int16Array;
+}
+
+const STREAM_SAMPLE_RATE = 16000;
+const PACKET_HEADER_BYTES = 16;
+
 class AudioRecorder extends StreamlitComponentBase {
     public state = { isRecording: false, silentDuration: 0, voiceDetected: false }
     private audioContext?: AudioContext;
@@ -32,6 +40,18 @@ class AudioRecorder extends StreamlitComponentBase {
     private currentRecordedData?: Blob;
     private noiseGateThreshold: number = -50; // in decibels
 
+    // Streaming mode: 16 kHz int16 chunks are sent while recording and kept until acknowledged
+    private mediaStream?: MediaStream;
+    private streamContext?: AudioContext;
+    private streamProcessor?: ScriptProcessorNode;
+    private streamId: number = 0;
+    private nextSeq: number = 0;
+    private chunkSamples: number = STREAM_SAMPLE_RATE * 0.48;
+    private currentChunk: Int16Array = new Int16Array(0);
+    private currentLength: number = 0;
+    private resamplePosition: number = 0;
+    private unackedChunks: StreamChunk[] = [];
+
     constructor(props: any) {
         super(props);
         this.onData = this.onData.bind(this);
@@ -58,11 +78,25 @@ class AudioRecorder extends StreamlitComponentBase {
         );
     };
 
+    public componentDidUpdate(): void {
+        super.componentDidUpdate();
+
+        // Forget the chunks the server has consumed; the rest are sent again with the next packet
+        const ack = this.props.args.ack;
+        if (ack && ack.stream_id === this.streamId) {
+            this.unackedChunks = this.unackedChunks.filter(chunk => chunk.seq > ack.seq);
+        }
+    }
+
     private async startRecording(): Promise<void> {
         this.setState({ isRecording: true });
         try {
             const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            this.initAudioContext(stream);
+            if (this.props.args.streaming) {
+                this.startStreaming(stream);
+            } else {
+                this.initAudioContext(stream);
+            }
         } catch (err) {
             console.error('Error accessing microphone:', err);
         }
@@ -73,6 +107,94 @@ class AudioRecorder extends StreamlitComponentBase {
         if (this.audioContext && this.audioContext.state !== "closed") {
             this.audioContext.close();
         }
+        if (this.streamContext) {
+            this.stopStreaming();
+        }
+    }
+
+    private startStreaming(stream: MediaStream): void {
+        const AudioContext = window.AudioContext || window.webkitAudioContext;
+        this.mediaStream = stream;
+        this.streamContext = new AudioContext();
+        this.streamId = Math.floor(Math.random() * 0xFFFFFFFF);
+        this.nextSeq = 0;
+        this.chunkSamples = Math.round(STREAM_SAMPLE_RATE * (this.props.args.chunk_ms ?? 480) / 1000);
+        this.currentChunk = new Int16Array(this.chunkSamples);
+        this.currentLength = 0;
+        this.resamplePosition = 0;
+        this.unackedChunks = [];
+
+        // Same voice band-pass as the recorded clips, applied live
+        const source = this.streamContext.createMediaStreamSource(stream);
+        const bandPassFilter = this.streamContext.createBiquadFilter();
+        bandPassFilter.type = "bandpass";
+        bandPassFilter.frequency.value = (this.minVoiceFrequency + this.maxVoiceFrequency) / 2;
+        bandPassFilter.Q.value = (this.maxVoiceFrequency - this.minVoiceFrequency) / (this.minVoiceFrequency + this.maxVoiceFrequency);
+
+        this.streamProcessor = this.streamContext.createScriptProcessor(4096, 1, 1);
+        this.streamProcessor.onaudioprocess = this.onStreamAudio;
+        source.connect(bandPassFilter);
+        bandPassFilter.connect(this.streamProcessor);
+        this.streamProcessor.connect(this.streamContext.destination);
+    }
+
+    private stopStreaming(): void {
+        if (this.streamProcessor) {
+            this.streamProcessor.onaudioprocess = null;
+            this.streamProcessor.disconnect();
+        }
+        this.mediaStream?.getTracks().forEach(track => track.stop());
+        if (this.streamContext && this.streamContext.state !== "closed") {
+            this.streamContext.close();
+        }
+        this.streamContext = undefined;
+        this.streamProcessor = undefined;
+        this.mediaStream = undefined;
+
+        // The last, possibly short, chunk ends the stream
+        this.unackedChunks.push({ seq: this.nextSeq++, data: this.currentChunk.slice(0, this.currentLength) });
+        this.currentLength = 0;
+        this.sendChunks(true);
+    }
+
+    private onStreamAudio = (event: AudioProcessingEvent): void => {
+        // Resample to 16 kHz and convert to int16, cutting fixed-size chunks
+        const input = event.inputBuffer.getChannelData(0);
+        const ratio = event.inputBuffer.sampleRate / STREAM_SAMPLE_RATE;
+        let position = this.resamplePosition;
+        while (position < input.length) {
+            const s = Math.max(-1, Math.min(1, input[Math.floor(position)]));
+            this.currentChunk[this.currentLength++] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+            if (this.currentLength === this.chunkSamples) {
+                this.unackedChunks.push({ seq: this.nextSeq++, data: this.currentChunk });
+                this.currentChunk = new Int16Array(this.chunkSamples);
+                this.currentLength = 0;
+                this.sendChunks(false);
+            }
+            position += ratio;
+        }
+        this.resamplePosition = position - input.length;
+    };
+
+    private sendChunks(final: boolean): void {
+        // Header: stream id, first chunk seq, bytes per chunk, flags (uint32 little-endian), then the int16 chunks
+        const payloadBytes = this.unackedChunks.reduce((total, chunk) => total + chunk.data.byteLength, 0);
+        const packet = new ArrayBuffer(PACKET_HEADER_BYTES + payloadBytes);
+        const header = new DataView(packet);
+        const firstSeq = this.unackedChunks.length ? this.unackedChunks[0].seq : this.nextSeq;
+        header.setUint32(0, this.streamId, true);
+        header.setUint32(4, firstSeq, true);
+        header.setUint32(8, this.chunkSamples * 2, true);
+        header.setUint32(12, final ? 1 : 0, true);
+
+        // Int16Array uses the platform byte order, little-endian on every browser platform
+        let offset = PACKET_HEADER_BYTES;
+        for (const chunk of this.unackedChunks) {
+            new Int16Array(packet, offset, chunk.data.length).set(chunk.data);
+            offset += chunk.data.byteLength;
+        }
+
+        Streamlit.setComponentValue(packet);
     }
 
     private onData(recordedBlob: Blob): void {
@@ -80,7 +202,10 @@ class AudioRecorder extends StreamlitComponentBase {
     }
 
     private onStop(recordedData: ReactMicStopEvent): void {
-        this.processAudio(recordedData.blob);
+        // In streaming mode the audio has already been sent chunk by chunk
+        if (!this.props.args.streaming) {
+            this.processAudio(recordedData.blob);
+        }
     }  
 
     private async processAudio(recordedBlob: Blob): Promise<void> {
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 import streamlit.components.v1 as components
 
 # Declare the ElevenLabsComponent
@@ -7,8 +8,10 @@ elevenlabs_component_func = components.declare_component(
     path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend/build"),
 )
 
-def elevenlabs_component(text: str, voice_id: str, model_id: str):
-    # Call the component with the provided arguments
-    print("elevenlabs_component called from __init__, text: ", text)
-    component_value = elevenlabs_component_func(text=text, voice_id=voice_id, model_id=model_id)
+def elevenlabs_component(audio: bytes, audio_key: str, output_format: Optional[str] = None,
+                         stream_id: Optional[str] = None, seq: int = 0):
+    # Call the component with audio synthesized by the TTS service; audio_key identifies it so reruns don't replay it.
+    # Chunks of one stream share a stream_id and are played back to back in seq order.
+    component_value = elevenlabs_component_func(audio=audio, audio_key=audio_key, output_format=output_format,
+                                                stream_id=stream_id, seq=seq)
     return component_value
@@ -1,7 +1,5 @@
 import React, { useEffect } from "react";
 import { withStreamlitConnection, ComponentProps } from "streamlit-component-lib";
-import { ElevenLabsClient } from "elevenlabs";
-import { Buffer } from "buffer";
 
 declare global {
     interface Window {
@@ -9,66 +7,154 @@ declare global {
     }
 }
 
-const XI_API_KEY = process.env.REACT_APP_XI_API_KEY;
+// Chunks of a streamed translation usually arrive as separate component instances, each with its
+// own audio context. They share the order and wall-clock end of the audio scheduled so far through
+// localStorage, which every instance of the component can reach.
+const STREAM_STATE_PREFIX = "babbelfish-tts-";
+const STREAM_STATE_TTL_MS = 10 * 60 * 1000;
+const STREAM_ORDER_WAIT_MS = 2000;
 
-if (!XI_API_KEY) {
-    throw new Error("Missing XI_API_KEY in environment variables");
+interface StreamState {
+    nextSeq: number;
+    endTime: number;
+    updated: number;
 }
 
-const client = new ElevenLabsClient({
-    apiKey: XI_API_KEY,
-});
-
-export const createAudioStreamFromText = async (
-    text: string,
-    voice_id: string,
-    model_id: string,
-): Promise<Buffer> => {
-    const audioStream = await client.generate({
-        voice: voice_id,
-        model_id: model_id,
-        text,
-    });
-
-    const chunks: Buffer[] = [];
-    for await (const chunk of audioStream) {
-        chunks.push(chunk);
+const readStreamState = (streamId: string): StreamState => {
+    const stored = localStorage.getItem(STREAM_STATE_PREFIX + streamId);
+    return stored ? JSON.parse(stored) : { nextSeq: 0, endTime: 0, updated: Date.now() };
+};
+
+const writeStreamState = (streamId: string, state: StreamState) => {
+    localStorage.setItem(STREAM_STATE_PREFIX + streamId, JSON.stringify(state));
+};
+
+const forgetOldStreams = () => {
+    try {
+        const now = Date.now();
+        for (const key of Object.keys(localStorage)) {
+            if (key.startsWith(STREAM_STATE_PREFIX) && now - readStreamState(key.slice(STREAM_STATE_PREFIX.length)).updated > STREAM_STATE_TTL_MS) {
+                localStorage.removeItem(key);
+            }
+        }
+    } catch (error) {
+        console.warn('Cannot clean up stream state', error);
+    }
+};
+
+const waitForTurn = async (streamId: string, seq: number) => {
+    // Instances may load out of order; wait for the previous chunk unless it never shows up
+    const deadline = Date.now() + STREAM_ORDER_WAIT_MS;
+    while (readStreamState(streamId).nextSeq < seq && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 10));
     }
+};
+
+const decodeAudio = async (audioContext: AudioContext, audio: Uint8Array, format?: string): Promise<AudioBuffer> => {
+    // Raw 16-bit PCM ("pcm_16000") can be played chunk by chunk without a decoder
+    const pcm = /^pcm_(\d+)$/.exec(format || "");
+    if (pcm) {
+        const numSamples = audio.byteLength >> 1;
+        const audioBuffer = audioContext.createBuffer(1, Math.max(numSamples, 1), parseInt(pcm[1], 10));
+        const channel = audioBuffer.getChannelData(0);
+        const view = new DataView(audio.buffer, audio.byteOffset, audio.byteLength);
+        for (let i = 0; i < numSamples; i++) {
+            channel[i] = view.getInt16(i * 2, true) / 0x8000;
+        }
+        return audioBuffer;
+    }
+
+    // decodeAudioData detaches its input, so decode a copy of the component arg
+    const arrayBuffer = audio.buffer.slice(audio.byteOffset, audio.byteOffset + audio.byteLength);
+    return audioContext.decodeAudioData(arrayBuffer);
+};
 
-    const content = Buffer.concat(chunks);
-    return content;
+// Browsers cap the number of live audio contexts, so every context is closed once the
+// last source scheduled on it has ended. Chunks of a stream that reach the same instance
+// are scheduled on one shared context.
+interface Player {
+    context: AudioContext;
+    playing: number;
+}
+
+const players = new Map<string, Player>();
+
+const openPlayer = (streamId?: string): Player => {
+    const existing = streamId ? players.get(streamId) : undefined;
+    if (existing) {
+        return existing;
+    }
+    const player = { context: new (window.AudioContext || window.webkitAudioContext)(), playing: 0 };
+    if (streamId) {
+        players.set(streamId, player);
+    }
+    return player;
 };
 
-const playAudio = async (audioBuffer: Buffer) => {
-    const audioContext = new (window.AudioContext || window.webkitAudioContext)();
+const releasePlayer = (player: Player, streamId?: string) => {
+    if (player.playing > 0) {
+        return;
+    }
+    if (streamId && players.get(streamId) === player) {
+        players.delete(streamId);
+    }
+    if (player.context.state !== "closed") {
+        player.context.close().catch(error => console.warn('Cannot close audio context', error));
+    }
+};
 
-    // Convert the Buffer to an ArrayBuffer
-    const arrayBuffer = audioBuffer.buffer.slice(audioBuffer.byteOffset, audioBuffer.byteOffset + audioBuffer.byteLength);
+const playAudio = async (audio: Uint8Array, format?: string, streamId?: string, seq: number = 0) => {
+    const player = openPlayer(streamId);
+    const audioContext = player.context;
+    // Counted from the start, so the context is not closed while this chunk is being decoded
+    player.playing++;
+    let started = false;
 
     try {
         // Decode the audio data
-        const decodedData = await audioContext.decodeAudioData(arrayBuffer);
-        
+        const decodedData = await decodeAudio(audioContext, audio, format);
+
         // Create a buffer source
         const source = audioContext.createBufferSource();
         source.buffer = decodedData;
         source.connect(audioContext.destination);
-        source.start(0);
+        source.onended = () => {
+            player.playing--;
+            releasePlayer(player, streamId);
+        };
+        if (!streamId) {
+            source.start(0);
+            started = true;
+            return;
+        }
+
+        // Start right after the previous chunk of the stream, or now if it has already ended
+        await waitForTurn(streamId, seq);
+        const now = Date.now();
+        const startTime = Math.max(now, readStreamState(streamId).endTime);
+        source.start(audioContext.currentTime + (startTime - now) / 1000);
+        started = true;
+        writeStreamState(streamId, { nextSeq: seq + 1, endTime: startTime + decodedData.duration * 1000, updated: now });
     } catch (error) {
-        console.error('Error decoding audio data', error);
+        console.error('Error playing audio data', error);
+        if (!started) {
+            // No onended will come for this chunk
+            player.playing--;
+            releasePlayer(player, streamId);
+        }
     }
 };
 
+forgetOldStreams();
+
 const ElevenLabs: React.FC<ComponentProps> = ({ args }) => {
+    // The audio is synthesized and cached by the Python TTS service; play it once per audio key
     useEffect(() => {
-        const fetchAndPlayAudio = async () => {
-            //console.log("Text inputs from EL component args", args);
-            const audioBuffer = await createAudioStreamFromText(args.text, args.voice_id, args.model_id);
-            playAudio(audioBuffer);
-        };
-        
-        fetchAndPlayAudio();
-    }, [args]);
+        if (args.audio) {
+            playAudio(args.audio, args.output_format, args.stream_id, args.seq);
+        }
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [args.audio_key]);
 
     return (
         <div>
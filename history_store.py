@@ -0,0 +1,288 @@
+"""A bounded store for babbelfish.ai chat histories that keeps recent turns in memory and spills older ones to SQLite."""
+import os
+import json
+import time
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, IO, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from logging_config import get_logger
+
+# Load environment variables from .env file
+load_dotenv()
+HISTORY_PATH = os.getenv('HISTORY_PATH') or None
+HISTORY_RING_SIZE = int(os.getenv('HISTORY_RING_SIZE', '100'))
+HISTORY_MEMORY_BUDGET_MB = float(os.getenv('HISTORY_MEMORY_BUDGET_MB', '64'))
+HISTORY_TTL = float(os.getenv('HISTORY_TTL', str(7 * 86400)))
+
+# Configure logging
+logger = get_logger(__name__)
+
+# One chat message: sequence number within its session, role, content
+Message = Tuple[int, str, str]
+
+def message_size(role: str, content: str) -> int:
+    """
+    Approximate the memory held by a message, in bytes.
+    """
+    return len(role) + len(content.encode('utf-8'))
+
+class SessionHistory:
+    """
+    The chat history of one session.
+
+    The most recent messages are kept in a fixed-size ring. Older messages,
+    and the oldest ones of idle sessions when the process goes over its memory
+    budget, are spilled to the store's SQLite file, or dropped when the store
+    has none. Messages are addressed by their position in the conversation,
+    wherever they currently live, so rendering and export can page through the
+    whole history.
+    """
+
+    def __init__(self, store: "HistoryStore", session_id: str, ring_size: int):
+        """
+        Initialize an empty history. Use HistoryStore.session() to create one.
+
+        :param store: The store that owns the spill file and the memory budget.
+        :param session_id: Identifies the session in the spill file.
+        :param ring_size: Maximum number of messages kept in memory.
+        """
+        self.store = store
+        self.session_id = session_id
+        self.ring_size = ring_size
+        self.ring: Deque[Message] = deque()
+        self.ring_bytes = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def oldest(self) -> int:
+        """
+        Position of the oldest message that can still be read; above 0 once messages were dropped.
+        """
+        with self.store.lock:
+            if self.store.db is not None:
+                return 0
+            return self.ring[0][0] if self.ring else self.count
+
+    def append(self, role: str, content: str):
+        """
+        Add a message, spilling the oldest in-memory message if the ring is full.
+
+        :param role: "user" or "assistant".
+        :param content: The message text.
+        """
+        with self.store.lock:
+            self.ring.append((self.count, role, content))
+            self.count += 1
+            size = message_size(role, content)
+            self.ring_bytes += size
+            self.store.memory_bytes += size
+            if len(self.ring) > self.ring_size:
+                self._spill(len(self.ring) - self.ring_size)
+            self.store._touch(self)
+
+    def _spill(self, count: int):
+        """
+        Move the oldest count messages of the ring to the spill file. Caller holds the store lock.
+        """
+        spilled = [self.ring.popleft() for _ in range(min(count, len(self.ring)))]
+        if not spilled:
+            return
+        self.store._write(self.session_id, spilled)
+        size = sum(message_size(role, content) for _, role, content in spilled)
+        self.ring_bytes -= size
+        self.store.memory_bytes -= size
+
+    def page(self, offset: int, limit: int) -> List[Dict[str, str]]:
+        """
+        Get messages by position in the conversation, oldest first.
+
+        :param offset: Position of the first message.
+        :param limit: Maximum number of messages.
+        :return: A list of {"role", "content"} dictionaries.
+        """
+        with self.store.lock:
+            end = min(offset + limit, self.count)
+            first_in_memory = self.ring[0][0] if self.ring else self.count
+            messages: List[Message] = []
+            if offset < first_in_memory:
+                messages += self.store._read(self.session_id, offset, min(end, first_in_memory))
+            messages += [m for m in self.ring if offset <= m[0] < end]
+        return [{"role": role, "content": content} for _, role, content in messages]
+
+    def recent(self, limit: int) -> List[Dict[str, str]]:
+        """
+        Get the last limit messages, oldest first.
+        """
+        return self.page(max(0, self.count - limit), limit)
+
+    def iter_pages(self, page_size: int = 500) -> Iterator[List[Dict[str, str]]]:
+        """
+        Iterate over the whole history a page at a time, oldest first.
+        """
+        for offset in range(0, len(self), page_size):
+            yield self.page(offset, page_size)
+
+    def export_jsonl(self, fp: IO[str], page_size: int = 500) -> int:
+        """
+        Write the whole history as JSON lines without loading it all into memory.
+
+        :param fp: A text file to write to.
+        :param page_size: Messages read per page.
+        :return: The number of messages written.
+        """
+        written = 0
+        for page in self.iter_pages(page_size):
+            for message in page:
+                fp.write(json.dumps(message, ensure_ascii=False) + "\n")
+            written += len(page)
+        return written
+
+    def clear(self):
+        """
+        Forget every message of the session, in memory and in the spill file.
+        """
+        with self.store.lock:
+            self.store.memory_bytes -= self.ring_bytes
+            self.ring.clear()
+            self.ring_bytes = 0
+            self.count = 0
+            self.store._delete(self.session_id)
+
+class HistoryStore:
+    """
+    Holds the chat histories of every session of the process.
+
+    Each session keeps at most ring_size recent messages in memory. Together
+    they are held under memory_budget bytes: when an append goes over it, the
+    least recently active sessions spill their in-memory messages to SQLite
+    first. Spilled messages expire after ttl seconds, and a history is dropped
+    from memory and disk when its session is garbage collected.
+
+    Conversations are only written to disk when a db_path is given. Without one,
+    spilled messages are dropped, so each session keeps just its recent messages.
+    """
+
+    def __init__(self,
+                 db_path: Optional[str] = HISTORY_PATH,
+                 ring_size: int = HISTORY_RING_SIZE,
+                 memory_budget: int = int(HISTORY_MEMORY_BUDGET_MB * 1024 * 1024),
+                 ttl: float = HISTORY_TTL):
+        """
+        Initialize the store.
+
+        :param db_path: Optional path of the SQLite spill file; spilled messages are dropped without one.
+        :param ring_size: Maximum number of messages each session keeps in memory.
+        :param memory_budget: Maximum bytes of message text kept in memory by all sessions together.
+        :param ttl: Seconds spilled messages are kept.
+        """
+        self.ring_size = ring_size
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.memory_bytes = 0
+        self.spilled = 0
+        self.sessions: "OrderedDict[str, weakref.ref]" = OrderedDict()
+
+        self.db: Optional[sqlite3.Connection] = None
+        if not db_path:
+            return
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS messages (session_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+                        "role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL, "
+                        "PRIMARY KEY (session_id, seq))")
+        self.db.execute("DELETE FROM messages WHERE created_at <= ?", (time.time() - ttl,))
+        self.db.commit()
+
+    def session(self, session_id: str) -> SessionHistory:
+        """
+        Create the history of a new session.
+
+        :param session_id: A unique ID for the session.
+        :return: An empty SessionHistory; the caller keeps it alive, e.g. in Streamlit session state.
+        """
+        history = SessionHistory(self, session_id, self.ring_size)
+        with self.lock:
+            self.sessions[session_id] = weakref.ref(history)
+        weakref.finalize(history, self._forget, session_id)
+        return history
+
+    def _forget(self, session_id: str):
+        """
+        Drop a garbage-collected session: its spilled messages can no longer be read.
+        """
+        with self.lock:
+            ref = self.sessions.get(session_id)
+            if ref is not None and ref() is None:
+                del self.sessions[session_id]
+            self._delete(session_id)
+            self.memory_bytes = sum(h.ring_bytes for h in (ref() for ref in self.sessions.values()) if h is not None)
+
+    def _touch(self, history: SessionHistory):
+        """
+        Mark a session as the most recently active and enforce the memory budget. Caller holds the lock.
+        """
+        if history.session_id in self.sessions:
+            self.sessions.move_to_end(history.session_id)
+        for session_id in list(self.sessions):
+            if self.memory_bytes <= self.memory_budget:
+                break
+            idle = self.sessions[session_id]()
+            if idle is None:
+                del self.sessions[session_id]
+            elif idle is not history and idle.ring:
+                logger.debug("History memory over budget, spilling idle session %s", session_id)
+                idle._spill(len(idle.ring))
+        if self.memory_bytes > self.memory_budget:
+            # Only the active session is left in memory; keep just its last message
+            history._spill(len(history.ring) - 1)
+
+    def _write(self, session_id: str, messages: List[Message]):
+        """
+        Append spilled messages to the SQLite file, if any. Caller holds the lock.
+        """
+        self.spilled += len(messages)
+        if self.db is None:
+            return
+        now = time.time()
+        self.db.executemany("INSERT OR REPLACE INTO messages (session_id, seq, role, content, created_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            [(session_id, seq, role, content, now) for seq, role, content in messages])
+        self.db.commit()
+
+    def _read(self, session_id: str, start: int, end: int) -> List[Message]:
+        """
+        Read spilled messages with start <= seq < end. Caller holds the lock.
+        """
+        if self.db is None:
+            return []
+        return self.db.execute("SELECT seq, role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? "
+                               "ORDER BY seq", (session_id, start, end)).fetchall()
+
+    def _delete(self, session_id: str):
+        """
+        Delete the spilled messages of a session. Caller holds the lock.
+        """
+        if self.db is None:
+            return
+        self.db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self.db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the memory in use and the spill counters.
+
+        :return: A dictionary with the live sessions, memory bytes, budget and spilled messages.
+        """
+        with self.lock:
+            return {
+                'sessions': len(self.sessions),
+                'memory_bytes': self.memory_bytes,
+                'memory_budget': self.memory_budget,
+                'spilled': self.spilled
+            }
@@ -1,11 +1,23 @@
 """A class to handle running the babblefish.ai Langflow GenAI workflow and extracting responses."""
 import os
-import logging
-from typing import Optional, Dict, Any
+import json
+import time
+import asyncio
+import hashlib
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 import threading
 from dotenv import load_dotenv
+import httpx
 import requests
-import coloredlogs
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from logging_config import get_logger
+from translation_cache import TranslationCache
+from single_flight import SingleFlight
+import telemetry
+import resilience
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,19 +26,305 @@ BASE_API_URL = os.getenv('BASE_API_URL')
 if not BASE_API_URL:
     raise EnvironmentError("BASE_API_URL environment variable not set")
 
+# Connection pool and retry settings for the shared Langflow client
+LANGFLOW_POOL_SIZE = int(os.getenv('LANGFLOW_POOL_SIZE', '32'))
+LANGFLOW_CONNECT_TIMEOUT = float(os.getenv('LANGFLOW_CONNECT_TIMEOUT', '5'))
+LANGFLOW_READ_TIMEOUT = float(os.getenv('LANGFLOW_READ_TIMEOUT', '30'))
+LANGFLOW_MAX_RETRIES = int(os.getenv('LANGFLOW_MAX_RETRIES', '3'))
+LANGFLOW_RETRY_BACKOFF = float(os.getenv('LANGFLOW_RETRY_BACKOFF', '0.25'))
+LANGFLOW_MAX_CONCURRENCY = int(os.getenv('LANGFLOW_MAX_CONCURRENCY', '16'))
+
+# Tail-latency control: hedge slow flow runs and fail fast while Langflow is degraded
+LANGFLOW_HEDGE_PERCENTILE = float(os.getenv('LANGFLOW_HEDGE_PERCENTILE', '95'))
+LANGFLOW_HEDGE_MIN_DELAY = float(os.getenv('LANGFLOW_HEDGE_MIN_DELAY', '1'))
+LANGFLOW_HEDGE_INITIAL_DELAY = float(os.getenv('LANGFLOW_HEDGE_INITIAL_DELAY', '10'))
+LANGFLOW_BREAKER_FAILURES = int(os.getenv('LANGFLOW_BREAKER_FAILURES', '5'))
+LANGFLOW_BREAKER_RESET = float(os.getenv('LANGFLOW_BREAKER_RESET', '30'))
+
+# ID of the TextInput component holding the target language in Babbelfish.ai.json
+LANGUAGE_COMPONENT_ID = "TextInput-UFUC6"
+# Sender name of the ChatOutput component emitting the translation in Babbelfish.ai.json
+TRANSLATION_SENDER_NAME = "Translation"
+
 # Configure logging
-logger = logging.getLogger(__name__)
-coloredlogs.install(level='INFO',
-                    logger=logger,
-                    fmt='%(filename)s %(levelname)s %(message)s',
-                    level_styles={
-                        'debug': {'color': 'green'},
-                        'info': {'color': 'blue'},
-                        'warning': {'color': 'yellow'},
-                        'error': {'color': 'red'},
-                        'critical': {'color': 'magenta'}
-                    }
-)
+logger = get_logger(__name__)
+
+def is_server_error(error: BaseException) -> bool:
+    """
+    Whether a flow run failed with a 5xx answer, the only failure run_json retries.
+
+    Connection errors were already retried by the transport, and any other answer,
+    e.g. a 200 that is not JSON, means the flow has run.
+    """
+    return isinstance(error, requests.HTTPError) and error.response is not None \
+        and error.response.status_code >= 500
+
+class LangflowClient:
+    """
+    A process-wide HTTP client for the Langflow API.
+
+    Keeps a pooled keep-alive session so that consecutive flow runs reuse open
+    TCP/TLS connections to BASE_API_URL instead of paying a new handshake per
+    message. Connection errors are retried with exponential backoff at the
+    transport level.
+
+    Plain flow runs go through run_json, which keeps them within the current
+    utterance deadline and may send the same run twice: a duplicate of a run slower
+    than hedge_percentile of the recent ones, and one retry of a run that failed
+    with a server error. A flow run is not idempotent, so every duplicate is a
+    second full run upstream; set hedge_percentile to 0 to send neither. Streaming
+    runs (stream) are never duplicated. All runs go through a circuit breaker that
+    fails them fast while Langflow keeps failing.
+
+    The client also owns the async side: one httpx.AsyncClient per event loop,
+    with at most max_concurrency flow runs in flight on that loop. Async runs
+    (apost, used by arun_flow and arun_many) get the deadline and the circuit
+    breaker but are not hedged or retried.
+    """
+
+    def __init__(self,
+                 base_url: str = BASE_API_URL,
+                 pool_size: int = LANGFLOW_POOL_SIZE,
+                 connect_timeout: float = LANGFLOW_CONNECT_TIMEOUT,
+                 read_timeout: float = LANGFLOW_READ_TIMEOUT,
+                 max_retries: int = LANGFLOW_MAX_RETRIES,
+                 retry_backoff: float = LANGFLOW_RETRY_BACKOFF,
+                 max_concurrency: int = LANGFLOW_MAX_CONCURRENCY,
+                 hedge_percentile: float = LANGFLOW_HEDGE_PERCENTILE,
+                 hedge_min_delay: float = LANGFLOW_HEDGE_MIN_DELAY,
+                 hedge_initial_delay: float = LANGFLOW_HEDGE_INITIAL_DELAY,
+                 breaker_failures: int = LANGFLOW_BREAKER_FAILURES,
+                 breaker_reset: float = LANGFLOW_BREAKER_RESET):
+        """
+        Initialize the client and its connection pool.
+
+        :param base_url: The Langflow run endpoint, e.g. "http://127.0.0.1:7860/api/v1/run".
+        :param pool_size: Maximum number of keep-alive connections kept open to Langflow.
+        :param connect_timeout: Seconds to wait for a connection to be established.
+        :param read_timeout: Seconds to wait for the flow to respond.
+        :param max_retries: Number of retries on connection errors.
+        :param retry_backoff: Backoff factor in seconds between retries.
+        :param max_concurrency: Maximum concurrent async flow runs per event loop.
+        :param hedge_percentile: Percentile of recent run times after which a duplicate run is sent; 0 disables hedging.
+        :param hedge_min_delay: Minimum seconds before a duplicate run is sent.
+        :param hedge_initial_delay: Seconds before a duplicate run is sent while there are too few run times to go by.
+        :param breaker_failures: Consecutive failed runs that open the circuit breaker; 0 disables it.
+        :param breaker_reset: Seconds the breaker stays open before letting a trial run through.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        retry = Retry(total=max_retries,
+                      connect=max_retries,
+                      read=0,
+                      status=0,
+                      backoff_factor=retry_backoff,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="langflow")
+        # Attempts of hedged runs get their own threads, with room for a duplicate of every run in flight,
+        # so a hedge never queues behind the run it duplicates; callers on self.executor wait on them
+        self.hedge_executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="langflow-attempt")
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_initial_delay = hedge_initial_delay
+        self.latency = resilience.LatencyTracker()
+        self.breaker = resilience.CircuitBreaker(breaker_failures, breaker_reset, name="Langflow")
+        self._async_lock = threading.Lock()
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+    def flow_url(self, flow_id: str) -> str:
+        """
+        Build the run URL for a flow.
+
+        :param flow_id: The ID of the flow to run.
+        :return: The full URL of the flow run endpoint.
+        """
+        return f"{self.base_url}/{flow_id}"
+
+    def post(self,
+             url: str,
+             payload: Dict[str, Any],
+             headers: Optional[Dict[str, str]] = None,
+             timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """
+        POST a JSON payload through the pooled session.
+
+        :param url: The URL to post to.
+        :param payload: The JSON payload.
+        :param headers: Optional request headers.
+        :param timeout: Optional (connect, read) timeout overriding the client default.
+        :return: The HTTP response.
+        """
+        return self.session.post(url, json=payload, headers=headers, timeout=timeout or self.timeout)
+
+    def request_timeout(self) -> Tuple[float, float]:
+        """
+        The (connect, read) timeout of a request, capped by the current utterance deadline.
+
+        :raises resilience.DeadlineExceeded: If the deadline has already passed.
+        """
+        read_timeout = resilience.budget(self.timeout[1])
+        return min(self.timeout[0], read_timeout), read_timeout
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait for a flow run before sending a duplicate, or None when hedging is off.
+        """
+        if self.hedge_percentile <= 0:
+            return None
+        observed = self.latency.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, observed if observed is not None else self.hedge_initial_delay)
+
+    def run_json(self,
+                 url: str,
+                 payload: Dict[str, Any],
+                 headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        POST a flow run and return its JSON response, within the latency budget.
+
+        The run must finish before the current utterance deadline. A run slower than
+        the hedge delay gets a duplicate, and the first good response wins; a run
+        failing with a server error gets one retry. Timeouts, connection errors and
+        server errors count against the circuit breaker, which rejects runs outright
+        while it is open.
+
+        :param url: The URL to post to.
+        :param payload: The JSON payload.
+        :param headers: Optional request headers.
+        :return: The JSON response.
+        :raises requests.RequestException: If the run failed.
+        :raises resilience.CircuitOpenError: If the circuit breaker is open.
+        :raises resilience.DeadlineExceeded: If the deadline passed before a response arrived.
+        """
+        def attempt() -> Dict[str, Any]:
+            timeout = self.request_timeout()
+            self.breaker.allow()
+            start = time.perf_counter()
+            try:
+                response = self.post(url, payload, headers=headers, timeout=timeout)
+                if response.status_code >= 500:
+                    raise requests.HTTPError(f"{response.status_code} Server Error from Langflow", response=response)
+                data = response.json()
+            except (requests.RequestException, ValueError):
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            self.latency.record(time.perf_counter() - start)
+            return data
+
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is None:
+            return attempt()
+        return resilience.hedged(attempt, self.hedge_executor, hedge_delay, timeout=resilience.remaining(),
+                                 retry_on=is_server_error)
+
+    def stream(self,
+               url: str,
+               payload: Dict[str, Any],
+               headers: Optional[Dict[str, str]] = None,
+               timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """
+        POST a JSON payload to Langflow's streaming run endpoint.
+
+        The returned response is not read yet; use it as a context manager and
+        iterate over its lines as they arrive. The read timeout applies to the gap
+        between chunks rather than to the whole run.
+
+        :param url: The URL to post to.
+        :param payload: The JSON payload.
+        :param headers: Optional request headers.
+        :param timeout: Optional (connect, read) timeout; defaults to request_timeout().
+        :return: The streaming HTTP response.
+        """
+        return self.session.post(url, json=payload, headers=headers, params={'stream': 'true'},
+                                 timeout=timeout or self.request_timeout(), stream=True)
+
+    def _async_state(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """
+        Get the async client and concurrency semaphore bound to the running event loop.
+
+        httpx.AsyncClient and asyncio.Semaphore cannot be shared between event loops,
+        so each loop gets its own pair, created on first use.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            state = self._async_clients.get(loop)
+            if state is None:
+                client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                    limits=httpx.Limits(max_connections=self.pool_size,
+                                        max_keepalive_connections=self.pool_size),
+                    transport=httpx.AsyncHTTPTransport(retries=self.max_retries),
+                )
+                state = (client, asyncio.Semaphore(self.max_concurrency))
+                self._async_clients[loop] = state
+            return state
+
+    async def apost(self,
+                    url: str,
+                    payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        POST a JSON payload through the async client of the running event loop.
+
+        Waits for a concurrency slot first, so no more than max_concurrency
+        requests are in flight on one loop. The request goes through the circuit
+        breaker and is cut off at the current utterance deadline.
+
+        :param url: The URL to post to.
+        :param payload: The JSON payload.
+        :param headers: Optional request headers.
+        :return: The HTTP response.
+        """
+        client, semaphore = self._async_state()
+        async with semaphore:
+            connect_timeout, read_timeout = self.request_timeout()
+            self.breaker.allow()
+            try:
+                response = await client.post(url, json=payload, headers=headers,
+                                             timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+            except httpx.HTTPError:
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled, e.g. by wait_for or a client disconnect: no verdict, but free a half-open trial
+                self.breaker.release()
+                raise
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+
+    async def aclose(self):
+        """
+        Close the async client bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            state = self._async_clients.pop(loop, None)
+        if state:
+            await state[0].aclose()
+
+    def close(self):
+        """
+        Close all pooled connections and stop the background executor.
+        """
+        self.session.close()
+        self.executor.shutdown(wait=False)
+        self.hedge_executor.shutdown(wait=False)
 
 class LangflowRunner:
     """A class to handle running the babblefish flow and extracting responses."""
@@ -34,34 +332,41 @@ class LangflowRunner:
     def __init__(self,
                  flow_id: str,
                  api_key: Optional[str] = None,
-                 tweaks: Optional[Dict[str, Any]] = None):
+                 tweaks: Optional[Dict[str, Any]] = None,
+                 client: Optional[LangflowClient] = None,
+                 cache: Optional[TranslationCache] = None,
+                 single_flight: Optional[SingleFlight] = None):
         """
         Initialize the FlowRunner with the necessary parameters.
 
         :param flow_id: The ID of the flow to run.
         :param api_key: Optional API key for authentication.
         :param tweaks: Optional dictionary for custom tweaks to the flow.
+        :param client: Optional shared LangflowClient; a private one is created if omitted.
+        :param cache: Optional TranslationCache consulted by run_and_extract.
+        :param single_flight: Optional SingleFlight coalescing identical concurrent run_and_extract calls.
         """
         self.flow_id = flow_id
         self.api_key = api_key
         self.tweaks = tweaks
-        self.condition = threading.Condition()
-        self.response = None
+        self.client = client or LangflowClient()
+        self.cache = cache
+        self.single_flight = single_flight
+        self.future: Optional[Future] = None
 
-    def run_flow(self,
-                 message: str,
-                 output_type: str = "chat",
-                 input_type: str = "chat") -> Dict[str, Any]:
+    def build_request(self,
+                      message: str,
+                      output_type: str = "chat",
+                      input_type: str = "chat") -> Tuple[str, Dict[str, Any], Optional[Dict[str, str]]]:
         """
-        Run a flow with a given message and optional tweaks.
+        Build the URL, payload and headers for a flow run.
 
         :param message: The message to send to the flow.
         :param output_type: The type of output expected (default is "chat").
         :param input_type: The type of input provided (default is "chat").
-        :return: The JSON response from the flow.
+        :return: A tuple of (api_url, payload, headers).
         """
-        api_url = f"{BASE_API_URL}/{self.flow_id}"
-        logger.info("API URL: %s", api_url)
+        api_url = self.client.flow_url(self.flow_id)
 
         payload = {
             "input_value": message,
@@ -72,43 +377,402 @@ class LangflowRunner:
             payload["tweaks"] = self.tweaks  # type: ignore
 
         headers = {"x-api-key": self.api_key} if self.api_key else None
+        return api_url, payload, headers
+
+    def run_flow(self,
+                 message: str,
+                 output_type: str = "chat",
+                 input_type: str = "chat") -> Dict[str, Any]:
+        """
+        Run a flow with a given message and optional tweaks.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: The JSON response from the flow.
+        """
+        api_url, payload, headers = self.build_request(message, output_type, input_type)
+        logger.info("API URL: %s", api_url)
+
+        with telemetry.span('flow'):
+            try:
+                return self.client.run_json(api_url, payload, headers=headers)
+            except (requests.RequestException, ValueError, resilience.CircuitOpenError,
+                    resilience.DeadlineExceeded) as e:
+                logger.error("Request failed: %s", e)
+                telemetry.count_error('flow', type(e).__name__)
+                return {}
+
+    def stream_flow(self,
+                    message: str,
+                    output_type: str = "chat",
+                    input_type: str = "chat") -> Iterator[Dict[str, Any]]:
+        """
+        Run a flow through the streaming run endpoint and yield its events as they arrive.
+
+        Events are dictionaries like {"event": "token", "data": {...}}. When the server
+        answers with a plain JSON body instead of an event stream, a single "end" event
+        carrying the whole response is yielded.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: An iterator over the flow events.
+        """
+        api_url, payload, headers = self.build_request(message, output_type, input_type)
+        logger.info("API URL (streaming): %s", api_url)
 
         try:
-            response = requests.post(api_url, json=payload, headers=headers, timeout=30)
-            return response.json()
+            timeout = self.client.request_timeout()
+            self.client.breaker.allow()
+            try:
+                with self.client.stream(api_url, payload, headers=headers, timeout=timeout) as response:
+                    if response.status_code >= 500:
+                        raise requests.HTTPError(f"{response.status_code} Server Error from Langflow",
+                                                 response=response)
+                    self.client.breaker.record_success()
+                    if 'text/event-stream' not in response.headers.get('content-type', ''):
+                        yield {"event": "end", "data": {"result": response.json()}}
+                        return
+
+                    response.encoding = response.encoding or 'utf-8'
+                    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                        # The read timeout only bounds the gap between events, the deadline bounds the whole run
+                        resilience.check_deadline()
+                        line = line.strip()
+                        if line.startswith('data:'):
+                            line = line[len('data:'):].strip()
+                        if not line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            logger.warning("Skipping malformed stream event: %s", line)
+            except requests.RequestException:
+                self.client.breaker.record_failure()
+                raise
+            except BaseException:
+                # Out of time, or the caller stopped reading: free a half-open trial without a verdict
+                self.client.breaker.release()
+                raise
         except requests.RequestException as e:
-            logger.error("Request failed: %s", e)
-            return {}
+            logger.error("Streaming request failed: %s", e)
+            telemetry.count_error('flow_stream', type(e).__name__)
+        except (resilience.CircuitOpenError, resilience.DeadlineExceeded) as e:
+            logger.error("Streaming request failed: %s", e)
+            telemetry.count_error('flow_stream', type(e).__name__)
+
+    def stream_and_extract(self,
+                           message: str,
+                           output_type: str = "chat",
+                           input_type: str = "chat") -> Iterator[Dict[str, Any]]:
+        """
+        Stream the translation as it is generated, then yield the extracted results.
+
+        Yields {"type": "translation", "text": ...} for each new piece of the translation
+        and {"type": "translation_done", "text": ...} with the full translation as soon as
+        the Translation output is complete, usually well before the other branches of the
+        flow has finished. A cache hit yields the full translation at once.
+
+        With a single_flight set, concurrent calls for the same inputs and tweaks share
+        one upstream streaming run, and a caller joining late first gets the events
+        produced so far. The iterator must be drained, e.g. with collect_results.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: An iterator over translation deltas and the final results.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.flow_id, message, self.target_language)
+            results = self.cache.get(cache_key)
+            if results is not None:
+                logger.info("Translation cache hit for %s", self.target_language)
+                yield {"type": "translation", "text": results.get('translation', 'N/A')}
+                yield {"type": "translation_done", "text": results.get('translation', 'N/A')}
+                yield {"type": "results", "results": results}
+                return
+
+        if self.single_flight is None:
+            yield from self._stream_and_store(message, output_type, input_type, cache_key)
+            return
+        # Streamed runs get their own keys, a follower of a plain run expects a result rather than events
+        yield from self.single_flight.stream("stream:" + self.request_key(message, output_type, input_type),
+                                             self._stream_and_store, message, output_type, input_type, cache_key)
+
+    def _stream_and_store(self,
+                          message: str,
+                          output_type: str,
+                          input_type: str,
+                          cache_key: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the flow upstream, yield the stream_and_extract events and cache complete results.
+        """
+        start = time.perf_counter()
+        translation_ids = set()
+        pending_tokens: Dict[str, List[str]] = {}
+        emitted = ""
+        done = False
+        response_json: Dict[str, Any] = {}
+
+        for event in self.stream_flow(message, output_type, input_type):
+            event_type = event.get('event')
+            data = event.get('data') or {}
+            delta = ""
+
+            if event_type == 'add_message' and data.get('sender_name') == TRANSLATION_SENDER_NAME:
+                message_id = data.get('id')
+                if message_id:
+                    translation_ids.add(message_id)
+                    delta = "".join(pending_tokens.pop(message_id, []))
+                text = data.get('text') or ""
+                if text.startswith(emitted + delta):
+                    delta = text[len(emitted):]
+            elif event_type == 'token':
+                message_id = data.get('id')
+                if message_id in translation_ids:
+                    delta = data.get('chunk') or ""
+                else:
+                    pending_tokens.setdefault(message_id, []).append(data.get('chunk') or "")
+            elif event_type == 'end':
+                response_json = data.get('result') or {}
+            elif event_type == 'error':
+                logger.error("Flow stream error: %s", data)
+
+            if delta:
+                if not emitted:
+                    telemetry.record('flow_first_token', time.perf_counter() - start)
+                emitted += delta
+                yield {"type": "translation", "text": delta}
+            if not done and event_type == 'add_message' and data.get('sender_name') == TRANSLATION_SENDER_NAME \
+                    and data.get('text'):
+                done = True
+                telemetry.record('flow_translation', time.perf_counter() - start)
+                yield {"type": "translation_done", "text": emitted}
+
+        telemetry.record('flow_stream', time.perf_counter() - start)
+        results = self.extract_output_message(response_json)
+        if results['translation'] == 'N/A' and emitted:
+            results['translation'] = emitted
+        elif results['translation'] != 'N/A' and not emitted:
+            yield {"type": "translation", "text": results['translation']}
+        if not done:
+            yield {"type": "translation_done", "text": results['translation']}
+
+        if self.cache is not None and cache_key and response_json and results['translation'] != 'N/A':
+            self.cache.set(cache_key, results)
+        yield {"type": "results", "results": results}
+
+    def collect_results(self, events: Iterator[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Drain the rest of a stream_and_extract iterator and return its final results.
+
+        :param events: A partly consumed iterator from stream_and_extract.
+        :return: A dictionary containing the extracted results.
+        """
+        for event in events:
+            if event["type"] == "results":
+                # Coalesced streams hand every caller the same dictionary
+                return dict(event["results"])
+        return self.extract_output_message({})
+
+    def run_progressive(self,
+                        message: str,
+                        fast_runner: Optional["LangflowRunner"] = None,
+                        stream: bool = True) -> Tuple[Future, Future]:
+        """
+        Run the flow in the background, delivering the translation before the rest of the results.
+
+        By default the translation is taken from the streaming run as soon as the
+        Translation output is complete, while the same run keeps going for the
+        explanation, detected language and sentiment. With a fast_runner (e.g. a
+        translation-only flow), the translation comes from that runner instead and
+        the full flow runs alongside it. Without streaming, both futures resolve
+        when a plain run_and_extract finishes.
+
+        :param message: The message to send to the flow.
+        :param fast_runner: Optional runner of a minimal flow producing only the translation.
+        :param stream: Whether to use the streaming run endpoint.
+        :return: A tuple of (translation future, results future).
+        """
+        if fast_runner is not None:
+            translation_future = self.client.executor.submit(
+                telemetry.in_context(lambda: fast_runner.run_and_extract(message)['translation']))
+            results_future = self.client.executor.submit(telemetry.in_context(self.run_and_extract, message))
+            return translation_future, results_future
+
+        translation_future: Future = Future()
+        if not stream:
+            def on_results(future: Future):
+                if future.exception() is not None:
+                    translation_future.set_exception(future.exception())
+                else:
+                    translation_future.set_result(future.result()['translation'])
+
+            results_future = self.client.executor.submit(telemetry.in_context(self.run_and_extract, message))
+            results_future.add_done_callback(on_results)
+            return translation_future, results_future
+
+        def run() -> Dict[str, str]:
+            try:
+                events = self.stream_and_extract(message)
+                for event in events:
+                    if event["type"] == "translation_done":
+                        translation_future.set_result(event["text"])
+                        break
+                results = self.collect_results(events)
+            except BaseException as e:
+                if not translation_future.done():
+                    translation_future.set_exception(e)
+                raise
+            if not translation_future.done():
+                translation_future.set_result(results['translation'])
+            return results
+
+        return translation_future, self.client.executor.submit(telemetry.in_context(run))
+
+    @property
+    def target_language(self) -> Optional[str]:
+        """
+        The target language set through the LANGUAGE_COMPONENT_ID tweak, if any.
+        """
+        return (self.tweaks or {}).get(LANGUAGE_COMPONENT_ID, {}).get('input_value')
+
+    def request_key(self,
+                    message: str,
+                    output_type: str = "chat",
+                    input_type: str = "chat") -> str:
+        """
+        Build a key identifying a flow run by its inputs and tweaks.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: A hex digest identifying the flow run.
+        """
+        raw = json.dumps([self.flow_id, TranslationCache.normalize(message), output_type, input_type, self.tweaks],
+                         sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def run_and_extract(self,
+                        message: str,
+                        output_type: str = "chat",
+                        input_type: str = "chat") -> Dict[str, str]:
+        """
+        Run the flow and extract its output messages, answering from the cache when possible.
+
+        With a single_flight set, concurrent calls for the same inputs and tweaks share
+        one upstream flow run. Only complete results (a translation other than 'N/A')
+        are cached, so a failed run is retried the next time the same message comes in.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: A dictionary containing the extracted results.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.flow_id, message, self.target_language)
+            results = self.cache.get(cache_key)
+            if results is not None:
+                logger.info("Translation cache hit for %s", self.target_language)
+                return results
+
+        if self.single_flight is None:
+            return self._run_and_store(message, output_type, input_type, cache_key)
+
+        results = self.single_flight.do(self.request_key(message, output_type, input_type),
+                                        self._run_and_store, message, output_type, input_type, cache_key)
+        return dict(results)
+
+    def _run_and_store(self,
+                       message: str,
+                       output_type: str,
+                       input_type: str,
+                       cache_key: Optional[str]) -> Dict[str, str]:
+        """
+        Run the flow upstream, extract the results and store complete ones in the cache.
+        """
+        results = self.extract_output_message(self.run_flow(message, output_type, input_type))
+        if self.cache is not None and cache_key and results.get('translation', 'N/A') != 'N/A':
+            self.cache.set(cache_key, results)
+        return results
 
-    def run_flow_async(self, message: str, output_type: str = "chat", input_type: str = "chat"):
+    async def arun_flow(self,
+                        message: str,
+                        output_type: str = "chat",
+                        input_type: str = "chat") -> Dict[str, Any]:
         """
-        Run a flow asynchronously with a given message and optional tweaks.
+        Run a flow with a given message and optional tweaks on the running event loop.
+
+        Unlike run_flow, the run is not hedged: it gets the utterance deadline and the
+        circuit breaker only.
 
         :param message: The message to send to the flow.
         :param output_type: The type of output expected (default is "chat").
         :param input_type: The type of input provided (default is "chat").
+        :return: The JSON response from the flow.
         """
-        def api_thread():
-            result = self.run_flow(message, output_type, input_type)
-            with self.condition:
-                self.response = result
-                self.condition.notify()
+        api_url, payload, headers = self.build_request(message, output_type, input_type)
+        logger.info("API URL: %s", api_url)
 
-        thread = threading.Thread(target=api_thread)
-        thread.start()
+        with telemetry.span('flow'):
+            try:
+                response = await self.client.apost(api_url, payload, headers=headers)
+                return response.json()
+            except (httpx.HTTPError, ValueError, resilience.CircuitOpenError, resilience.DeadlineExceeded) as e:
+                logger.error("Request failed: %s", e)
+                telemetry.count_error('flow', type(e).__name__)
+                return {}
 
-    def get_response(self) -> Dict[str, Any]:
+    async def arun_many(self,
+                        messages: Iterable[str],
+                        output_type: str = "chat",
+                        input_type: str = "chat") -> List[Dict[str, Any]]:
         """
-        Get the response from the asynchronous flow run.
+        Run the flow for several messages concurrently.
+
+        Concurrency is bounded by the client's max_concurrency. Results are
+        returned in the same order as the messages.
 
+        :param messages: The messages to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: A list of JSON responses, one per message.
+        """
+        return await asyncio.gather(*(self.arun_flow(message, output_type, input_type)
+                                      for message in messages))
+
+    def run_flow_async(self, message: str, output_type: str = "chat", input_type: str = "chat") -> Future:
+        """
+        Run a flow in the background with a given message and optional tweaks.
+
+        :param message: The message to send to the flow.
+        :param output_type: The type of output expected (default is "chat").
+        :param input_type: The type of input provided (default is "chat").
+        :return: A Future resolving to the JSON response from the flow.
+        """
+        self.future = self.client.executor.submit(
+            telemetry.in_context(self.run_flow, message, output_type, input_type))
+        return self.future
+
+    def get_response(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get the response from the latest background flow run.
+
+        Prefer keeping the Future returned by run_flow_async when running
+        several flows at once.
+
+        :param timeout: Optional number of seconds to wait for the response.
         :return: The JSON response from the flow.
         """
-        with self.condition:
-            self.condition.wait()
-            response = self.response
-            self.response = None
-            return response or {}
+        future, self.future = self.future, None
+        if future is None:
+            return {}
+        return future.result(timeout) or {}
 
+    @telemetry.traced('extract')
     def extract_output_message(self, response_json: Dict[str, Any]) -> Dict[str, str]:
         """
         Extract the output messages from the flow response JSON and combine them into a single results object.
@@ -1,49 +1,260 @@
-"""A class to handle real-time audio transcription using the Google Web Speech API."""
+"""A class to handle real-time audio transcription using the Google Web Speech API or a local speech engine."""
+from abc import ABC, abstractmethod
 from collections import deque
+from concurrent.futures import CancelledError, Future
+import os
+import json
+import time
 import threading
-import queue
-import logging
+from typing import Dict, Optional
+from dotenv import load_dotenv
 import numpy as np
 import speech_recognition as sr
 import webrtcvad
-import coloredlogs
+from logging_config import get_logger
+from vad_segmenter import VADSegmenter
+from audio_features import extract_features, frame_rms, frame_signal, pcm_to_array, speech_frame_mask
+from noise_floor import NoiseFloorTracker
+from recognition_pool import QueueFullError, RecognitionPool, get_recognition_pool
+from audio_stream import AudioPacket, PCMStreamBuffer
+import telemetry
 
 # Configure logging
-logger = logging.getLogger(__name__)
-coloredlogs.install(level='INFO',
-                    logger=logger,
-                    fmt='%(filename)s %(levelname)s %(message)s',
-                    level_styles={
-                        'debug': {'color': 'green'},
-                        'info': {'color': 'blue'},
-                        'warning': {'color': 'yellow'},
-                        'error': {'color': 'red'},
-                        'critical': {'color': 'magenta'}
-                    }
-)
+logger = get_logger(__name__)
+
+# Load environment variables from .env file
+load_dotenv()
+ASR_BACKEND = os.getenv('ASR_BACKEND', 'google')
+VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH')
+VOSK_MODEL_DIR = os.getenv('VOSK_MODEL_DIR')
+
+GATING_CLIPS = telemetry.REGISTRY.counter("babbelfish_gating_clips_total",
+                                          "Clips checked by speech gating, by outcome (sent or gated).")
+GATING_SEGMENTS = telemetry.REGISTRY.counter("babbelfish_gating_segments_total",
+                                             "Utterances sent for recognition after speech gating.")
+GATING_AUDIO_SECONDS = telemetry.REGISTRY.counter("babbelfish_gating_audio_seconds_total",
+                                                  "Seconds of audio sent for recognition or dropped by speech "
+                                                  "gating and VAD trimming, by outcome.")
+
+class ASRBackend(ABC):
+    """
+    Base class of the speech recognition engines TranscribeAudio can use.
+
+    recognize() returns the transcription of 16-bit mono PCM audio. Like the
+    speech_recognition recognizers, it raises sr.UnknownValueError when nothing
+    intelligible was said and sr.RequestError when the engine is unavailable.
+    """
+    name = "base"
+
+    def supports(self, speaking_language: str) -> bool:
+        """
+        Whether this engine can recognize the given language.
+        """
+        return True
+
+    @abstractmethod
+    def recognize(self, audio_data: bytes, samplerate: int, speaking_language: str) -> str:
+        """
+        Transcribe the audio data.
+        """
+
+class GoogleBackend(ASRBackend):
+    """Recognizes speech with the Google Web Speech API, one network round trip per utterance."""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio_data: bytes, samplerate: int, speaking_language: str) -> str:
+        """
+        Transcribe the audio data with recognize_google.
+        """
+        audio = sr.AudioData(audio_data, samplerate, 2)
+        return self.recognizer.recognize_google(audio, language=speaking_language)
+
+class VoskBackend(ASRBackend):
+    """
+    Recognizes speech on the CPU with a local Vosk (Kaldi) model, without any network call.
+
+    Models are looked up per speaking language in VOSK_MODEL_DIR, as a subdirectory
+    named after the full language code ("fr-FR") or its base language ("fr"), falling
+    back to the single model at VOSK_MODEL_PATH. Each model is loaded once per process
+    and shared by every session; recognizers are cheap and created per utterance.
+    """
+    name = "vosk"
+    _models: Dict[str, object] = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model_dir: Optional[str] = VOSK_MODEL_DIR, model_path: Optional[str] = VOSK_MODEL_PATH):
+        try:
+            import vosk  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError("The vosk ASR backend requires the vosk package: pip install vosk") from e
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model_dir = model_dir
+        self.model_path = model_path
+
+    def model_path_for(self, speaking_language: str) -> Optional[str]:
+        """
+        Find the model directory for a speaking language, or None if there is none.
+        """
+        if self.model_dir:
+            for name in (speaking_language, speaking_language.split('-')[0]):
+                path = os.path.join(self.model_dir, name)
+                if name and os.path.isdir(path):
+                    return path
+        if self.model_path and os.path.isdir(self.model_path):
+            return self.model_path
+        return None
+
+    def supports(self, speaking_language: str) -> bool:
+        """
+        Whether a local model is available for the given language.
+        """
+        return self.model_path_for(speaking_language) is not None
+
+    def load_model(self, path: str):
+        """
+        Load a model, once per process.
+        """
+        with self._models_lock:
+            model = self._models.get(path)
+            if model is None:
+                logger.info("Loading Vosk model from %s", path)
+                model = self._models[path] = self.vosk.Model(path)
+            return model
+
+    def recognize(self, audio_data: bytes, samplerate: int, speaking_language: str) -> str:
+        """
+        Transcribe the audio data with the local model for the speaking language.
+        """
+        path = self.model_path_for(speaking_language)
+        if path is None:
+            raise sr.RequestError(f"No Vosk model available for {speaking_language}")
+
+        recognizer = self.vosk.KaldiRecognizer(self.load_model(path), samplerate)
+        recognizer.AcceptWaveform(bytes(audio_data))
+        transcription = json.loads(recognizer.FinalResult()).get('text', '')
+        if not transcription:
+            raise sr.UnknownValueError()
+        return transcription
+
+class StubBackend(ASRBackend):
+    """
+    Returns a fixed transcription after a configurable delay, without any network call or model.
+
+    Used by the benchmarks and for running the app offline; the transcription
+    names the utterance length so different clips give different text.
+    """
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def recognize(self, audio_data: bytes, samplerate: int, speaking_language: str) -> str:
+        """
+        Wait for the configured delay and describe the audio.
+        """
+        if not audio_data:
+            raise sr.UnknownValueError()
+        time.sleep(self.delay)
+        return f"utterance of {len(audio_data) * 500 // samplerate} milliseconds"
+
+ASR_BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    VoskBackend.name: VoskBackend,
+    StubBackend.name: StubBackend,
+}
+_backends: Dict[str, ASRBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_asr_backend(speaking_language: str = "", backend: str = ASR_BACKEND) -> ASRBackend:
+    """
+    Get the process-wide ASR engine for a speaking language.
+
+    :param speaking_language: The language being spoken, e.g. "en-US".
+    :param backend: "google", "vosk", or "auto" to use a local Vosk model when one exists
+                    for the speaking language and Google otherwise.
+    :return: The shared ASRBackend instance.
+    """
+    if backend == "auto":
+        try:
+            local = get_asr_backend(speaking_language, VoskBackend.name)
+            if local.supports(speaking_language):
+                return local
+        except ImportError:
+            pass
+        backend = GoogleBackend.name
+
+    if backend not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend: {backend}")
+
+    with _backends_lock:
+        instance = _backends.get(backend)
+        if instance is None:
+            instance = _backends[backend] = ASR_BACKENDS[backend]()
+        return instance
+
+@telemetry.traced('asr')
+def recognize_audio(audio_data: bytes, samplerate: int, speaking_language: str, backend: str = ASR_BACKEND) -> str:
+    """
+    Transcribe one utterance with the process-wide ASR backend.
+
+    Defined at module level so a process-mode RecognitionPool can send it to its workers.
+    """
+    return get_asr_backend(speaking_language, backend).recognize(audio_data, samplerate, speaking_language)
 
 class TranscribeAudio:
     """
     This class records audio from the microphone in chunks, processes the audio data, and 
-    transcribes it using the Google Web Speech API. It operates in real-time, continuously 
-    listening and transcribing audio until stopped.
+    transcribes it using the configured ASR backend (the Google Web Speech API by default).
+    It operates in real-time, continuously listening and transcribing audio until stopped.
+
+    Gating and segmentation run in the calling thread; recognition jobs go to a
+    RecognitionPool shared by every session, so an instance owns no threads and
+    can be started and stopped any number of times.
     """
-    def __init__(self, samplerate=16000, frame_duration=30):
+    def __init__(self, samplerate=16000, frame_duration=30, padding_duration=300, max_segment_duration=15000,
+                 noise_threshold=None, backend=ASR_BACKEND, pool: Optional[RecognitionPool] = None):
         self.samplerate = samplerate
         self.frame_duration = frame_duration
         self.frame_size = int(samplerate * frame_duration / 1000)
-        self.recognizer = sr.Recognizer()
+        self.noise_threshold = noise_threshold  # Fixed gating threshold, or None to follow the noise floor
+        self.noise_floor = NoiseFloorTracker()
+        self.clips_gated = 0
+        self.clips_sent = 0
+        self.segments_sent = 0
+        self.backend = backend
+        self.pool = pool or get_recognition_pool()
+        self.pending = set()
+        self.pending_lock = threading.Lock()
         self.is_running = False
         self.transcription = None
         self.condition = threading.Condition()
         self.vad = webrtcvad.Vad()
         self.vad.set_mode(3)  # 0: least aggressive, 3: most aggressive
+        self.segmenter = VADSegmenter(self.vad,
+                                      samplerate=samplerate,
+                                      frame_duration=frame_duration,
+                                      padding_duration=padding_duration,
+                                      max_segment_duration=max_segment_duration,
+                                      energy_threshold=self.gating_threshold)
+        self.segmenter_lock = threading.Lock()
         self.audio_buffer = deque()  # Using deque for efficient appends and pops
-        self.audio_queue = queue.Queue()
-        self.stop_event = threading.Event()
-        self.processing_thread = threading.Thread(target=self.process_audio_queue)
-        self.processing_thread.daemon = True
-        self.processing_thread.start()
+
+        # State of the recording currently streamed in by the audio component
+        self.stream_segmenter = VADSegmenter(self.vad,
+                                             samplerate=samplerate,
+                                             frame_duration=frame_duration,
+                                             padding_duration=padding_duration,
+                                             max_segment_duration=max_segment_duration,
+                                             energy_threshold=self.gating_threshold)
+        self.stream_buffer = PCMStreamBuffer()
+        self.stream_lock = threading.Lock()
+        self.stream_id = None
+        self.stream_next_seq = 0
+        self.stream_finished = False
 
     def audio_to_numpy(self, audio_data):
         """
@@ -56,22 +267,90 @@ class TranscribeAudio:
         """
         Calculate the Root Mean Square (RMS) of the audio signal.
         """
-        rms = np.sqrt(np.mean(audio_array**2))
-        logger.info("Calculated RMS: %s", rms)  # Debug output for RMS
+        # Square in float64, int16 squares overflow
+        rms = np.sqrt(np.mean(np.square(audio_array, dtype=np.float64))) if len(audio_array) else 0.0
+        logger.debug("Calculated RMS: %s", rms)
         return rms
 
-    def is_speech_present(self, audio_data, noise_threshold=10):
+    @property
+    def gating_threshold(self):
+        """
+        The frame RMS threshold used to gate speech: the fixed noise_threshold if
+        one was given, otherwise the adaptive noise-floor estimate.
+        """
+        return self.noise_threshold if self.noise_threshold is not None else self.noise_floor.threshold
+
+    def is_speech_present(self, audio_data, noise_threshold=None, min_speech_frames=3):
         """
         Determine if the audio contains speech or just noise.
+
+        The audio counts as speech when at least min_speech_frames frames are louder
+        than the noise threshold, carry most of their energy in the voice band and
+        are not hiss-like (see audio_features.speech_frame_mask). Without a fixed
+        threshold, every clip also updates the adaptive noise-floor estimate.
         """
-        audio_array = self.audio_to_numpy(audio_data)
-        rms = self.calculate_rms(audio_array)
-        logger.info("RMS Energy: %s, Threshold: %s", rms, noise_threshold)  # Debug output for RMS and threshold
-        return rms > noise_threshold
+        threshold = self.gating_threshold if noise_threshold is None else noise_threshold
+        features = extract_features(audio_data, self.samplerate, self.frame_duration, gate_rms=threshold)
+        speech_frames = int(np.count_nonzero(speech_frame_mask(features, threshold)))
+        logger.debug("Speech frames: %d of %d, RMS threshold: %s",
+                     speech_frames, len(features['rms']), threshold)
+        if noise_threshold is None and self.noise_threshold is None:
+            self.noise_floor.update(features['rms'])
+        return speech_frames >= min_speech_frames
 
-    def recognize_speech_from_mic_as_bytes(self, audio_data, speaking_language):
+    def count_gating(self, audio_bytes: int, segments):
         """
-        Transcribe speech from recorded audio data.
+        Count a gated clip, or one sent as segments, in this transcriber and in the process-wide metrics.
+
+        :param audio_bytes: Length of the clip checked.
+        :param segments: The utterances of the clip sent for recognition; empty if it was gated.
+        """
+        sent_bytes = sum(len(segment) for segment in segments)
+        if segments:
+            self.clips_sent += 1
+            self.segments_sent += len(segments)
+            GATING_CLIPS.inc(outcome="sent")
+            GATING_SEGMENTS.inc(len(segments))
+        else:
+            self.clips_gated += 1
+            GATING_CLIPS.inc(outcome="gated")
+        bytes_per_second = self.samplerate * 2
+        GATING_AUDIO_SECONDS.inc(sent_bytes / bytes_per_second, outcome="sent")
+        GATING_AUDIO_SECONDS.inc((audio_bytes - sent_bytes) / bytes_per_second, outcome="gated")
+
+    def gating_stats(self):
+        """
+        Returns the speech gating counters of this transcriber and the current noise-floor estimate.
+        """
+        return {
+            'clips_gated': self.clips_gated,
+            'clips_sent': self.clips_sent,
+            'segments_sent': self.segments_sent,
+            **self.noise_floor.stats(),
+            'threshold': self.gating_threshold
+        }
+
+    def submit_recognition(self, audio_data, speaking_language) -> Future:
+        """
+        Queue one utterance on the shared recognition pool.
+        """
+        logger.info("speaking_language is %s, ASR backend is %s", speaking_language, self.backend)
+        future = self.pool.submit(recognize_audio, bytes(audio_data), self.samplerate, speaking_language, self.backend)
+        with self.pending_lock:
+            self.pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        """
+        Drop a finished recognition job from the pending set.
+        """
+        with self.pending_lock:
+            self.pending.discard(future)
+
+    def recognition_response(self, future: Future):
+        """
+        Wait for a recognition job and turn its outcome into a response dictionary.
         """
         response = {
             "success": True,
@@ -80,12 +359,7 @@ class TranscribeAudio:
         }
 
         try:
-            # Create an AudioData object from the bytes
-            audio = sr.AudioData(audio_data, 16000, 2)  # Ensure the sample rate and sample width match your audio data
-
-            # Recognize the speech
-            logger.info("speaking_language is %s", speaking_language)
-            transcription = self.recognizer.recognize_google(audio, language=speaking_language)
+            transcription = future.result()
             if transcription and transcription != "":
                 response["transcription"] = transcription
 
@@ -97,50 +371,209 @@ class TranscribeAudio:
             response["error"] = "API unavailable"
         except sr.UnknownValueError:
             response["error"] = "Unable to recognize speech"
+        except QueueFullError:
+            response["success"] = False
+            response["error"] = "Recognition queue full"
+        except CancelledError:
+            response["error"] = "Recognition cancelled"
+        except Exception as e:  # pylint: disable=broad-except
+            # A misconfigured or broken backend must still answer, or callers waiting on the result hang
+            logger.exception("Recognition failed")
+            response["success"] = False
+            response["error"] = f"Recognition failed: {e}"
 
         return response
 
-    def process_audio(self, audio_data, speaking_language):
+    def recognize_speech_from_mic_as_bytes(self, audio_data, speaking_language):
         """
-        Process the audio data and transcribe it.
+        Transcribe speech from recorded audio data.
         """
-        if self.is_speech_present(audio_data):
-            logger.info("human speech detected from transcriber")
-            result = self.recognize_speech_from_mic_as_bytes(audio_data, speaking_language)
-            logger.info("recognize_speech_from_mic_as_bytes result: %s", result)
-            if result["success"]:
-                if result["transcription"]:
+        return self.recognition_response(self.submit_recognition(audio_data, speaking_language))
+
+    def segment_audio(self, audio_data):
+        """
+        Split the audio data into utterances with the VAD, dropping the silence around them.
+        """
+        with self.segmenter_lock:
+            self.segmenter.energy_threshold = self.gating_threshold
+            return self.segmenter.segments(audio_data)
+
+    @telemetry.traced('gating')
+    def speech_segments(self, audio_data):
+        """
+        Gate the audio data and cut it into the utterances worth sending for recognition.
+        """
+        if not self.is_speech_present(audio_data):
+            self.count_gating(len(audio_data), [])
+            logger.info("No meaningful speech detected, just noise")
+            return []
+
+        segments = self.segment_audio(audio_data)
+        self.count_gating(len(audio_data), segments)
+        if not segments:
+            logger.info("No voiced frames found by VAD, skipping recognition")
+            return []
+
+        logger.info("human speech detected from transcriber in %d segment(s)", len(segments))
+        return segments
+
+    def recognize_segments(self, segments, speaking_language) -> Future:
+        """
+        Queue utterances for recognition without waiting.
+
+        The segments are recognized concurrently on the shared pool; the returned
+        Future resolves to their transcriptions joined in order, or None. The time
+        from queueing to the last result is recorded as the recognize stage.
+        """
+        futures = [self.submit_recognition(segment, speaking_language) for segment in segments]
+        result: Future = Future()
+        if not futures:
+            result.set_result(None)
+            return result
+        start = time.perf_counter()
+        # The last job settles on a pool thread, so record under the caller's utterance
+        record = telemetry.in_context(telemetry.record)
+
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            # Exceptions raised in a done-callback are only logged, so result must be settled here
+            try:
+                transcriptions = []
+                for future in futures:
+                    response = self.recognition_response(future)
+                    logger.info("recognize_speech_from_mic_as_bytes result: %s", response)
+                    if response["transcription"]:
+                        transcriptions.append(response["transcription"])
+                    elif not response["success"]:
+                        logger.error("ERROR: %s", response['error'])
+                if transcriptions:
                     # Clear the audio buffer after a successful transcription
                     self.audio_buffer.clear()
-                    return result["transcription"]
+            except BaseException as e:  # pylint: disable=broad-except
+                record('recognize', time.perf_counter() - start, e)
+                result.set_exception(e)
+                return
+            record('recognize', time.perf_counter() - start)
+            result.set_result(" ".join(transcriptions) if transcriptions else None)
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        return result
+
+    def transcribe_async(self, audio_data, speaking_language) -> Future:
+        """
+        Gate, segment and queue the audio data for recognition without waiting.
+
+        The returned Future resolves to the transcriptions of all utterances joined in order, or None.
+        """
+        return self.recognize_segments(self.speech_segments(audio_data), speaking_language)
+
+    def feed_stream(self, packet: AudioPacket, speaking_language) -> list:
+        """
+        Consume a packet of a recording streamed while the user is speaking.
+
+        Packets repeat every chunk the component has not seen acknowledged yet, so
+        chunks already consumed are skipped. New audio goes through the stream buffer
+        into the incremental VAD segmenter, and every utterance it completes is queued
+        for recognition right away, before the recording ends. A final packet flushes
+        the utterance still in progress.
+
+        :return: A list of Futures, one per completed utterance, each resolving to its transcription or None.
+        """
+        with self.stream_lock:
+            if packet.stream_id != self.stream_id:
+                self.stream_id = packet.stream_id
+                self.stream_next_seq = 0
+                self.stream_finished = False
+                self.stream_buffer.clear()
+                self.stream_segmenter.reset()
+            if self.stream_finished:
+                return []
+
+            skip = self.stream_next_seq - packet.first_seq
+            if skip < 0:
+                logger.warning("Audio stream %s lost chunks %d to %d",
+                               packet.stream_id, self.stream_next_seq, packet.first_seq - 1)
+                skip = 0
+            new_pcm = packet.pcm[skip * packet.chunk_bytes:]
+            self.stream_next_seq = max(self.stream_next_seq, packet.first_seq + packet.num_chunks)
+
+            segments = self._consume_stream(new_pcm) if len(new_pcm) else []
+            if packet.final:
+                segments += self.stream_segmenter.flush()
+                self.stream_buffer.clear()
+                self.stream_finished = True
+
+        futures = []
+        for segment in segments:
+            # Segments are trimmed to speech, so they are gated without touching the noise floor
+            if self.is_speech_present(segment, noise_threshold=self.gating_threshold):
+                self.count_gating(len(segment), [segment])
+                futures.append(self.recognize_segments([segment], speaking_language))
             else:
-                logger.error("ERROR: %s", result['error'])
-        else:
-            logger.info("No meaningful speech detected, just noise")
-        return None
+                self.count_gating(len(segment), [])
+        return futures
 
-    def process_audio_queue(self):
+    def _consume_stream(self, pcm):
         """
-        Continuously processes audio data from the queue.
+        Feed the whole frames of newly streamed audio to the stream segmenter. Caller holds stream_lock.
         """
-        while not self.stop_event.is_set():
-            try:
-                audio_data, speaking_language = self.audio_queue.get(timeout=1)  # Wait for 1 second for new audio data
-                if audio_data:
-                    self.process_audio(audio_data, speaking_language)
-                self.audio_queue.task_done()
-            except queue.Empty:
-                continue
+        self.stream_buffer.write(pcm)
+        frame_bytes = self.stream_segmenter.frame_bytes
+        whole = len(self.stream_buffer) - len(self.stream_buffer) % frame_bytes
+        if not whole:
+            return []
+
+        view = self.stream_buffer.readable(whole)
+        self.stream_segmenter.energy_threshold = self.gating_threshold
+        segments = self.stream_segmenter.feed(view)
+        if self.noise_threshold is None:
+            # Chunks are short enough to be speech throughout, so only the frames the VAD
+            # rejected go into the noise floor; otherwise talking would raise the gate
+            rms = frame_rms(frame_signal(pcm_to_array(view), self.frame_size))
+            quiet = ~np.asarray(self.stream_segmenter.frame_speech, dtype=bool)
+            if quiet.any():
+                self.noise_floor.update(rms[quiet])
+        view.release()
+        self.stream_buffer.consume(whole)
+        return segments
+
+    @property
+    def stream_ack(self):
+        """
+        The acknowledgement to send back to the audio component: the stream id and the last chunk consumed.
+        """
+        with self.stream_lock:
+            return {"stream_id": self.stream_id, "seq": self.stream_next_seq - 1}
 
-    def add_audio_to_queue(self, audio_data, speaking_language):
+    @telemetry.traced('process_audio')
+    def process_audio(self, audio_data, speaking_language):
+        """
+        Process the audio data and transcribe it.
+
+        The audio is cut into utterances at pauses and only the voiced parts are
+        sent for recognition; their transcriptions are joined in order.
         """
-        Adds audio data to the queue for processing.
+        return self.transcribe_async(audio_data, speaking_language).result()
+
+    def add_audio_to_queue(self, audio_data, speaking_language) -> Future:
+        """
+        Adds audio data to the shared recognition queue for processing.
+
+        Returns a Future resolving to the transcription; get_transcription()
+        also returns it once recognized.
         """
-        self.audio_queue.put((audio_data, speaking_language))
+        return self.transcribe_async(audio_data, speaking_language)
 
     def start(self):
         """
-        Starts the recording and recognition process in a separate thread.
+        Starts the recording and recognition process.
         """
         logger.info("Starting transcription from class...")
         self.is_running = True
@@ -157,9 +590,13 @@ class TranscribeAudio:
 
     def stop(self):
         """
-        Stops the recording loop.
+        Stops the recording loop and cancels this session's recognition jobs still waiting in the queue.
+
+        Every queued job is cancelled, so call it once the utterances still wanted have been collected.
         """
         logger.info("Stopping transcription from class...")
         self.is_running = False
-        self.stop_event.set()
-        self.processing_thread.join()
+        with self.pending_lock:
+            pending = list(self.pending)
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,40 @@
+"""Shared logging setup for the babbelfish.ai modules."""
+import os
+import logging
+import threading
+from dotenv import load_dotenv
+import coloredlogs
+
+# Load environment variables from .env file
+load_dotenv()
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+LOG_FORMAT = '%(filename)s %(levelname)s %(message)s'
+LEVEL_STYLES = {
+    'debug': {'color': 'green'},
+    'info': {'color': 'blue'},
+    'warning': {'color': 'yellow'},
+    'error': {'color': 'red'},
+    'critical': {'color': 'magenta'}
+}
+
+_configured = set()
+_configured_lock = threading.Lock()
+
+def get_logger(name: str, level: str = LOG_LEVEL) -> logging.Logger:
+    """
+    Get a logger writing colored lines to the console.
+
+    The handler is installed once per logger, so calling this again, e.g. on every
+    Streamlit rerun, neither stacks handlers nor pays for the setup again.
+
+    :param name: The logger name, usually __name__.
+    :param level: The level of the logger and its handler.
+    :return: The configured logger.
+    """
+    logger = logging.getLogger(name)
+    with _configured_lock:
+        if name not in _configured:
+            coloredlogs.install(level=level, logger=logger, fmt=LOG_FORMAT, level_styles=LEVEL_STYLES)
+            _configured.add(name)
+    return logger
@@ -0,0 +1,82 @@
+"""A class to track the background noise level of a session and derive the speech gating threshold from it."""
+import threading
+from typing import Dict
+import numpy as np
+from audio_features import INT16_FULL_SCALE, rms_to_dbfs
+
+class NoiseFloorTracker:
+    """
+    Estimates the noise floor from the quiet frames of each clip and sets the
+    speech gate a fixed margin above it.
+
+    Each clip contributes one noise sample: a low percentile of its per-frame
+    dBFS, which lands on the pauses between words. The estimate follows that
+    sample with an asymmetric exponential average: it drops quickly when the
+    room gets quieter and rises slowly, so a clip that is speech from start to
+    end barely moves it. The threshold is clamped so a silent room cannot make
+    the gate hypersensitive and a loud one cannot close it completely.
+    """
+
+    def __init__(self,
+                 initial_floor_db: float = -60.0,
+                 margin_db: float = 10.0,
+                 percentile: float = 20.0,
+                 rise_rate: float = 0.2,
+                 fall_rate: float = 0.5,
+                 min_threshold: float = 10.0,
+                 max_threshold: float = 2000.0):
+        """
+        Initialize the tracker.
+
+        :param initial_floor_db: Noise floor assumed before any audio is seen, in dBFS.
+        :param margin_db: How far above the noise floor the gate sits, in dB.
+        :param percentile: Percentile of a clip's frame levels taken as its noise sample.
+        :param rise_rate: Smoothing factor applied when the sample is above the current floor.
+        :param fall_rate: Smoothing factor applied when the sample is below the current floor.
+        :param min_threshold: Lowest gating threshold, as RMS on the int16 scale.
+        :param max_threshold: Highest gating threshold, as RMS on the int16 scale.
+        """
+        self.floor_db = initial_floor_db
+        self.margin_db = margin_db
+        self.percentile = percentile
+        self.rise_rate = rise_rate
+        self.fall_rate = fall_rate
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.clips_seen = 0
+        self.lock = threading.Lock()
+
+    @property
+    def threshold(self) -> float:
+        """
+        The current gating threshold, as frame RMS on the int16 scale.
+        """
+        threshold = INT16_FULL_SCALE * 10 ** ((self.floor_db + self.margin_db) / 20)
+        return float(min(max(threshold, self.min_threshold), self.max_threshold))
+
+    def update(self, frame_rms: np.ndarray) -> float:
+        """
+        Update the noise floor from the per-frame RMS of a clip.
+
+        :param frame_rms: Per-frame RMS of the clip on the int16 scale.
+        :return: The updated gating threshold.
+        """
+        if len(frame_rms):
+            sample_db = float(np.percentile(rms_to_dbfs(frame_rms), self.percentile))
+            with self.lock:
+                rate = self.rise_rate if sample_db > self.floor_db else self.fall_rate
+                self.floor_db += rate * (sample_db - self.floor_db)
+                self.clips_seen += 1
+        return self.threshold
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the current estimate.
+
+        :return: A dictionary with the noise floor in dBFS, the gating threshold and the number of clips seen.
+        """
+        return {
+            'floor_db': self.floor_db,
+            'threshold': self.threshold,
+            'clips_seen': self.clips_seen
+        }
@@ -0,0 +1,182 @@
+"""A process-wide worker pool for speech recognition with a bounded queue and backpressure."""
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from logging_config import get_logger
+import telemetry
+
+# Load environment variables from .env file
+load_dotenv()
+RECOGNITION_WORKERS = int(os.getenv('RECOGNITION_WORKERS', '4'))
+RECOGNITION_QUEUE_SIZE = int(os.getenv('RECOGNITION_QUEUE_SIZE', '32'))
+RECOGNITION_QUEUE_POLICY = os.getenv('RECOGNITION_QUEUE_POLICY', 'drop_oldest')
+RECOGNITION_POOL_MODE = os.getenv('RECOGNITION_POOL_MODE', 'thread')
+
+# Configure logging
+logger = get_logger(__name__)
+
+class QueueFullError(RuntimeError):
+    """Raised when a recognition job is rejected or dropped because the queue is full."""
+
+class RecognitionPool:
+    """
+    A fixed set of worker threads draining one bounded job queue, shared by every session.
+
+    submit() returns a Future per job, so each session waits only on its own
+    results. When the queue is full, the "drop_oldest" policy fails the oldest
+    waiting job with QueueFullError to make room, while "reject" fails the new
+    one. In "process" mode the workers hand each job to a process pool of the
+    same size, so CPU-bound engines run outside the GIL; the queue and its
+    backpressure are the same in both modes.
+    """
+
+    def __init__(self,
+                 workers: int = RECOGNITION_WORKERS,
+                 queue_size: int = RECOGNITION_QUEUE_SIZE,
+                 policy: str = RECOGNITION_QUEUE_POLICY,
+                 mode: str = RECOGNITION_POOL_MODE):
+        """
+        Initialize the pool and start its workers.
+
+        :param workers: Number of jobs processed concurrently.
+        :param queue_size: Maximum number of jobs waiting for a worker.
+        :param policy: "drop_oldest" or "reject", applied when the queue is full.
+        :param mode: "thread" to run jobs in the worker threads, "process" to run them in worker processes.
+        """
+        if policy not in ('drop_oldest', 'reject'):
+            raise ValueError(f"Unknown recognition queue policy: {policy}")
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown recognition pool mode: {mode}")
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.mode = mode
+        self.jobs: Deque[Tuple[Future, Callable[..., Any], tuple, contextvars.Context, float]] = deque()
+        self.condition = threading.Condition()
+        self.running = True
+        self.submitted = self.completed = self.failed = self.dropped = self.rejected = 0
+        self.active = 0
+
+        self.process_pool = ProcessPoolExecutor(max_workers=workers) if mode == 'process' else None
+        self.threads = [threading.Thread(target=self._work, name=f"recognition-{i}", daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Queue a job.
+
+        In process mode fn and its arguments must be picklable.
+
+        :param fn: The function to run.
+        :return: A Future resolving to the result of fn. It fails with QueueFullError if the
+                 job is rejected or later dropped to make room.
+        """
+        future: Future = Future()
+        with self.condition:
+            if not self.running:
+                raise RuntimeError("Recognition pool is shut down")
+            if len(self.jobs) >= self.queue_size:
+                if self.policy == 'reject':
+                    self.rejected += 1
+                    future.set_exception(QueueFullError("Recognition queue is full"))
+                    return future
+                dropped = self.jobs.popleft()[0]
+                self.dropped += 1
+                dropped.set_exception(QueueFullError("Dropped from a full recognition queue"))
+                logger.warning("Recognition queue full, dropped the oldest job")
+            self.jobs.append((future, fn, args, contextvars.copy_context(), time.perf_counter()))
+            self.submitted += 1
+            self.condition.notify()
+        return future
+
+    def _work(self):
+        """
+        Worker loop: take the next job and resolve its Future.
+        """
+        while True:
+            with self.condition:
+                while self.running and not self.jobs:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                future, fn, args, context, queued = self.jobs.popleft()
+                self.active += 1
+            # Run under the submitter's context so spans keep its utterance ID
+            context.run(telemetry.record, 'asr_queue', time.perf_counter() - queued)
+
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if self.process_pool is not None:
+                        result = self.process_pool.submit(fn, *args).result()
+                    else:
+                        result = context.run(fn, *args)
+                except BaseException as e:  # pylint: disable=broad-except
+                    future.set_exception(e)
+                    with self.condition:
+                        self.failed += 1
+                else:
+                    future.set_result(result)
+                    with self.condition:
+                        self.completed += 1
+            finally:
+                with self.condition:
+                    self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the queue depth and job counters.
+
+        :return: A dictionary of pool counters.
+        """
+        with self.condition:
+            return {
+                'queue_depth': len(self.jobs),
+                'active': self.active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting jobs; workers finish the queued ones and exit.
+
+        :param wait: Wait for the workers to exit.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=wait)
+
+_shared_pool: Optional[RecognitionPool] = None
+_shared_pool_lock = threading.Lock()
+
+def get_recognition_pool() -> RecognitionPool:
+    """
+    Get the process-wide recognition pool, creating it on first use.
+
+    :return: The shared RecognitionPool.
+    """
+    global _shared_pool  # pylint: disable=global-statement
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = RecognitionPool()
+            logger.info("Started recognition pool: %d %s worker(s), queue size %d, policy %s",
+                        _shared_pool.workers, _shared_pool.mode, _shared_pool.queue_size, _shared_pool.policy)
+        return _shared_pool
@@ -0,0 +1,308 @@
+"""Latency budgets for upstream calls: per-utterance deadlines, hedged requests and a circuit breaker."""
+import os
+import time
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Set, TypeVar
+from dotenv import load_dotenv
+from logging_config import get_logger
+import telemetry
+
+# Load environment variables from .env file
+load_dotenv()
+UTTERANCE_DEADLINE = float(os.getenv('UTTERANCE_DEADLINE', '20'))
+
+# Configure logging
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+HEDGES = telemetry.REGISTRY.counter("babbelfish_hedged_requests_total",
+                                    "Duplicate requests sent because the first one was slow or failed.")
+HEDGE_WINS = telemetry.REGISTRY.counter("babbelfish_hedge_wins_total",
+                                        "Hedged calls answered by a duplicate rather than the first request.")
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the time budget of an utterance has run out."""
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream the circuit breaker considers degraded."""
+
+# -------------- Deadlines ---------------
+current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float] = UTTERANCE_DEADLINE) -> Iterator[Optional[float]]:
+    """
+    Give the calls made in the block an end-to-end time budget.
+
+    The deadline travels with the context, so work handed to executors through
+    telemetry.in_context keeps it. A nested deadline can only shorten the outer one.
+
+    :param seconds: The budget; None or 0 keeps the outer deadline, if any.
+    :return: A context manager yielding the absolute deadline on the time.monotonic() clock, or None.
+    """
+    outer = current_deadline.get()
+    if not seconds or seconds <= 0:
+        yield outer
+        return
+    at = time.monotonic() + seconds
+    token = current_deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield current_deadline.get()
+    finally:
+        current_deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the current deadline, or None without one.
+    """
+    at = current_deadline.get()
+    return None if at is None else at - time.monotonic()
+
+def budget(timeout: float) -> float:
+    """
+    Cap a timeout by the time left until the current deadline.
+
+    :param timeout: The timeout to use without a deadline.
+    :return: The smaller of timeout and the time left.
+    :raises DeadlineExceeded: If the deadline has already passed.
+    """
+    check_deadline()
+    left = remaining()
+    return timeout if left is None else min(timeout, left)
+
+def check_deadline():
+    """
+    Raise DeadlineExceeded if the current deadline has passed.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Utterance deadline exceeded")
+
+# -------------- Latency tracking ---------------
+class LatencyTracker:
+    """A sliding window of recent call latencies, for percentile-based hedge delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Initialize the tracker.
+
+        :param window: Number of recent latencies kept.
+        :param min_samples: Latencies needed before percentiles are reported.
+        """
+        self.min_samples = min_samples
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """
+        Add the latency of a successful call.
+        """
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        The latency below which percent of the recent calls finished, or None with too few samples.
+        """
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+# -------------- Circuit breaker ---------------
+class CircuitBreaker:
+    """
+    Fails calls fast while an upstream is degraded.
+
+    After failure_threshold consecutive failures the circuit opens and every call
+    is rejected with CircuitOpenError for reset_timeout seconds. Then one trial call
+    is let through ("half open"): its success closes the circuit, its failure opens
+    it again for another reset_timeout. A trial that ends without either, because it
+    was cancelled, is released; one that never reports back expires after reset_timeout.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = "upstream"):
+        """
+        Initialize the breaker, closed.
+
+        :param failure_threshold: Consecutive failures that open the circuit; 0 disables the breaker.
+        :param reset_timeout: Seconds the circuit stays open before a trial call.
+        :param name: Name of the upstream, for logging.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trial_started = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """
+        Check that a call may go ahead.
+
+        :raises CircuitOpenError: While the circuit is open, or a half-open trial is already in flight.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and self.trial_in_flight and now - self.trial_started >= self.reset_timeout:
+                logger.warning("%s circuit trial call never reported back, starting another", self.name)
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                self.trial_started = now
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(f"{self.name} circuit is open, retrying in {retry_in:.0f} s")
+
+    def record_success(self):
+        """
+        Record a call the upstream answered.
+        """
+        with self.lock:
+            self.failures = 0
+            self.trial_in_flight = False
+            if self.state != self.CLOSED:
+                logger.info("%s circuit closed", self.name)
+                self.state = self.CLOSED
+
+    def record_failure(self):
+        """
+        Record a call the upstream failed to answer.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    logger.warning("%s circuit opened after %d failures", self.name, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.opened += 1
+
+    def release(self):
+        """
+        Record a call that ended without an answer either way, e.g. cancelled, so a half-open trial is freed.
+        """
+        with self.lock:
+            self.trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the state and counters of the breaker.
+
+        :return: A dictionary with the state, 1 if open, consecutive failures, times opened and calls rejected.
+        """
+        with self.lock:
+            return {
+                'state': self.state,
+                'open': int(self.state != self.CLOSED),
+                'failures': self.failures,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
+# -------------- Hedged calls ---------------
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call may be tried again: anything but an open circuit or a passed deadline.
+    """
+    return not isinstance(error, (CircuitOpenError, DeadlineExceeded))
+
+def hedged(call: Callable[[], T],
+           executor: Executor,
+           hedge_delay: Optional[float],
+           max_attempts: int = 2,
+           timeout: Optional[float] = None,
+           retry_on: Optional[Callable[[BaseException], bool]] = None) -> T:
+    """
+    Run call, sending a duplicate if it is slow, and return the first successful result.
+
+    A duplicate is started once hedge_delay seconds have passed without a result,
+    or right away when every attempt in flight has failed with an error retry_on
+    accepts, up to max_attempts in total. Attempts run on executor under a copy of
+    the caller's context. Losing attempts cannot be interrupted; their results are
+    discarded when they finish.
+
+    :param call: The call to make; it raises on failure.
+    :param executor: Executor running the attempts; it must not be one the caller itself runs on.
+    :param hedge_delay: Seconds before a duplicate is sent; None sends none unless an attempt fails.
+    :param max_attempts: Maximum number of attempts, the first one included.
+    :param timeout: Optional seconds to wait for a result in total.
+    :param retry_on: Whether a failed attempt may be retried; by default any error but an open
+                     circuit or a passed deadline.
+    :return: The result of the first attempt that succeeds.
+    :raises DeadlineExceeded: If no attempt succeeded within timeout.
+    :raises Exception: The error of the last attempt, if all of them failed.
+    """
+    start = time.monotonic()
+    pending: Set[Future] = set()
+    first: Optional[Future] = None
+    attempts = 0
+    last_error: Optional[BaseException] = None
+
+    def launch():
+        nonlocal attempts, first
+        attempts += 1
+        future = executor.submit(contextvars.copy_context().run, call)
+        first = first or future
+        pending.add(future)
+        if attempts > 1:
+            HEDGES.inc()
+
+    launch()
+    while pending:
+        now = time.monotonic()
+        waits = []
+        if timeout is not None:
+            waits.append(start + timeout - now)
+        if attempts < max_attempts and hedge_delay is not None:
+            waits.append(start + hedge_delay * attempts - now)
+        wait_for = max(0.0, min(waits)) if waits else None
+
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            try:
+                result = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                last_error = e
+                continue
+            if future is not first:
+                HEDGE_WINS.inc()
+            return result
+
+        if timeout is not None and time.monotonic() - start >= timeout:
+            raise DeadlineExceeded(f"No response within {timeout:.1f} s")
+        if attempts < max_attempts and (not pending or
+                                        (hedge_delay is not None and time.monotonic() - start >= hedge_delay * attempts)):
+            if not pending and not (retry_on or is_retryable)(last_error):
+                break
+            logger.info("Hedging a slow or failed request, attempt %d", attempts + 1)
+            launch()
+
+    assert last_error is not None
+    raise last_error
@@ -0,0 +1,5 @@
+#!/bin/sh
+
+set -eux -o pipefail
+
+python api.py
@@ -0,0 +1,180 @@
+"""A single-flight helper that coalesces concurrent identical calls into one upstream call."""
+import threading
+import contextvars
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+class _Call:
+    """An upstream call in progress, shared by the leader and every waiting follower."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        # Items produced so far by a streamed call, replayed to followers that join late
+        self.items: List[Any] = []
+        self.changed = threading.Condition()
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    with the same key while it is running wait for it and receive the same
+    result, or the same exception. Once the call finishes the key is released,
+    so later calls run again. stream() does the same for functions returning an
+    iterator, so followers get every item as the leader produces it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn once for all concurrent callers using the same key.
+
+        :param key: Identifies calls that are interchangeable.
+        :param fn: The function to run.
+        :return: The result of fn, shared with every concurrent caller.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def _join(self, key: str) -> Tuple[_Call, bool]:
+        """
+        Get the call in progress for key, or start one.
+
+        :return: A tuple of (call, True if the caller leads it).
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.coalesced += 1
+                return call, False
+            call = self.calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def stream(self, key: str, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> Iterator[Any]:
+        """
+        Run the iterator fn returns once for all concurrent callers using the same key.
+
+        The leader iterates fn's iterator and every follower sees the same items,
+        those produced before it joined first, then the rest as they arrive. The
+        call is joined on the first next(). If the leader stops reading early while
+        followers are waiting, the rest of fn's iterator is read on a thread of its
+        own, so followers do not depend on the leader; without followers it is closed.
+        Keys share one namespace with do(), so use distinct keys for the two.
+
+        :param key: Identifies calls that are interchangeable.
+        :param fn: The function returning the iterator.
+        :return: An iterator over the items of fn's iterator, shared with every concurrent caller.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            index = 0
+            while True:
+                with call.changed:
+                    while index >= len(call.items) and not call.done.is_set():
+                        call.changed.wait()
+                    if index >= len(call.items):
+                        break
+                    item = call.items[index]
+                index += 1
+                yield item
+            if call.error is not None:
+                raise call.error
+            return
+
+        iterator = None
+        handed_off = False
+        try:
+            iterator = iter(fn(*args, **kwargs))
+            for item in iterator:
+                self._publish(call, item)
+                yield item
+        except GeneratorExit:
+            with self.lock:
+                handed_off = call.followers > 0
+                if not handed_off:
+                    # Released right away, so no follower joins a call that is being closed
+                    del self.calls[key]
+            if handed_off:
+                # Followers are still reading: finish the upstream call for them in the background
+                threading.Thread(target=contextvars.copy_context().run, args=(self._drain, key, call, iterator),
+                                 name="single-flight-drain", daemon=True).start()
+            else:
+                call.error = RuntimeError("The leading caller stopped reading the stream")
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    close()
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            if not handed_off:
+                self._finish(key, call)
+
+    def _publish(self, call: _Call, item: Any):
+        """
+        Add an item of a streamed call and wake its followers.
+        """
+        with call.changed:
+            call.items.append(item)
+            call.changed.notify_all()
+
+    def _drain(self, key: str, call: _Call, iterator: Iterator[Any]):
+        """
+        Read the rest of a streamed call abandoned by its leader, for the followers.
+        """
+        try:
+            for item in iterator:
+                self._publish(call, item)
+        except BaseException as e:  # pylint: disable=broad-except
+            call.error = e
+        finally:
+            self._finish(key, call)
+
+    def _finish(self, key: str, call: _Call):
+        """
+        Release the key of a finished call and wake everyone waiting for it.
+        """
+        with self.lock:
+            if self.calls.get(key) is call:
+                del self.calls[key]
+        with call.changed:
+            call.done.set()
+            call.changed.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the coalescing counters.
+
+        :return: A dictionary with the number of upstream calls, coalesced calls and calls in flight.
+        """
+        with self.lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self.calls)
+            }
@@ -0,0 +1,451 @@
+"""Per-utterance tracing, Prometheus-style metrics and an optional sampling profiler for babbelfish.ai."""
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import threading
+import functools
+import contextlib
+import contextvars
+from collections import Counter as StackCounter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from logging_config import get_logger
+
+# Load environment variables from .env file
+load_dotenv()
+TELEMETRY_LOG_SPANS = os.getenv('TELEMETRY_LOG_SPANS', 'false').lower() == 'true'
+TELEMETRY_METRICS_PORT = int(os.getenv('TELEMETRY_METRICS_PORT', '0'))
+TELEMETRY_PROFILE_INTERVAL_MS = float(os.getenv('TELEMETRY_PROFILE_INTERVAL_MS', '0'))
+TELEMETRY_PROFILE_PATH = os.getenv('TELEMETRY_PROFILE_PATH', 'profile-{pid}.folded')
+
+# Configure logging
+logger = get_logger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+Labels = Tuple[Tuple[str, str], ...]
+
+def label_key(labels: Dict[str, Any]) -> Labels:
+    """
+    Turn label keyword arguments into a hashable, sorted key.
+    """
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    """
+    Format labels the Prometheus text way, e.g. {stage="flow",le="0.5"}.
+    """
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value, with Prometheus spellings of infinity.
+    """
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """A monotonically increasing count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.lock = threading.Lock()
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Add to the count of a label set.
+        """
+        key = label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        """
+        Yield (sample name, labels, value) for exposition.
+        """
+        with self.lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+class Histogram:
+    """A latency distribution per label set, with cumulative buckets, sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.lock = threading.Lock()
+        self.values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        Record one observation for a label set.
+        """
+        key = label_key(labels)
+        with self.lock:
+            counts, total = self.values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        """
+        Yield (sample name, labels, value) for exposition, with cumulative bucket counts.
+        """
+        with self.lock:
+            items = [(labels, list(counts), total[0]) for labels, (counts, total) in self.values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (("le", format_value(bound)),), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+# A collector returns (metric name, type, help, {labels: value}) for values read from elsewhere at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, Dict[Labels, float]]]]
+
+class MetricsRegistry:
+    """
+    Holds the metrics of the process and renders them in the Prometheus text format.
+
+    Counters and histograms are updated as events happen. Collectors read values
+    owned by other objects, such as queue depths and cache counters, when the
+    metrics are scraped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Any] = {}
+        self.collectors: Dict[str, Collector] = {}
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """
+        Get or create a counter.
+        """
+        with self.lock:
+            return self.metrics.setdefault(name, Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create a histogram.
+        """
+        with self.lock:
+            return self.metrics.setdefault(name, Histogram(name, documentation, buckets))
+
+    def register_collector(self, key: str, collector: Collector):
+        """
+        Add or replace the collector registered under key.
+        """
+        with self.lock:
+            self.collectors[key] = collector
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{format_labels(labels)} {format_value(value)}"
+                         for name, labels, value in metric.samples())
+
+        collected: Dict[str, Tuple[str, str, Dict[Labels, float]]] = {}
+        for collector in collectors:
+            try:
+                for name, kind, documentation, values in collector():
+                    collected.setdefault(name, (kind, documentation, {}))[2].update(values)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Metrics collector failed: %s", e)
+        for name, (kind, documentation, values) in collected.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in values.items())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram("babbelfish_stage_seconds", "Time spent in each pipeline stage.")
+STAGE_ERRORS = REGISTRY.counter("babbelfish_stage_errors_total", "Pipeline stages that ended in an error.")
+
+# -------------- Tracing ---------------
+current_utterance: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('utterance_id', default=None)
+
+@contextlib.contextmanager
+def utterance(utterance_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tie the spans of one utterance together under an ID.
+
+    Nested calls without an ID keep the outer utterance.
+
+    :param utterance_id: Optional ID to use; a new one is made if none is active.
+    :return: A context manager yielding the utterance ID.
+    """
+    if utterance_id is None and current_utterance.get() is not None:
+        yield current_utterance.get()
+        return
+    token = current_utterance.set(utterance_id or uuid.uuid4().hex[:12])
+    try:
+        yield current_utterance.get()
+    finally:
+        current_utterance.reset(token)
+
+def record(stage: str, seconds: float, error: Optional[BaseException] = None):
+    """
+    Record the duration of a stage and, if it failed, count the error.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if error is not None:
+        STAGE_ERRORS.inc(stage=stage, error=type(error).__name__)
+    if TELEMETRY_LOG_SPANS:
+        logger.info(json.dumps({
+            'span': stage,
+            'utterance_id': current_utterance.get(),
+            'ms': round(seconds * 1000, 2),
+            'error': type(error).__name__ if error is not None else None
+        }))
+
+def count_error(stage: str, error: str):
+    """
+    Count an error a stage handled itself instead of raising.
+    """
+    STAGE_ERRORS.inc(stage=stage, error=error)
+
+@contextlib.contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a block as one pipeline stage of the current utterance.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record(stage, time.perf_counter() - start, e)
+        raise
+    record(stage, time.perf_counter() - start)
+
+def traced(stage: str) -> Callable:
+    """
+    Decorate a function so each call is timed as a pipeline stage.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def in_context(fn: Callable, *args, **kwargs) -> Callable[[], Any]:
+    """
+    Bind fn to the current context so a worker thread runs it under the same utterance.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn, *args, **kwargs)
+
+# -------------- Collectors for shared resources ---------------
+POOL_METRICS = {
+    'queue_depth': ('babbelfish_recognition_queue_depth', 'gauge', "Recognition jobs waiting for a worker."),
+    'active': ('babbelfish_recognition_active', 'gauge', "Recognition jobs running."),
+    'completed': ('babbelfish_recognition_completed_total', 'counter', "Recognition jobs completed."),
+    'failed': ('babbelfish_recognition_failed_total', 'counter', "Recognition jobs that raised."),
+    'dropped': ('babbelfish_recognition_dropped_total', 'counter', "Recognition jobs dropped from a full queue."),
+    'rejected': ('babbelfish_recognition_rejected_total', 'counter', "Recognition jobs rejected by a full queue."),
+}
+CACHE_METRICS = {
+    'hits': ('babbelfish_cache_hits_total', 'counter', "Cache lookups answered from the cache."),
+    'misses': ('babbelfish_cache_misses_total', 'counter', "Cache lookups that missed."),
+    'hit_rate': ('babbelfish_cache_hit_ratio', 'gauge', "Share of cache lookups answered from the cache."),
+}
+SINGLE_FLIGHT_METRICS = {
+    'coalesced': ('babbelfish_coalesced_requests_total', 'counter', "Requests that shared an in-flight call."),
+    'in_flight': ('babbelfish_in_flight_requests', 'gauge', "Upstream calls in flight."),
+}
+BREAKER_METRICS = {
+    'open': ('babbelfish_circuit_open', 'gauge', "1 while the circuit breaker rejects calls to the upstream."),
+    'opened': ('babbelfish_circuit_opened_total', 'counter', "Times the circuit breaker opened."),
+    'rejected': ('babbelfish_circuit_rejected_total', 'counter', "Calls rejected by an open circuit breaker."),
+}
+
+def register_stats(key: str, stats: Callable[[], Dict[str, Any]], metrics: Dict[str, Tuple[str, str, str]],
+                   registry: MetricsRegistry = REGISTRY, **labels):
+    """
+    Expose values of a stats() dictionary as metrics, read at scrape time.
+
+    :param key: Identifies the collector; registering the same key again replaces it.
+    :param stats: A function returning the stats dictionary, e.g. RecognitionPool.stats.
+    :param metrics: Maps stats keys to (metric name, type, help).
+    :param labels: Labels added to every sample, e.g. cache="translation".
+    """
+    labels_key = label_key(labels)
+
+    def collect():
+        values = stats()
+        for field, (name, kind, documentation) in metrics.items():
+            if field in values:
+                yield name, kind, documentation, {labels_key: values[field]}
+
+    registry.register_collector(key, collect)
+
+# -------------- Exposition ---------------
+_metrics_server: Optional[ThreadingHTTPServer] = None
+
+def start_metrics_server(port: int = TELEMETRY_METRICS_PORT, registry: MetricsRegistry = REGISTRY) -> Optional[int]:
+    """
+    Serve GET /metrics on a background thread, for processes without their own HTTP API such as Streamlit.
+
+    :param port: Port to listen on; 0 disables the server.
+    :return: The port served, or None when disabled.
+    """
+    global _metrics_server  # pylint: disable=global-statement
+    if not port:
+        return None
+    if _metrics_server is None:
+        class Handler(BaseHTTPRequestHandler):
+            """Serves the metrics registry."""
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        _metrics_server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+        logger.info("Serving metrics on port %d", port)
+    return _metrics_server.server_address[1]
+
+# -------------- Sampling profiler ---------------
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread at a fixed interval.
+
+    Sampled stacks are counted in the collapsed "folded" format read by
+    flamegraph.pl and speedscope: one line per distinct stack, frames separated
+    by semicolons, followed by its sample count. The profiler only reads
+    sys._current_frames(), so it adds no overhead to the profiled code beyond the
+    sampling thread itself.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        """
+        Initialize the profiler.
+
+        :param interval: Seconds between samples.
+        :param max_depth: Deepest stack recorded, counted from the outermost frame.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: StackCounter = StackCounter()
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        """
+        Record the current stack of every thread except the profiler's.
+        """
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            frames.append(names.get(ident, str(ident)))
+            stacks.append(";".join(reversed(frames[-self.max_depth:])))
+        with self.lock:
+            self.stacks.update(stacks)
+            self.samples += 1
+
+    def _run(self):
+        while self.running.is_set():
+            self.sample()
+            time.sleep(self.interval)
+
+    def start(self) -> "SamplingProfiler":
+        """
+        Start sampling on a background thread.
+        """
+        if not self.running.is_set():
+            self.running.set()
+            self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop sampling.
+        """
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def folded(self) -> str:
+        """
+        The sampled stacks in the folded format, most frequent first.
+        """
+        with self.lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def dump(self, path: str):
+        """
+        Write the sampled stacks to a file in the folded format.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        logger.info("Wrote %d profile samples to %s", self.samples, path)
+
+_profiler: Optional[SamplingProfiler] = None
+
+def start_profiler(interval_ms: float = TELEMETRY_PROFILE_INTERVAL_MS,
+                   path: str = TELEMETRY_PROFILE_PATH) -> Optional[SamplingProfiler]:
+    """
+    Start the process-wide sampling profiler if an interval is configured; the profile is written to path at exit.
+
+    :param interval_ms: Milliseconds between samples; 0 disables the profiler.
+    :param path: File the folded stacks are written to when the process exits; "{pid}" is replaced by the process ID.
+    :return: The running profiler, or None when disabled.
+    """
+    global _profiler  # pylint: disable=global-statement
+    if interval_ms <= 0:
+        return None
+    if _profiler is None:
+        _profiler = SamplingProfiler(interval_ms / 1000).start()
+        path = path.replace('{pid}', str(os.getpid()))
+        atexit.register(_profiler.dump, path)
+        logger.info("Sampling profiler started, every %g ms, writing to %s at exit", interval_ms, path)
+    return _profiler
@@ -0,0 +1,19 @@
+"""Shared fixtures for the babbelfish.ai tests."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# langflow_runner refuses to import without a Langflow URL; tests that talk to Langflow use the mock server
+os.environ.setdefault('BASE_API_URL', "http://127.0.0.1:9/api/v1/run")
+
+import pytest  # noqa: E402
+from benchmarks.mock_langflow import MockLangflowServer  # noqa: E402
+
+@pytest.fixture
+def mock_langflow():
+    """
+    A local Langflow stand-in answering flow runs after 50 ms.
+    """
+    with MockLangflowServer(delay=50, translation_delay=20, token_delay=1) as server:
+        yield server
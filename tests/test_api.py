@@ -0,0 +1,80 @@
+"""Tests for the headless HTTP API of api.py, against the mock Langflow server and the stub ASR backend."""
+import functools
+import pytest
+from starlette.testclient import TestClient
+import api
+from benchmarks.fixtures import synthetic_utterance
+from langflow_runner import LangflowClient
+from listen_and_convert import TranscribeAudio
+
+@pytest.fixture
+def client(mock_langflow, monkeypatch):
+    monkeypatch.setattr(api, 'FLOW_ID', "flow")
+    monkeypatch.setattr(api, 'LANGUAGE_TO_SPEAK', "French")
+    monkeypatch.setattr(api, 'LangflowClient',
+                        lambda: LangflowClient(base_url=mock_langflow.base_url, hedge_percentile=0, breaker_failures=0))
+    monkeypatch.setattr(api, 'TranscribeAudio', functools.partial(TranscribeAudio, backend="stub"))
+    with TestClient(api.app) as client:
+        yield client
+
+def test_translate(client):
+    response = client.post('/translate', json={"text": "good morning", "language": "Spanish"})
+    assert response.status_code == 200
+    assert response.json()['translation'] == "[Spanish] good morning"
+    assert response.json()['sentiment'] == "Neutral"
+
+def test_translate_defaults_to_language_to_speak(client):
+    assert client.post('/translate', json={"text": "hello"}).json()['translation'] == "[French] hello"
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b'{"text": "  "}'])
+def test_translate_rejects_a_bad_body(client, body):
+    response = client.post('/translate', content=body, headers={'content-type': 'application/json'})
+    assert response.status_code == 400
+    assert response.json()['error']
+
+def test_failed_flow_is_a_bad_gateway(client, mock_langflow):
+    mock_langflow.error_rate = 1.0
+    response = client.post('/translate', json={"text": "hello"})
+    assert response.status_code == 502
+    assert response.json()['translation'] == 'N/A'
+
+def test_transcribe(client):
+    response = client.post('/transcribe', content=synthetic_utterance(1.5, seed=1))
+    assert response.status_code == 200
+    assert response.json()['transcription'].startswith("utterance of")
+
+def test_transcribe_silence_is_null(client):
+    assert client.post('/transcribe', content=bytes(32000)).json() == {'transcription': None}
+
+@pytest.mark.parametrize("query, body", [("", b""), ("?samplerate=22050", bytes(3200)), ("?samplerate=x", bytes(3200))])
+def test_transcribe_rejects_bad_audio(client, query, body):
+    assert client.post(f'/transcribe{query}', content=body).status_code == 400
+
+def test_speech_to_translation(client):
+    response = client.post('/speech-to-translation?language=Spanish', content=synthetic_utterance(1.5, seed=1))
+    assert response.status_code == 200
+    body = response.json()
+    assert body['transcription'].startswith("utterance of")
+    assert body['translation'] == f"[Spanish] {body['transcription']}"
+
+def test_speech_to_translation_without_speech(client, mock_langflow):
+    response = client.post('/speech-to-translation', content=bytes(32000))
+    assert response.status_code == 422
+    assert response.json()['transcription'] is None
+    assert mock_langflow.requests == 0
+
+def test_health(client):
+    client.post('/translate', json={"text": "hello"})
+    body = client.get('/health').json()
+    assert body['status'] == 'ok'
+    assert body['translation_cache']['misses'] == 1
+    assert body['langflow_breaker']['state'] == 'closed'
+    assert body['recognition_pool']['queue_depth'] == 0
+
+def test_metrics(client):
+    client.post('/translate', json={"text": "hello"})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'babbelfish_stage_seconds_count{stage="flow"}' in response.text
+    assert 'babbelfish_cache_hits' in response.text
@@ -0,0 +1,82 @@
+"""Tests for the async flow runs and bounded fan-out of langflow_runner.py, against the mock Langflow server."""
+import asyncio
+import httpx
+import pytest
+from langflow_runner import LANGUAGE_COMPONENT_ID, LangflowClient, LangflowRunner
+
+@pytest.fixture
+def client(mock_langflow):
+    client = LangflowClient(base_url=mock_langflow.base_url, max_concurrency=2, breaker_failures=0)
+    yield client
+    client.close()
+
+def make_runner(client) -> LangflowRunner:
+    return LangflowRunner(flow_id="flow", tweaks={LANGUAGE_COMPONENT_ID: {"input_value": "French"}}, client=client)
+
+def translations(runner, responses):
+    return [runner.extract_output_message(response)['translation'] for response in responses]
+
+async def run_and_close(client, coroutine):
+    try:
+        return await coroutine
+    finally:
+        await client.aclose()
+
+def test_results_come_back_in_input_order(client, mock_langflow):
+    # Later messages answer first
+    delays = iter([0.3, 0.2, 0.1, 0.0])
+    original = mock_langflow.request_faults
+    mock_langflow.request_faults = lambda: (original()[0] + next(delays), False)
+    runner = make_runner(client)
+    messages = ["one", "two", "three", "four"]
+    responses = asyncio.run(run_and_close(client, runner.arun_many(messages)))
+    assert translations(runner, responses) == [f"[French] {message}" for message in messages]
+
+def test_no_more_than_max_concurrency_requests_in_flight(client, monkeypatch):
+    in_flight = peak = 0
+    post = httpx.AsyncClient.post
+
+    async def counting_post(self, *args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await post(self, *args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(httpx.AsyncClient, 'post', counting_post)
+    runner = make_runner(client)
+    responses = asyncio.run(run_and_close(client, runner.arun_many([f"message {i}" for i in range(6)])))
+    assert all(translation != 'N/A' for translation in translations(runner, responses))
+    assert peak == 2
+
+def test_failing_flow_does_not_cancel_the_others(client, mock_langflow):
+    original = mock_langflow.request_faults
+    calls = []
+
+    def first_fails():
+        delay, _ = original()
+        calls.append(1)
+        return delay, len(calls) == 1
+
+    mock_langflow.request_faults = first_fails
+    runner = make_runner(client)
+    responses = asyncio.run(run_and_close(client, runner.arun_many(["one", "two", "three"])))
+    assert len(responses) == 3
+    assert sorted(translations(runner, responses)).count('N/A') == 1
+    assert mock_langflow.requests == 3
+
+def test_async_client_is_reused_on_one_loop(client):
+    runner = make_runner(client)
+
+    async def run_twice():
+        await runner.arun_flow("one")
+        first = client._async_state()  # pylint: disable=protected-access
+        await runner.arun_flow("two")
+        return first, client._async_state(), len(client._async_clients)  # pylint: disable=protected-access
+
+    first, second, count = asyncio.run(run_and_close(client, run_twice()))
+    assert first[0] is second[0]
+    assert first[1] is second[1]
+    assert count == 1
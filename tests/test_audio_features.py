@@ -0,0 +1,46 @@
+"""Tests for the per-frame features of audio_features.py."""
+import numpy as np
+import pytest
+from audio_features import (INT16_FULL_SCALE, band_energy_ratio, extract_features, frame_rms, frame_signal,
+                            pcm_to_array, rms_to_dbfs, zero_crossing_rate)
+
+SAMPLERATE = 16000
+
+def tone(frequency: float, seconds: float = 0.3, amplitude: float = 10000.0) -> np.ndarray:
+    """
+    An int16 sine tone, phase-shifted so no sample lands exactly on zero.
+    """
+    t = np.arange(int(SAMPLERATE * seconds)) / SAMPLERATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t + 0.1)).astype(np.int16)
+
+def test_full_scale_rms_does_not_overflow():
+    frames = frame_signal(np.full(4800, -32768, dtype=np.int16), 480)
+    rms = frame_rms(frames)
+    assert rms == pytest.approx(np.full(10, INT16_FULL_SCALE))
+    assert rms_to_dbfs(rms) == pytest.approx(np.zeros(10))
+
+def test_zero_crossing_rate_of_a_sine():
+    # A 1 kHz sine crosses zero twice per cycle: 2000 times in 16000 samples
+    zcr = zero_crossing_rate(frame_signal(tone(1000), 480))
+    assert zcr == pytest.approx(np.full(len(zcr), 2000 / SAMPLERATE), abs=0.005)
+
+def test_voice_band_holds_a_1khz_tone_but_not_a_5khz_tone():
+    inside = band_energy_ratio(frame_signal(tone(1000), 480), SAMPLERATE)
+    outside = band_energy_ratio(frame_signal(tone(5000), 480), SAMPLERATE)
+    assert inside.min() > 0.99
+    assert outside.max() < 0.01
+
+def test_frames_are_views_and_drop_the_remainder():
+    samples = pcm_to_array(np.arange(1000, dtype=np.int16).tobytes())
+    frames = frame_signal(samples, 300, hop_size=200)
+    assert frames.shape == (4, 300)
+    assert np.shares_memory(frames, samples)
+    assert frames[1, 0] == 200
+    assert frame_signal(samples[:100], 300).shape == (0, 300)
+
+def test_gated_features_skip_the_voice_ratio_of_quiet_frames():
+    samples = np.concatenate([np.zeros(480, dtype=np.int16), tone(1000, seconds=0.03)])
+    features = extract_features(samples, SAMPLERATE, frame_duration=30, gate_rms=100.0)
+    assert set(features) == {'rms', 'dbfs', 'zcr', 'voice_ratio'}
+    assert features['voice_ratio'][0] == 0
+    assert features['voice_ratio'][1] > 0.99
@@ -0,0 +1,63 @@
+"""Tests for the streamed PCM packets and buffer of audio_stream.py."""
+import numpy as np
+from audio_stream import FLAG_FINAL, PACKET_HEADER, PCMStreamBuffer, parse_audio_packet
+
+def make_packet(stream_id: int, first_seq: int, chunk_bytes: int, final: bool, pcm: bytes) -> bytes:
+    return PACKET_HEADER.pack(stream_id, first_seq, chunk_bytes, FLAG_FINAL if final else 0) + pcm
+
+def test_write_read_and_consume():
+    buffer = PCMStreamBuffer(capacity=8)
+    buffer.write(b"\x01\x00\x02\x00")
+    buffer.write(b"\x03\x00")
+    assert len(buffer) == 6
+    assert bytes(buffer.readable(4)) == b"\x01\x00\x02\x00"
+    assert list(buffer.samples()) == [1, 2, 3]
+
+    buffer.consume(4)
+    assert len(buffer) == 2
+    assert list(buffer.samples()) == [3]
+
+def test_consumed_space_is_reused_before_growing():
+    buffer = PCMStreamBuffer(capacity=8)
+    buffer.write(b"abcdef")
+    buffer.consume(4)
+    buffer.write(b"ghij")
+    assert len(buffer.data) == 8
+    assert bytes(buffer.readable()) == b"efghij"
+
+def test_buffer_grows_for_large_writes():
+    buffer = PCMStreamBuffer(capacity=4)
+    buffer.write(b"ab")
+    buffer.write(b"cdefghij")
+    assert len(buffer.data) >= 10
+    assert bytes(buffer.readable()) == b"abcdefghij"
+
+def test_samples_view_shares_memory_and_ignores_odd_byte():
+    buffer = PCMStreamBuffer(capacity=16)
+    buffer.write(np.array([100, -100], dtype='<i2').tobytes() + b"\x07")
+    samples = buffer.samples()
+    assert list(samples) == [100, -100]
+    assert np.shares_memory(samples, np.frombuffer(buffer.data, dtype=np.uint8))
+
+def test_clear_drops_unread_bytes():
+    buffer = PCMStreamBuffer()
+    buffer.write(b"abcd")
+    buffer.clear()
+    assert len(buffer) == 0
+    assert bytes(buffer.readable()) == b""
+
+def test_malformed_packets_are_rejected():
+    assert parse_audio_packet(b"") is None
+    assert parse_audio_packet(b"\x00" * (PACKET_HEADER.size - 1)) is None
+
+def test_packet_round_trip():
+    packet = parse_audio_packet(make_packet(stream_id=7, first_seq=3, chunk_bytes=4, final=True, pcm=b"\x01" * 10))
+    assert packet is not None
+    assert (packet.stream_id, packet.first_seq, packet.chunk_bytes, packet.final) == (7, 3, 4, True)
+    assert packet.num_chunks == 3
+    assert bytes(packet.pcm) == b"\x01" * 10
+
+def test_packet_drops_trailing_odd_byte():
+    packet = parse_audio_packet(make_packet(stream_id=1, first_seq=0, chunk_bytes=4, final=False, pcm=b"\x01" * 5))
+    assert not packet.final
+    assert len(packet.pcm) == 4
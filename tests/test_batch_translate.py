@@ -0,0 +1,78 @@
+"""Tests for the checkpointing and resume of batch_translate.py, against the mock Langflow server."""
+import json
+import pytest
+from batch_translate import BatchTranslator, Checkpoint, RateLimiter, load_checkpoint, read_items
+from langflow_runner import LangflowClient
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding='utf-8')
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+@pytest.fixture
+def translator(mock_langflow):
+    translator = BatchTranslator("flow", "French", concurrency=4,
+                                 client=LangflowClient(base_url=mock_langflow.base_url, pool_size=4))
+    yield translator
+    translator.client.close()
+
+def test_checkpoint_keeps_a_watermark_and_the_lines_above_it():
+    checkpoint = Checkpoint()
+    for line in (1, 2, 4, 6):
+        checkpoint.add(line)
+    assert checkpoint.watermark == 2
+    assert checkpoint.above == {4, 6}
+    checkpoint.add(3)
+    assert checkpoint.watermark == 4
+    assert checkpoint.above == {6}
+    assert 3 in checkpoint and 6 in checkpoint and 5 not in checkpoint
+    assert len(checkpoint) == 5
+
+def test_read_items_skips_blank_and_malformed_lines(tmp_path):
+    path = tmp_path / "input.jsonl"
+    write_lines(path, ['{"text": "hello", "id": 7}', '', 'not json', '{"other": 1}',
+                       '{"text": "bye", "language": "Spanish"}'])
+    items = list(read_items(str(path)))
+    assert [(item.line, item.id, item.text, item.language) for item in items] == \
+        [(1, "7", "hello", None), (5, None, "bye", "Spanish")]
+
+def test_load_checkpoint_truncates_a_partial_record(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"line": 1}\n{"line": 3}\n{"line": 4, "transl', encoding='utf-8')
+    checkpoint = load_checkpoint(str(output), iter([1, 3, 4]))
+    assert output.read_text(encoding='utf-8') == '{"line": 1}\n{"line": 3}\n'
+    # Line 2 is blank in the input, so it does not hold the watermark back
+    assert checkpoint.watermark == 3
+    assert 4 not in checkpoint
+
+def test_run_translates_every_line(tmp_path, translator):
+    source = tmp_path / "input.txt"
+    write_lines(source, [f"sentence {index}" for index in range(20)])
+    output = tmp_path / "out.jsonl"
+    with open(output, 'a', encoding='utf-8') as out:
+        stats = translator.run(read_items(str(source)), out)
+    assert stats['translated'] == 20
+    assert stats['failed'] == 0
+    records = read_records(output)
+    assert sorted(record['line'] for record in records) == list(range(1, 21))
+    assert all(record['translation'] == f"[French] {record['text']}" for record in records)
+
+def test_resume_skips_lines_already_done(tmp_path, translator, mock_langflow):
+    source = tmp_path / "input.txt"
+    write_lines(source, [f"sentence {index}" for index in range(10)])
+    output = tmp_path / "out.jsonl"
+    write_lines(output, [json.dumps({"line": line, "translation": "done"}) for line in (1, 2, 5)])
+
+    checkpoint = load_checkpoint(str(output), (item.line for item in read_items(str(source))))
+    with open(output, 'a', encoding='utf-8') as out:
+        stats = translator.run(read_items(str(source)), out, checkpoint)
+    assert stats['skipped'] == 3
+    assert stats['translated'] == 7
+    assert mock_langflow.requests == 7
+    assert sorted(record['line'] for record in read_records(output)) == list(range(1, 11))
+
+def test_disabled_rate_limiter_never_waits():
+    limiter = RateLimiter(0)
+    for _ in range(1000):
+        limiter.acquire()
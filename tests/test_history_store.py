@@ -0,0 +1,73 @@
+"""Tests for the bounded chat histories of history_store.py."""
+import gc
+import io
+import json
+from history_store import HistoryStore
+
+def fill(history, count, size=10):
+    for index in range(count):
+        history.append("user" if index % 2 == 0 else "assistant", f"{index:0{size}d}")
+
+def contents(messages):
+    return [int(message['content']) for message in messages]
+
+def test_ring_spills_oldest_messages_to_sqlite(tmp_path):
+    store = HistoryStore(db_path=str(tmp_path / "history.db"), ring_size=3)
+    history = store.session("a")
+    fill(history, 10)
+    assert len(history) == 10
+    assert len(history.ring) == 3
+    assert store.stats()['spilled'] == 7
+    assert history.oldest == 0
+    assert contents(history.page(0, 10)) == list(range(10))
+    assert contents(history.page(5, 3)) == [5, 6, 7]
+    assert contents(history.recent(4)) == [6, 7, 8, 9]
+
+def test_without_a_path_spilled_messages_are_dropped():
+    store = HistoryStore(db_path=None, ring_size=3)
+    history = store.session("a")
+    fill(history, 10)
+    assert history.oldest == 7
+    assert contents(history.page(0, 10)) == [7, 8, 9]
+
+def test_memory_budget_spills_idle_sessions_first(tmp_path):
+    store = HistoryStore(db_path=str(tmp_path / "history.db"), ring_size=100, memory_budget=250)
+    idle = store.session("idle")
+    active = store.session("active")
+    fill(idle, 10)
+    fill(active, 10)
+    assert store.stats()['memory_bytes'] <= 250
+    assert len(idle.ring) == 0
+    assert len(active.ring) == 10
+    assert contents(idle.page(0, 10)) == list(range(10))
+
+def test_spilled_messages_expire_after_ttl(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(db_path=path, ring_size=1)
+    history = store.session("a")
+    fill(history, 5)
+
+    HistoryStore(db_path=path, ttl=0)
+    assert contents(history.page(0, 5)) == [4]
+
+def test_collected_session_is_deleted_from_disk(tmp_path):
+    store = HistoryStore(db_path=str(tmp_path / "history.db"), ring_size=1)
+    history = store.session("a")
+    fill(history, 5)
+    del history
+    gc.collect()
+    assert store.stats()['sessions'] == 0
+    assert store._read("a", 0, 5) == []  # pylint: disable=protected-access
+
+def test_export_and_clear(tmp_path):
+    store = HistoryStore(db_path=str(tmp_path / "history.db"), ring_size=2)
+    history = store.session("a")
+    fill(history, 5)
+    out = io.StringIO()
+    assert history.export_jsonl(out, page_size=2) == 5
+    assert [int(json.loads(line)['content']) for line in out.getvalue().splitlines()] == list(range(5))
+
+    history.clear()
+    assert len(history) == 0
+    assert history.page(0, 5) == []
+    assert store.stats()['memory_bytes'] == 0
@@ -0,0 +1,86 @@
+"""Tests for LangflowRunner and LangflowClient against the mock Langflow server."""
+import pytest
+from langflow_runner import LANGUAGE_COMPONENT_ID, LangflowClient, LangflowRunner
+from resilience import CircuitBreaker
+from single_flight import SingleFlight
+from translation_cache import TranslationCache
+
+@pytest.fixture
+def client(mock_langflow):
+    client = LangflowClient(base_url=mock_langflow.base_url, pool_size=4)
+    yield client
+    client.close()
+
+def make_runner(client, **kwargs) -> LangflowRunner:
+    return LangflowRunner(flow_id="flow", tweaks={LANGUAGE_COMPONENT_ID: {"input_value": "French"}},
+                          client=client, **kwargs)
+
+def test_run_and_extract(client):
+    results = make_runner(client).run_and_extract("hello")
+    assert results['translation'] == "[French] hello"
+    assert results['sentiment'] != 'N/A'
+
+def test_results_are_cached(client, mock_langflow):
+    runner = make_runner(client, cache=TranslationCache(db_path=None))
+    runner.run_and_extract("hello")
+    assert runner.run_and_extract("  Hello ")['translation'] == "[French] hello"
+    assert mock_langflow.requests == 1
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_progressive_runs_are_coalesced(client, mock_langflow, stream):
+    single_flight = SingleFlight()
+    runner = make_runner(client, single_flight=single_flight)
+    runs = [runner.run_progressive("hello there", stream=stream) for _ in range(3)]
+    assert [translation.result(5) for translation, _ in runs] == ["[French] hello there"] * 3
+    assert all(results.result(5)['sentiment'] != 'N/A' for _, results in runs)
+    assert mock_langflow.requests == 1
+    assert single_flight.stats()['coalesced'] == 2
+
+def test_streaming_translation_arrives_before_the_results(client):
+    events = list(make_runner(client).stream_and_extract("good morning"))
+    types = [event["type"] for event in events]
+    assert types.index("translation_done") < types.index("results")
+    assert "".join(event["text"] for event in events if event["type"] == "translation") == "[French] good morning"
+
+def test_server_errors_open_the_breaker(mock_langflow):
+    mock_langflow.error_rate = 1.0
+    client = LangflowClient(base_url=mock_langflow.base_url, hedge_percentile=0, breaker_failures=2)
+    try:
+        runner = make_runner(client)
+        for _ in range(3):
+            assert runner.run_and_extract("hello")['translation'] == 'N/A'
+        assert client.breaker.state == CircuitBreaker.OPEN
+        assert mock_langflow.requests == 2
+        assert list(runner.stream_flow("hello")) == []
+        assert mock_langflow.requests == 2
+    finally:
+        client.close()
+
+def test_server_error_is_retried_once(mock_langflow):
+    mock_langflow.error_rate = 1.0
+    client = LangflowClient(base_url=mock_langflow.base_url, breaker_failures=0)
+    try:
+        assert make_runner(client).run_and_extract("hello")['translation'] == 'N/A'
+        assert mock_langflow.requests == 2
+    finally:
+        client.close()
+
+def test_stalled_run_is_hedged(mock_langflow):
+    client = LangflowClient(base_url=mock_langflow.base_url, hedge_min_delay=0.0, hedge_initial_delay=0.2)
+    try:
+        runner = make_runner(client)
+        mock_langflow.stall_rate = 1.0
+        mock_langflow.stall = 5.0
+        # Only the first request stalls; the hedge sent after 0.2 s answers
+        original = mock_langflow.request_faults
+
+        def first_stalls():
+            delay, failed = original()
+            mock_langflow.stall_rate = 0.0
+            return delay, failed
+
+        mock_langflow.request_faults = first_stalls
+        assert runner.run_and_extract("hello")['translation'] == "[French] hello"
+        assert mock_langflow.requests == 2
+    finally:
+        client.close()
@@ -0,0 +1,59 @@
+"""Tests for the recognition and streamed gating of listen_and_convert.py."""
+import pytest
+from audio_stream import AudioPacket
+from benchmarks.fixtures import synthetic_utterance
+from listen_and_convert import ASRBackend, TranscribeAudio
+from recognition_pool import RecognitionPool
+import telemetry
+
+CHUNK_BYTES = 3200  # 100 ms at 16 kHz
+
+@pytest.fixture
+def pool():
+    pool = RecognitionPool(workers=2)
+    yield pool
+    pool.shutdown()
+
+def stream(transcriber, audio, speaking_language="en-US"):
+    futures = []
+    chunks = range(0, len(audio), CHUNK_BYTES)
+    for seq, offset in enumerate(chunks):
+        packet = AudioPacket(stream_id=1, first_seq=seq, chunk_bytes=CHUNK_BYTES, final=seq == len(chunks) - 1,
+                             pcm=memoryview(audio[offset:offset + CHUNK_BYTES]))
+        futures += transcriber.feed_stream(packet, speaking_language)
+    return futures
+
+def test_broken_backend_settles_with_no_transcription(pool):
+    transcriber = TranscribeAudio(backend="bogus", pool=pool)
+    result = transcriber.recognize_segments([bytes(3200)], "en-US")
+    assert result.result(timeout=5) is None
+
+def test_stub_backend_transcribes_streamed_utterances(pool):
+    transcriber = TranscribeAudio(backend="stub", pool=pool)
+    audio = synthetic_utterance(1.5, seed=1, silence_seconds=1.0) + synthetic_utterance(1.5, seed=2, silence_seconds=1.0)
+    futures = stream(transcriber, audio)
+    assert len(futures) == 2
+    assert all(future.result(timeout=5) for future in futures)
+
+def test_streamed_speech_does_not_raise_the_noise_floor(pool):
+    audio = b"".join(synthetic_utterance(2.0, seed=seed, silence_seconds=1.0) for seed in range(4))
+    batch = TranscribeAudio(backend="stub", pool=pool)
+    batch.speech_segments(audio)
+
+    streamed = TranscribeAudio(backend="stub", pool=pool)
+    stream(streamed, audio)
+    assert abs(streamed.noise_floor.floor_db - batch.noise_floor.floor_db) < 3
+
+def test_recognition_is_recorded_as_the_recognize_stage(pool):
+    stage = (('stage', 'recognize'),)
+    before = sum(telemetry.STAGE_SECONDS.values.get(stage, ([0], None))[0])
+    transcriber = TranscribeAudio(backend="stub", pool=pool)
+    assert transcriber.transcribe_async(synthetic_utterance(1.5, seed=1), "en-US").result(timeout=5)
+    assert sum(telemetry.STAGE_SECONDS.values[stage][0]) == before + 1
+
+def test_backend_must_implement_recognize():
+    class Incomplete(ASRBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
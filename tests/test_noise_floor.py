@@ -0,0 +1,54 @@
+"""Tests for the adaptive noise floor of noise_floor.py."""
+import numpy as np
+import pytest
+from audio_features import INT16_FULL_SCALE
+from noise_floor import NoiseFloorTracker
+
+def frames_at(dbfs: float, count: int = 50) -> np.ndarray:
+    """
+    Per-frame RMS of a clip whose every frame sits at the given level.
+    """
+    return np.full(count, INT16_FULL_SCALE * 10 ** (dbfs / 20))
+
+def test_silent_room_is_clamped_to_the_min_threshold():
+    tracker = NoiseFloorTracker(min_threshold=10.0)
+    for _ in range(10):
+        threshold = tracker.update(np.zeros(50))
+    assert tracker.floor_db < -100
+    assert threshold == 10.0
+
+def test_loud_room_is_clamped_to_the_max_threshold():
+    tracker = NoiseFloorTracker(max_threshold=2000.0)
+    for _ in range(50):
+        threshold = tracker.update(frames_at(-3.0))
+    assert tracker.floor_db == pytest.approx(-3.0, abs=0.1)
+    assert threshold == 2000.0
+
+def test_floor_falls_faster_than_it_rises():
+    rising = NoiseFloorTracker(initial_floor_db=-60.0, rise_rate=0.2, fall_rate=0.5)
+    rising.update(frames_at(-40.0))
+    assert rising.floor_db == pytest.approx(-56.0)
+
+    falling = NoiseFloorTracker(initial_floor_db=-60.0, rise_rate=0.2, fall_rate=0.5)
+    falling.update(frames_at(-80.0))
+    assert falling.floor_db == pytest.approx(-70.0)
+
+def test_speech_only_clip_barely_moves_the_floor():
+    tracker = NoiseFloorTracker(initial_floor_db=-60.0, percentile=20.0)
+    # Pauses between words make up the quietest frames, speech the rest
+    tracker.update(np.concatenate([frames_at(-60.0, 15), frames_at(-20.0, 35)]))
+    assert tracker.floor_db == pytest.approx(-60.0, abs=1.0)
+
+def test_constant_noise_warms_up_to_its_level():
+    tracker = NoiseFloorTracker(initial_floor_db=-60.0, margin_db=10.0)
+    for _ in range(30):
+        threshold = tracker.update(frames_at(-45.0))
+    assert tracker.floor_db == pytest.approx(-45.0, abs=0.05)
+    assert threshold == pytest.approx(INT16_FULL_SCALE * 10 ** (-35.0 / 20), rel=0.01)
+    assert tracker.stats()['clips_seen'] == 30
+
+def test_empty_clip_is_ignored():
+    tracker = NoiseFloorTracker()
+    before = tracker.threshold
+    assert tracker.update(np.array([])) == before
+    assert tracker.stats()['clips_seen'] == 0
@@ -0,0 +1,93 @@
+"""Tests for the bounded queue and workers of recognition_pool.py."""
+import threading
+import pytest
+from benchmarks.fixtures import synthetic_utterance
+from listen_and_convert import TranscribeAudio, recognize_audio
+from recognition_pool import QueueFullError, RecognitionPool
+
+class SlowBackend:
+    """Stands in for a slow recognizer: every job blocks until released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def recognize(self, name):
+        self.started.set()
+        assert self.release.wait(5)
+        return name
+
+@pytest.fixture
+def backend():
+    backend = SlowBackend()
+    yield backend
+    backend.release.set()
+
+def fill(pool, backend):
+    """
+    Occupy the single worker, then fill the queue of two with jobs "a" and "b".
+    """
+    running = pool.submit(backend.recognize, "running")
+    assert backend.started.wait(5)
+    return running, pool.submit(backend.recognize, "a"), pool.submit(backend.recognize, "b")
+
+def test_drop_oldest_fails_the_oldest_waiting_job(backend):
+    pool = RecognitionPool(workers=1, queue_size=2, policy='drop_oldest')
+    try:
+        running, a, b = fill(pool, backend)
+        c = pool.submit(backend.recognize, "c")
+        with pytest.raises(QueueFullError):
+            a.result(timeout=1)
+        backend.release.set()
+        assert [future.result(timeout=5) for future in (running, b, c)] == ["running", "b", "c"]
+        assert pool.stats()['dropped'] == 1
+        assert pool.stats()['rejected'] == 0
+    finally:
+        pool.shutdown()
+
+def test_reject_fails_the_new_job(backend):
+    pool = RecognitionPool(workers=1, queue_size=2, policy='reject')
+    try:
+        running, a, b = fill(pool, backend)
+        c = pool.submit(backend.recognize, "c")
+        with pytest.raises(QueueFullError):
+            c.result(timeout=1)
+        backend.release.set()
+        assert [future.result(timeout=5) for future in (running, a, b)] == ["running", "a", "b"]
+        assert pool.stats()['rejected'] == 1
+        assert pool.stats()['dropped'] == 0
+    finally:
+        pool.shutdown()
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        RecognitionPool(workers=1, policy='lifo')
+    with pytest.raises(ValueError):
+        RecognitionPool(workers=1, mode='fiber')
+
+def test_process_mode_runs_jobs_in_worker_processes():
+    pool = RecognitionPool(workers=2, mode='process')
+    try:
+        futures = [pool.submit(recognize_audio, bytes(3200 * n), 16000, "en-US", "stub") for n in (1, 2)]
+        assert [future.result(timeout=30) for future in futures] == \
+            ["utterance of 100 milliseconds", "utterance of 200 milliseconds"]
+        assert pool.stats()['completed'] == 2
+    finally:
+        pool.shutdown()
+
+def test_shut_down_pool_refuses_jobs():
+    pool = RecognitionPool(workers=1)
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit(len, b"")
+
+def test_start_stop_cycles_leak_no_workers():
+    baseline = threading.active_count()
+    for _ in range(3):
+        pool = RecognitionPool(workers=3)
+        transcriber = TranscribeAudio(backend="stub", pool=pool)
+        transcriber.start()
+        assert transcriber.transcribe_async(synthetic_utterance(1.0, seed=1), "en-US").result(timeout=5)
+        transcriber.stop()
+        pool.shutdown()
+        assert threading.active_count() == baseline
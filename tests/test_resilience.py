@@ -0,0 +1,208 @@
+"""Tests for the deadlines, circuit breaker and hedged calls of resilience.py."""
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded
+from langflow_runner import LangflowClient
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+def open_breaker(reset_timeout: float = 60.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.allow()
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    return breaker
+
+# -------------- Deadlines ---------------
+def test_no_deadline_by_default():
+    assert resilience.remaining() is None
+    assert resilience.budget(5.0) == 5.0
+    resilience.check_deadline()
+
+def test_nested_deadline_only_shortens():
+    with resilience.deadline(10):
+        with resilience.deadline(60):
+            assert resilience.remaining() <= 10
+        with resilience.deadline(1):
+            assert resilience.remaining() <= 1
+        with resilience.deadline(0):
+            assert 1 < resilience.remaining() <= 10
+    assert resilience.remaining() is None
+
+def test_budget_caps_timeout_and_raises_once_expired():
+    with resilience.deadline(0.05):
+        assert resilience.budget(30.0) <= 0.05
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded):
+            resilience.budget(30.0)
+        with pytest.raises(DeadlineExceeded):
+            resilience.check_deadline()
+
+# -------------- Circuit breaker ---------------
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    breaker.allow()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+    assert breaker.stats()['opened'] == 1
+
+def test_half_open_lets_one_trial_through():
+    breaker = open_breaker(reset_timeout=0.01)
+    time.sleep(0.02)
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+
+def test_failed_trial_opens_again():
+    breaker = open_breaker(reset_timeout=0.01)
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+def test_released_trial_frees_the_half_open_slot():
+    breaker = open_breaker(reset_timeout=0.01)
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.allow()
+
+def test_trial_that_never_reports_back_expires():
+    breaker = open_breaker(reset_timeout=0.05)
+    time.sleep(0.06)
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    time.sleep(0.06)
+    breaker.allow()
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        breaker.allow()
+        breaker.record_failure()
+    breaker.allow()
+    assert breaker.stats()['open'] == 0
+
+def test_cancelled_async_trial_does_not_block_the_breaker(mock_langflow):
+    mock_langflow.delay = 2.0
+    client = LangflowClient(base_url=mock_langflow.base_url, breaker_failures=1, breaker_reset=0.01)
+    client.breaker.record_failure()
+    time.sleep(0.02)
+
+    async def cancelled_run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.apost(f"{mock_langflow.base_url}/flow", {"input_value": "hi"}), 0.1)
+
+    try:
+        asyncio.run(cancelled_run())
+        assert client.breaker.state == CircuitBreaker.HALF_OPEN
+        client.breaker.allow()
+    finally:
+        client.close()
+
+# -------------- Hedged calls ---------------
+def test_fast_call_is_not_hedged(executor):
+    calls = []
+
+    def call():
+        calls.append(1)
+        return "ok"
+
+    assert resilience.hedged(call, executor, hedge_delay=1.0) == "ok"
+    assert len(calls) == 1
+
+def test_slow_call_is_hedged_and_duplicate_wins(executor):
+    attempts = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            attempts.append(1)
+            first = len(attempts) == 1
+        time.sleep(1.0 if first else 0.01)
+        return "first" if first else "hedge"
+
+    start = time.monotonic()
+    assert resilience.hedged(call, executor, hedge_delay=0.05) == "hedge"
+    assert time.monotonic() - start < 0.5
+    assert len(attempts) == 2
+
+def test_failed_call_is_retried_without_waiting(executor):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert resilience.hedged(call, executor, hedge_delay=None) == "ok"
+    assert len(attempts) == 2
+
+def test_failure_rejected_by_retry_on_is_not_retried(executor):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise ValueError("not JSON")
+
+    with pytest.raises(ValueError):
+        resilience.hedged(call, executor, hedge_delay=None, retry_on=lambda error: isinstance(error, ConnectionError))
+    assert len(attempts) == 1
+
+def test_last_error_is_raised_when_every_attempt_fails(executor):
+    def call():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        resilience.hedged(call, executor, hedge_delay=0.01, max_attempts=3)
+
+def test_open_circuit_is_not_retried(executor):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise CircuitOpenError("open")
+
+    with pytest.raises(CircuitOpenError):
+        resilience.hedged(call, executor, hedge_delay=None)
+    assert len(attempts) == 1
+
+def test_timeout_raises_deadline_exceeded(executor):
+    with pytest.raises(DeadlineExceeded):
+        resilience.hedged(lambda: time.sleep(0.5), executor, hedge_delay=None, timeout=0.05)
+
+def test_attempts_run_under_the_callers_deadline(executor):
+    with resilience.deadline(5):
+        left = resilience.hedged(resilience.remaining, executor, hedge_delay=None)
+    assert left is not None and 0 < left <= 5
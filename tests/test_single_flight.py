@@ -0,0 +1,109 @@
+"""Tests for the call coalescing of single_flight.py."""
+import time
+import threading
+from single_flight import SingleFlight
+
+def run_concurrently(count, fn):
+    """
+    Call fn(index) from count threads started together and return their results by index.
+    """
+    results = [None] * count
+    errors = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = fn(index)
+        except Exception as e:  # pylint: disable=broad-except
+            errors[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_concurrent_calls_share_one_run():
+    group = SingleFlight()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        time.sleep(0.1)
+        return {"translation": "bonjour"}
+
+    results, _ = run_concurrently(5, lambda _: group.do("hello", slow))
+    assert len(runs) == 1
+    assert all(result == {"translation": "bonjour"} for result in results)
+    assert group.stats() == {'leaders': 1, 'coalesced': 4, 'in_flight': 0}
+
+def test_different_keys_run_separately():
+    group = SingleFlight()
+    results, _ = run_concurrently(3, lambda index: group.do(f"key-{index}", lambda: index))
+    assert results == [0, 1, 2]
+    assert group.stats()['coalesced'] == 0
+
+def test_error_is_shared_and_key_released():
+    group = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise ConnectionError("down")
+
+    _, errors = run_concurrently(3, lambda _: group.do("hello", failing))
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert group.do("hello", lambda: "retried") == "retried"
+
+def test_stream_shares_items_with_late_followers():
+    group = SingleFlight()
+    runs = []
+
+    def produce():
+        runs.append(1)
+        for item in range(5):
+            time.sleep(0.02)
+            yield item
+
+    def consume(index):
+        time.sleep(index * 0.03)
+        return list(group.stream("hello", produce))
+
+    results, errors = run_concurrently(3, consume)
+    assert errors == [None, None, None]
+    assert results == [[0, 1, 2, 3, 4]] * 3
+    assert len(runs) == 1
+
+def test_stream_abandoned_by_leader_is_finished_for_followers():
+    group = SingleFlight()
+
+    def produce():
+        yield 1
+        time.sleep(0.05)
+        yield 2
+
+    leader = group.stream("hello", produce)
+    assert next(leader) == 1
+    follower = group.stream("hello", produce)
+    assert next(follower) == 1
+    leader.close()
+    assert list(follower) == [2]
+    assert group.stats()['in_flight'] == 0
+
+def test_stream_abandoned_without_followers_is_closed():
+    group = SingleFlight()
+    closed = []
+
+    def produce():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(1)
+
+    leader = group.stream("hello", produce)
+    assert next(leader) == 1
+    leader.close()
+    assert closed == [1]
+    assert group.stats()['in_flight'] == 0
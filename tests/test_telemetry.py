@@ -0,0 +1,90 @@
+"""Tests for the metrics, tracing and profiler of telemetry.py."""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import telemetry
+from telemetry import Histogram, MetricsRegistry, SamplingProfiler
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    assert isinstance(histogram, Histogram)
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, stage="flow")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{stage="flow",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="flow",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="flow",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="flow"} 4.25' in lines
+    assert 'latency_seconds_count{stage="flow"} 4' in lines
+
+def test_registered_stats_are_rendered_at_scrape_time():
+    registry = MetricsRegistry()
+    stats = {'hits': 3, 'misses': 1, 'ignored': 7}
+    telemetry.register_stats('cache', lambda: stats, telemetry.CACHE_METRICS, registry=registry, cache="tts")
+    stats['hits'] = 5
+
+    text = registry.render()
+    assert "# TYPE babbelfish_cache_hits_total counter" in text
+    assert 'babbelfish_cache_hits_total{cache="tts"} 5' in text
+    assert 'babbelfish_cache_misses_total{cache="tts"} 1' in text
+    assert "ignored" not in text
+
+def test_failing_collector_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests.").inc(route="/translate")
+    registry.register_collector('broken', lambda: 1 / 0)
+    assert 'requests_total{route="/translate"} 1.0' in registry.render()
+
+def test_utterance_id_carries_into_worker_threads():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with telemetry.utterance("abc123") as utterance_id:
+            assert utterance_id == "abc123"
+            with telemetry.utterance() as nested:
+                assert nested == "abc123"
+            bound = executor.submit(telemetry.in_context(telemetry.current_utterance.get)).result()
+            unbound = executor.submit(telemetry.current_utterance.get).result()
+    assert bound == "abc123"
+    assert unbound is None
+    assert telemetry.current_utterance.get() is None
+
+def test_traced_records_a_failed_call_under_its_stage():
+    @telemetry.traced('test_failing_stage')
+    def fail():
+        raise ValueError("boom")
+
+    stage = (('stage', 'test_failing_stage'),)
+    with pytest.raises(ValueError):
+        fail()
+    counts, _ = telemetry.STAGE_SECONDS.values[stage]
+    assert sum(counts) == 1
+    assert telemetry.STAGE_ERRORS.values[(('error', 'ValueError'), ('stage', 'test_failing_stage'))] == 1
+
+def test_profiler_folds_sampled_stacks():
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=busy_worker, name="busy-worker")
+    thread.start()
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        for _ in range(5):
+            profiler.sample()
+    finally:
+        stop.set()
+        thread.join()
+
+    lines = profiler.folded().splitlines()
+    assert profiler.samples == 5
+    worker = [line for line in lines if line.startswith("busy-worker;")]
+    assert worker
+    stack, count = worker[0].rsplit(" ", 1)
+    assert "busy_worker (test_telemetry.py:" in stack
+    assert int(count) <= 5
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in worker) == 5
@@ -0,0 +1,67 @@
+"""Tests for the memory and SQLite tiers of translation_cache.py."""
+import translation_cache
+from translation_cache import TranslationCache
+
+RESULTS = {"translation": "Bonjour", "explanation": "A greeting", "detected_language": "English", "sentiment": "Positive"}
+
+def test_key_ignores_case_and_whitespace():
+    assert TranslationCache.make_key("flow", "  Hello   World ", "French") == \
+        TranslationCache.make_key("flow", "hello world", " french")
+    assert TranslationCache.make_key("flow", "hello", "French") != TranslationCache.make_key("flow", "hello", "Spanish")
+
+def test_hit_returns_a_copy():
+    cache = TranslationCache(db_path=None)
+    cache.set("key", RESULTS)
+    hit = cache.get("key")
+    hit["translation"] = "changed"
+    assert cache.get("key") == RESULTS
+    assert cache.get("missing") is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TranslationCache(max_entries=2, db_path=None)
+    cache.set("a", RESULTS)
+    cache.set("b", RESULTS)
+    cache.get("a")
+    cache.set("c", RESULTS)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(translation_cache.time, 'time', lambda: now[0])
+    cache = TranslationCache(ttl=60, db_path=None)
+    cache.set("key", RESULTS)
+    now[0] += 59
+    assert cache.get("key") == RESULTS
+    now[0] += 2
+    assert cache.get("key") is None
+
+def test_sqlite_tier_survives_restart_and_is_promoted(tmp_path):
+    path = str(tmp_path / "translations.db")
+    TranslationCache(db_path=path).set("key", RESULTS)
+
+    cache = TranslationCache(db_path=path)
+    assert cache.stats()['size'] == 0
+    assert cache.get("key") == RESULTS
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.stats()['size'] == 1
+    assert cache.get("key") == RESULTS
+    assert cache.stats()['disk_hits'] == 1
+
+def test_expired_rows_are_dropped_on_open(tmp_path, monkeypatch):
+    path = str(tmp_path / "translations.db")
+    TranslationCache(ttl=60, db_path=path).set("key", RESULTS)
+    later = translation_cache.time.time() + 120
+    monkeypatch.setattr(translation_cache.time, 'time', lambda: later)
+    assert TranslationCache(ttl=60, db_path=path).get("key") is None
+
+def test_clear_empties_both_tiers(tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = TranslationCache(db_path=path)
+    cache.set("key", RESULTS)
+    cache.clear()
+    assert cache.get("key") is None
+    assert TranslationCache(db_path=path).get("key") is None
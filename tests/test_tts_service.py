@@ -0,0 +1,141 @@
+"""Tests for the content-addressed audio cache and the streaming of tts_service.py."""
+import threading
+import pytest
+from tts_service import DEFAULT_VOICE, ElevenLabsSynthesizer, StubSynthesizer, Synthesizer, TTSService
+
+FORMAT = "pcm_16000"
+WORD_BYTES = 8000  # 0.25 s of 16 kHz int16 per word
+
+class CountingSynthesizer(StubSynthesizer):
+    """A stub synthesizer that counts its synthesis calls."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def synthesize(self, text, voice_id, model_id, output_format):
+        self.calls += 1
+        return super().synthesize(text, voice_id, model_id, output_format)
+
+def make_service(tmp_path=None, **kwargs) -> TTSService:
+    return TTSService(synthesizer=kwargs.pop('synthesizer', None) or CountingSynthesizer(),
+                      output_format=FORMAT, cache_dir=str(tmp_path) if tmp_path else None, **kwargs)
+
+def test_repeated_text_is_a_memory_hit():
+    tts = make_service()
+    first = tts.synthesize("hello there", "voice", "model")
+    second = tts.synthesize(" hello there ", "voice", "model")
+    assert second == first
+    assert len(first.audio) == 2 * WORD_BYTES
+    assert tts.synthesizer.calls == 1
+    assert tts.stats()['hits'] == 1
+    assert tts.stats()['disk_hits'] == 0
+
+def test_fresh_service_hits_the_disk_tier(tmp_path):
+    audio = make_service(tmp_path).synthesize("hello", "voice", "model").audio
+
+    restarted = make_service(tmp_path)
+    assert restarted.stats()['disk_entries'] == 1
+    assert restarted.synthesize("hello", "voice", "model").audio == audio
+    assert restarted.synthesizer.calls == 0
+    assert restarted.stats()['disk_hits'] == 1
+
+def test_memory_cap_evicts_the_least_recently_used_audio():
+    tts = make_service(max_memory_bytes=2 * WORD_BYTES)
+    tts.synthesize("one", "voice", "model")
+    tts.synthesize("two", "voice", "model")
+    tts.synthesize("one", "voice", "model")
+    tts.synthesize("three", "voice", "model")
+    assert tts.stats()['memory_entries'] == 2
+    assert tts.stats()['memory_bytes'] == 2 * WORD_BYTES
+
+    calls = tts.synthesizer.calls
+    tts.synthesize("one", "voice", "model")
+    assert tts.synthesizer.calls == calls
+    tts.synthesize("two", "voice", "model")
+    assert tts.synthesizer.calls == calls + 1
+
+def test_disk_cap_evicts_the_least_recently_used_files(tmp_path):
+    # Nothing fits in memory, so every lookup goes to disk
+    tts = make_service(tmp_path, max_memory_bytes=0, max_disk_bytes=2 * WORD_BYTES)
+    one = tts.synthesize("one", "voice", "model")
+    tts.synthesize("two", "voice", "model")
+    tts.synthesize("one", "voice", "model")
+    tts.synthesize("three", "voice", "model")
+    assert tts.stats()['disk_entries'] == 2
+    assert tts.stats()['disk_bytes'] == 2 * WORD_BYTES
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        tts.file_name(tts.make_key(text, "voice", "model", FORMAT), FORMAT) for text in ("one", "three"))
+    assert tts.synthesize("one", "voice", "model") == one
+    assert tts.stats()['disk_hits'] == 2
+
+def test_concurrent_misses_synthesize_once():
+    tts = make_service(synthesizer=CountingSynthesizer(delay=0.1))
+    barrier = threading.Barrier(5)
+    results = []
+
+    def speak():
+        barrier.wait()
+        results.append(tts.synthesize("hello", "voice", "model"))
+
+    threads = [threading.Thread(target=speak) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tts.synthesizer.calls == 1
+    assert len(results) == 5 and len(set(results)) == 1
+
+def test_missing_voice_falls_back_to_the_default():
+    # Nothing listens on port 9, so voice names cannot be looked up
+    synthesizer = ElevenLabsSynthesizer(api_key="key", base_url="http://127.0.0.1:9", timeout=1)
+    assert synthesizer.resolve_voice(None) == DEFAULT_VOICE
+    assert synthesizer.resolve_voice("  ") == DEFAULT_VOICE
+    assert synthesizer.resolve_voice("some-voice-id") == "some-voice-id"
+
+    synthesizer.voice_ids = {DEFAULT_VOICE.casefold(): "default-id", "george": "george-id"}
+    assert synthesizer.resolve_voice("") == "default-id"
+    assert synthesizer.resolve_voice("George") == "george-id"
+
+class OddChunkSynthesizer(StubSynthesizer):
+    """A stub synthesizer streaming its PCM in pieces that split samples."""
+
+    def stream(self, text, voice_id, model_id, output_format):
+        audio = self.synthesize(text, voice_id, model_id, output_format)
+        for offset in range(0, len(audio), 333):
+            yield audio[offset:offset + 333]
+
+def test_first_streamed_chunk_holds_about_first_chunk_ms():
+    tts = make_service(synthesizer=OddChunkSynthesizer())
+    chunks = list(tts.stream("one two three four", "voice", "model", first_chunk_ms=100, chunk_ms=500))
+    first_bytes = 100 * 32  # 32 bytes per ms of 16 kHz int16
+    assert first_bytes <= len(chunks[0].audio) < first_bytes + 333
+    assert all(len(chunk.audio) >= 500 * 32 for chunk in chunks[1:-1])
+
+def test_streamed_chunks_are_cut_on_whole_samples():
+    tts = make_service(synthesizer=OddChunkSynthesizer())
+    chunks = list(tts.stream("one two three four", "voice", "model", first_chunk_ms=100, chunk_ms=100))
+    assert len(chunks) > 2
+    assert all(len(chunk.audio) % 2 == 0 for chunk in chunks)
+    assert b"".join(chunk.audio for chunk in chunks) == \
+        OddChunkSynthesizer().synthesize("one two three four", "voice", "model", FORMAT)
+
+def test_finished_stream_is_cached_whole():
+    tts = make_service()
+    chunks = list(tts.stream("hello there", "voice", "model", output_format=FORMAT))
+    calls = tts.synthesizer.calls
+    speech = tts.synthesize("hello there", "voice", "model", output_format=FORMAT)
+    assert tts.synthesizer.calls == calls
+    assert speech.audio == b"".join(chunk.audio for chunk in chunks)
+    assert speech.key == chunks[0].key
+    assert list(tts.stream("hello there", "voice", "model", output_format=FORMAT)) == [speech]
+
+def test_empty_text_streams_no_chunks():
+    assert list(make_service().stream("", "voice", "model")) == []
+
+def test_synthesizer_must_implement_synthesize():
+    class Incomplete(Synthesizer):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,80 @@
+"""Tests for the utterance segmentation of vad_segmenter.py."""
+import numpy as np
+import webrtcvad
+import pytest
+from vad_segmenter import VADSegmenter
+
+SAMPLERATE = 16000
+BYTES_PER_SECOND = SAMPLERATE * 2
+
+def synthetic_utterance(speech_seconds: float, seed: int, silence_seconds: float = 0.5) -> bytes:
+    """
+    A burst of harmonic "speech" with a syllable-rate envelope between stretches of low noise, as 16-bit PCM.
+    """
+    rng = np.random.default_rng(seed)
+    f0 = rng.uniform(140, 260)
+    t = np.arange(int(speech_seconds * SAMPLERATE)) / SAMPLERATE
+    voiced = sum(np.sin(2 * np.pi * f0 * (i + 1) * t) / np.sqrt(i + 1) for i in range(12))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+    silence = np.zeros(int(silence_seconds * SAMPLERATE))
+    signal = np.concatenate([silence, 4000 * voiced * envelope, silence])
+    signal += rng.normal(0, 20, len(signal))
+    return np.clip(signal, -32768, 32767).astype('<i2').tobytes()
+
+def make_segmenter(**kwargs) -> VADSegmenter:
+    vad = webrtcvad.Vad()
+    vad.set_mode(3)
+    return VADSegmenter(vad, samplerate=SAMPLERATE, **kwargs)
+
+def test_silence_has_no_utterances():
+    assert make_segmenter().segments(bytes(BYTES_PER_SECOND * 2)) == []
+
+def test_utterance_is_found_and_trimmed():
+    audio = synthetic_utterance(2.0, seed=1, silence_seconds=1.0)
+    segments = make_segmenter().segments(audio)
+    assert len(segments) == 1
+    seconds = len(segments[0]) / BYTES_PER_SECOND
+    assert 1.8 <= seconds < len(audio) / BYTES_PER_SECOND
+
+def test_pause_splits_utterances():
+    audio = synthetic_utterance(1.5, seed=1, silence_seconds=1.0) + synthetic_utterance(1.5, seed=2, silence_seconds=1.0)
+    assert len(make_segmenter().segments(audio)) == 2
+
+def test_long_utterance_is_split_at_max_duration():
+    audio = synthetic_utterance(5.0, seed=3)
+    segments = make_segmenter(max_segment_duration=2000).segments(audio)
+    assert len(segments) >= 3
+    assert all(len(segment) <= 2 * BYTES_PER_SECOND for segment in segments)
+
+def test_chunked_feed_matches_whole_recording():
+    audio = synthetic_utterance(1.5, seed=4, silence_seconds=1.0) * 2
+    whole = make_segmenter().segments(audio)
+
+    segmenter = make_segmenter()
+    chunked = []
+    # An odd chunk size leaves partial frames between calls
+    for offset in range(0, len(audio), 7001):
+        chunked += segmenter.feed(audio[offset:offset + 7001])
+    chunked += segmenter.flush()
+    assert chunked == whole
+
+def test_frame_speech_marks_each_frame_of_the_last_feed():
+    segmenter = make_segmenter()
+    silence = bytes(segmenter.frame_bytes * 10)
+    segmenter.feed(silence)
+    assert segmenter.frame_speech == [False] * 10
+
+    speech = synthetic_utterance(1.0, seed=5, silence_seconds=0.0)
+    segmenter.feed(speech[:segmenter.frame_bytes * 20])
+    assert len(segmenter.frame_speech) == 20
+    assert sum(segmenter.frame_speech) > 10
+
+def test_energy_threshold_treats_quiet_frames_as_silence():
+    audio = synthetic_utterance(2.0, seed=6)
+    assert make_segmenter(energy_threshold=30000).segments(audio) == []
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        make_segmenter(frame_duration=25)
+    with pytest.raises(ValueError):
+        VADSegmenter(webrtcvad.Vad(), samplerate=22050)
@@ -0,0 +1,163 @@
+"""A cache for babbelfish.ai translation results with an in-memory LRU tier and an optional SQLite tier."""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+from logging_config import get_logger
+
+# Load environment variables from .env file
+load_dotenv()
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '1024'))
+TRANSLATION_CACHE_TTL = float(os.getenv('TRANSLATION_CACHE_TTL', '86400'))
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH') or None
+
+# Configure logging
+logger = get_logger(__name__)
+
+class TranslationCache:
+    """
+    Caches the extracted results of a flow run, keyed on the flow, the normalized
+    input text and the target language.
+
+    Entries live in an in-memory LRU with a time-to-live. When a db_path is given,
+    entries are also written to a SQLite file so they survive restarts; a memory
+    miss that hits the SQLite tier is promoted back into memory.
+    """
+
+    def __init__(self,
+                 max_entries: int = TRANSLATION_CACHE_SIZE,
+                 ttl: float = TRANSLATION_CACHE_TTL,
+                 db_path: Optional[str] = TRANSLATION_CACHE_PATH):
+        """
+        Initialize the cache.
+
+        :param max_entries: Maximum number of entries kept in memory.
+        :param ttl: Seconds an entry stays valid, in both tiers.
+        :param db_path: Optional path of a SQLite file for the persistent tier.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS translations "
+                            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self.db.execute("DELETE FROM translations WHERE expires_at <= ?", (time.time(),))
+            self.db.commit()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize input text so trivially different spellings share an entry.
+
+        :param text: The raw input text.
+        :return: The text with collapsed whitespace, case-folded.
+        """
+        return " ".join(text.split()).casefold()
+
+    @classmethod
+    def make_key(cls, flow_id: str, message: str, target_language: Optional[str]) -> str:
+        """
+        Build the cache key for a flow run.
+
+        :param flow_id: The ID of the flow.
+        :param message: The input text sent to the flow.
+        :param target_language: The language the flow translates into.
+        :return: A hex digest identifying the request.
+        """
+        raw = json.dumps([flow_id, cls.normalize(message), (target_language or "").strip().casefold()])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Look up a cached result.
+
+        :param key: The cache key from make_key.
+        :return: The cached results, or None on a miss.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(value)
+                del self.entries[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT value, expires_at FROM translations WHERE key = ?",
+                                      (key,)).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(value)
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, str]):
+        """
+        Store a result in both tiers.
+
+        :param key: The cache key from make_key.
+        :param value: The extracted results to cache.
+        """
+        expires_at = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, dict(value), expires_at)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO translations (key, value, expires_at) VALUES (?, ?, ?)",
+                                (key, json.dumps(value), expires_at))
+                self.db.commit()
+
+    def _remember(self, key: str, value: Dict[str, str], expires_at: float):
+        """
+        Insert into the memory tier and evict the least recently used entries. Caller holds the lock.
+        """
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the hit/miss counters of the cache.
+
+        :return: A dictionary with hits, disk_hits, misses, hit_rate and the memory size.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self.entries)
+            }
+
+    def clear(self):
+        """
+        Remove every entry from both tiers and reset the counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self.db is not None:
+                self.db.execute("DELETE FROM translations")
+                self.db.commit()
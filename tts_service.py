@@ -0,0 +1,476 @@
+"""A text-to-speech service for babbelfish.ai with a content-addressed audio cache in memory and on disk."""
+import io
+import os
+import json
+import time
+import wave
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+from dotenv import load_dotenv
+import numpy as np
+import requests
+from logging_config import get_logger
+from single_flight import SingleFlight
+import telemetry
+
+# Load environment variables from .env file
+load_dotenv()
+XI_API_KEY = os.getenv('XI_API_KEY')
+ELEVENLABS_API_URL = os.getenv('ELEVENLABS_API_URL', 'https://api.elevenlabs.io/v1')
+TTS_BACKEND = os.getenv('TTS_BACKEND', 'elevenlabs')
+TTS_OUTPUT_FORMAT = os.getenv('TTS_OUTPUT_FORMAT', 'mp3_44100_128')
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', '.tts_cache') or None
+TTS_MEMORY_CACHE_MB = float(os.getenv('TTS_MEMORY_CACHE_MB', '32'))
+TTS_DISK_CACHE_MB = float(os.getenv('TTS_DISK_CACHE_MB', '256'))
+TTS_TIMEOUT = float(os.getenv('TTS_TIMEOUT', '30'))
+TTS_STREAM_FORMAT = os.getenv('TTS_STREAM_FORMAT', 'pcm_16000')
+TTS_STREAM_FIRST_CHUNK_MS = int(os.getenv('TTS_STREAM_FIRST_CHUNK_MS', '250'))
+TTS_STREAM_CHUNK_MS = int(os.getenv('TTS_STREAM_CHUNK_MS', '1000'))
+
+# Voice used when neither VOICE_ID nor the sidebar names one
+DEFAULT_VOICE = "Nicole"
+
+# Configure logging
+logger = get_logger(__name__)
+
+class TTSError(RuntimeError):
+    """Raised when speech cannot be synthesized."""
+
+class SpeechAudio(NamedTuple):
+    """Synthesized speech and the content key it is cached under."""
+    key: str
+    audio: bytes
+    output_format: str
+
+def file_extension(output_format: str) -> str:
+    """
+    The file extension for an ElevenLabs output format such as "mp3_44100_128" or "pcm_16000".
+    """
+    codec = output_format.split('_')[0]
+    return {'pcm': 'pcm', 'ulaw': 'ulaw'}.get(codec, codec)
+
+def pcm_samplerate(output_format: str) -> Optional[int]:
+    """
+    The sample rate of a raw PCM output format such as "pcm_16000", or None for encoded formats.
+    """
+    parts = output_format.split('_')
+    return int(parts[1]) if parts[0] == 'pcm' and len(parts) > 1 else None
+
+class Synthesizer(ABC):
+    """
+    Base class of the speech engines TTSService can use.
+
+    synthesize() returns the audio of the text in the requested output format,
+    or raises TTSError.
+    """
+    name = "base"
+
+    @abstractmethod
+    def synthesize(self, text: str, voice_id: str, model_id: str, output_format: str) -> bytes:
+        """
+        Synthesize the text.
+        """
+
+    def stream(self, text: str, voice_id: str, model_id: str, output_format: str) -> Iterator[bytes]:
+        """
+        Synthesize the text, yielding audio as it is produced. Engines without streaming yield it all at once.
+        """
+        yield self.synthesize(text, voice_id, model_id, output_format)
+
+class ElevenLabsSynthesizer(Synthesizer):
+    """
+    Synthesizes speech with the ElevenLabs text-to-speech API.
+
+    voice_id may be a voice ID or a voice name such as "Nicole"; names are
+    resolved once through the voices endpoint and remembered.
+    """
+    name = "elevenlabs"
+
+    def __init__(self, api_key: Optional[str] = XI_API_KEY, base_url: str = ELEVENLABS_API_URL,
+                 timeout: float = TTS_TIMEOUT):
+        """
+        Initialize the synthesizer.
+
+        :param api_key: The ElevenLabs API key.
+        :param base_url: The ElevenLabs API base URL.
+        :param timeout: Seconds to wait for the API.
+        """
+        if not api_key:
+            raise TTSError("Missing XI_API_KEY in environment variables")
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'xi-api-key': api_key})
+        self.voice_ids: Dict[str, str] = {}
+        self.voice_lock = threading.Lock()
+
+    def resolve_voice(self, voice: Optional[str]) -> str:
+        """
+        Map a voice name to its voice ID; anything that is not a known name is used as an ID.
+
+        An empty or missing voice falls back to DEFAULT_VOICE.
+        """
+        voice = (voice or "").strip() or DEFAULT_VOICE
+        with self.voice_lock:
+            if not self.voice_ids:
+                try:
+                    response = self.session.get(f"{self.base_url}/voices", timeout=self.timeout)
+                    response.raise_for_status()
+                    self.voice_ids = {v['name'].casefold(): v['voice_id'] for v in response.json().get('voices', [])}
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    logger.warning("Could not list ElevenLabs voices: %s", e)
+            return self.voice_ids.get(voice.casefold(), voice)
+
+    def synthesize(self, text: str, voice_id: str, model_id: str, output_format: str) -> bytes:
+        """
+        Synthesize the text with the text-to-speech endpoint.
+        """
+        url = f"{self.base_url}/text-to-speech/{self.resolve_voice(voice_id)}"
+        try:
+            response = self.session.post(url,
+                                         params={'output_format': output_format},
+                                         json={'text': text, 'model_id': model_id},
+                                         timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise TTSError(f"ElevenLabs synthesis failed: {e}") from e
+        return response.content
+
+    def stream(self, text: str, voice_id: str, model_id: str, output_format: str) -> Iterator[bytes]:
+        """
+        Synthesize the text with the streaming text-to-speech endpoint, yielding audio as it arrives.
+        """
+        url = f"{self.base_url}/text-to-speech/{self.resolve_voice(voice_id)}/stream"
+        try:
+            with self.session.post(url,
+                                   params={'output_format': output_format},
+                                   json={'text': text, 'model_id': model_id},
+                                   timeout=self.timeout,
+                                   stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=None):
+                    if chunk:
+                        yield chunk
+        except requests.RequestException as e:
+            raise TTSError(f"ElevenLabs synthesis failed: {e}") from e
+
+class StubSynthesizer(Synthesizer):
+    """
+    Synthesizes a short tone per word without any network call, for offline runs and tests.
+
+    The audio is deterministic for a given input. "pcm_<rate>" formats return raw
+    16-bit mono PCM at that rate; every other format returns a 16 kHz WAV file,
+    which browsers decode like the real MP3 output.
+    """
+    name = "stub"
+
+    def __init__(self, word_duration: float = 0.25, delay: float = 0.0):
+        """
+        Initialize the synthesizer.
+
+        :param word_duration: Seconds of audio per word of text.
+        :param delay: Seconds each synthesis call waits, to stand in for the latency of a real engine.
+        """
+        self.word_duration = word_duration
+        self.delay = delay
+
+    def synthesize(self, text: str, voice_id: str, model_id: str, output_format: str) -> bytes:
+        """
+        Synthesize one tone per word, pitched by a hash of the word and the voice.
+        """
+        time.sleep(self.delay)
+        samplerate = pcm_samplerate(output_format) or 16000
+        samples_per_word = int(self.word_duration * samplerate)
+        t = np.arange(samples_per_word) / samplerate
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) * 50)
+
+        tones = []
+        for word in text.split() or [""]:
+            digest = hashlib.sha256(f"{voice_id}:{word}".encode('utf-8')).digest()
+            frequency = 200 + digest[0] * 2
+            tones.append(0.3 * np.sin(2 * np.pi * frequency * t) * fade)
+        pcm = (np.concatenate(tones) * 32767).astype('<i2').tobytes()
+        if pcm_samplerate(output_format):
+            return pcm
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(samplerate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def stream(self, text: str, voice_id: str, model_id: str, output_format: str) -> Iterator[bytes]:
+        """
+        Yield raw PCM one word at a time; encoded formats are returned whole.
+        """
+        if not pcm_samplerate(output_format):
+            yield self.synthesize(text, voice_id, model_id, output_format)
+            return
+        for word in text.split():
+            yield self.synthesize(word, voice_id, model_id, output_format)
+
+SYNTHESIZERS = {
+    ElevenLabsSynthesizer.name: ElevenLabsSynthesizer,
+    StubSynthesizer.name: StubSynthesizer,
+}
+
+class TTSService:
+    """
+    Synthesizes speech through a content-addressed cache.
+
+    Audio is keyed on a hash of the text, voice, model and output format, so a
+    repeated phrase is synthesized once and then served from memory or disk.
+    The memory tier is an LRU capped in bytes; the disk tier keeps one file per
+    key in cache_dir and removes the least recently used files when it grows
+    past its cap, so it survives restarts without growing without bound.
+    Concurrent requests for the same audio share one synthesis.
+    """
+
+    def __init__(self,
+                 synthesizer: Optional[Synthesizer] = None,
+                 output_format: str = TTS_OUTPUT_FORMAT,
+                 cache_dir: Optional[str] = TTS_CACHE_DIR,
+                 max_memory_bytes: int = int(TTS_MEMORY_CACHE_MB * 1024 * 1024),
+                 max_disk_bytes: int = int(TTS_DISK_CACHE_MB * 1024 * 1024)):
+        """
+        Initialize the service.
+
+        :param synthesizer: The speech engine; defaults to the one named by TTS_BACKEND.
+        :param output_format: The default ElevenLabs output format, e.g. "mp3_44100_128".
+        :param cache_dir: Optional directory for the disk tier.
+        :param max_memory_bytes: Maximum audio bytes kept in memory.
+        :param max_disk_bytes: Maximum audio bytes kept on disk.
+        """
+        if synthesizer is None:
+            if TTS_BACKEND not in SYNTHESIZERS:
+                raise ValueError(f"Unknown TTS backend: {TTS_BACKEND}")
+            synthesizer = SYNTHESIZERS[TTS_BACKEND]()
+        self.synthesizer = synthesizer
+        self.output_format = output_format
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            files = []
+            for entry in os.scandir(cache_dir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+            for _, name, size in sorted(files):
+                self.disk[name] = size
+                self.disk_bytes += size
+            self._evict_disk()
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+        """
+        Build the content key of a synthesis request.
+
+        :return: A hex digest identifying the audio.
+        """
+        raw = json.dumps([text.strip(), voice_id, model_id, output_format])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @telemetry.traced('tts')
+    def synthesize(self, text: str, voice_id: str, model_id: str,
+                   output_format: Optional[str] = None) -> SpeechAudio:
+        """
+        Get the speech for the text, from the cache when possible.
+
+        :param text: The text to speak.
+        :param voice_id: The voice ID or name.
+        :param model_id: The TTS model.
+        :param output_format: Optional output format overriding the service default.
+        :return: The audio and its content key.
+        """
+        output_format = output_format or self.output_format
+        key = self.make_key(text, voice_id, model_id, output_format)
+        audio = self.get(key, output_format)
+        if audio is None:
+            audio = self.single_flight.do(key, self._synthesize_and_store, key, text, voice_id, model_id, output_format)
+        return SpeechAudio(key, audio, output_format)
+
+    def stream(self, text: str, voice_id: str, model_id: str,
+               output_format: str = TTS_STREAM_FORMAT,
+               first_chunk_ms: int = TTS_STREAM_FIRST_CHUNK_MS,
+               chunk_ms: int = TTS_STREAM_CHUNK_MS) -> Iterator[SpeechAudio]:
+        """
+        Get the speech for the text in chunks, starting before synthesis has finished.
+
+        Cached audio is returned as a single chunk. Otherwise the engine's stream is
+        regrouped into chunks of about first_chunk_ms for the first one, so playback
+        starts early, and chunk_ms for the rest; raw PCM chunks are cut on whole
+        samples. The audio is cached once the stream completes.
+
+        :param text: The text to speak.
+        :param voice_id: The voice ID or name.
+        :param model_id: The TTS model.
+        :param output_format: The output format, "pcm_16000" by default so chunks can be played as they arrive.
+        :param first_chunk_ms: Minimum length of the first chunk, in ms of PCM audio.
+        :param chunk_ms: Minimum length of the following chunks, in ms of PCM audio.
+        :return: An iterator of SpeechAudio chunks sharing the content key of the whole audio.
+        """
+        key = self.make_key(text, voice_id, model_id, output_format)
+        audio = self.get(key, output_format)
+        if audio is not None:
+            yield SpeechAudio(key, audio, output_format)
+            return
+
+        samplerate = pcm_samplerate(output_format)
+        bytes_per_ms = samplerate * 2 / 1000 if samplerate else 16  # roughly 128 kbps for encoded formats
+        target = int(first_chunk_ms * bytes_per_ms)
+        received = bytearray()
+        pending = bytearray()
+        start = time.perf_counter()
+        logger.info("Streaming %d characters with %s", len(text), self.synthesizer.name)
+        for data in self.synthesizer.stream(text.strip(), voice_id, model_id, output_format):
+            received += data
+            pending += data
+            if len(pending) >= target:
+                cut = len(pending) - len(pending) % 2 if samplerate else len(pending)
+                if len(received) == len(pending):
+                    telemetry.record('tts_first_chunk', time.perf_counter() - start)
+                yield SpeechAudio(key, bytes(pending[:cut]), output_format)
+                del pending[:cut]
+                target = int(chunk_ms * bytes_per_ms)
+        if pending:
+            if len(received) == len(pending):
+                telemetry.record('tts_first_chunk', time.perf_counter() - start)
+            yield SpeechAudio(key, bytes(pending), output_format)
+        telemetry.record('tts_stream', time.perf_counter() - start)
+        self.set(key, output_format, bytes(received))
+
+    def _synthesize_and_store(self, key: str, text: str, voice_id: str, model_id: str, output_format: str) -> bytes:
+        """
+        Synthesize on a cache miss and store the audio in both tiers.
+        """
+        audio = self.get(key, output_format, count=False)
+        if audio is not None:
+            return audio
+        logger.info("Synthesizing %d characters with %s", len(text), self.synthesizer.name)
+        audio = self.synthesizer.synthesize(text.strip(), voice_id, model_id, output_format)
+        self.set(key, output_format, audio)
+        return audio
+
+    def file_name(self, key: str, output_format: str) -> str:
+        """
+        The disk tier file name of a key.
+        """
+        return f"{key}.{file_extension(output_format)}"
+
+    def get(self, key: str, output_format: str, count: bool = True) -> Optional[bytes]:
+        """
+        Look up cached audio.
+
+        :param key: The content key from make_key.
+        :param output_format: The output format the key was built with.
+        :param count: Update the hit/miss counters.
+        :return: The audio bytes, or None on a miss.
+        """
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.hits += count
+                return audio
+
+            name = self.file_name(key, output_format)
+            if self.cache_dir and name in self.disk:
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    with open(path, 'rb') as f:
+                        audio = f.read()
+                    os.utime(path)
+                except OSError as e:
+                    logger.warning("Could not read cached audio %s: %s", name, e)
+                    self.disk_bytes -= self.disk.pop(name)
+                else:
+                    self.disk.move_to_end(name)
+                    self._remember(key, audio)
+                    self.hits += count
+                    self.disk_hits += count
+                    return audio
+
+            self.misses += count
+            return None
+
+    def set(self, key: str, output_format: str, audio: bytes):
+        """
+        Store audio in both tiers.
+
+        :param key: The content key from make_key.
+        :param output_format: The output format the key was built with.
+        :param audio: The audio bytes.
+        """
+        with self.lock:
+            self._remember(key, audio)
+            if self.cache_dir and len(audio) <= self.max_disk_bytes:
+                name = self.file_name(key, output_format)
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    with open(path + '.tmp', 'wb') as f:
+                        f.write(audio)
+                    os.replace(path + '.tmp', path)
+                except OSError as e:
+                    logger.warning("Could not write cached audio %s: %s", name, e)
+                    return
+                self.disk_bytes += len(audio) - self.disk.pop(name, 0)
+                self.disk[name] = len(audio)
+                self._evict_disk()
+
+    def _remember(self, key: str, audio: bytes):
+        """
+        Insert into the memory tier and evict the least recently used audio. Caller holds the lock.
+        """
+        if len(audio) > self.max_memory_bytes:
+            return
+        self.memory_bytes += len(audio) - len(self.memory.pop(key, b""))
+        self.memory[key] = audio
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        """
+        Remove the least recently used files until the disk tier fits its cap. Caller holds the lock.
+        """
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            name, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError as e:
+                logger.warning("Could not remove cached audio %s: %s", name, e)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the hit/miss counters and the size of both tiers.
+
+        :return: A dictionary of cache counters.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory),
+                'memory_bytes': self.memory_bytes,
+                'disk_entries': len(self.disk),
+                'disk_bytes': self.disk_bytes
+            }
@@ -0,0 +1,161 @@
+"""A class to split 16-bit mono PCM audio into utterances using WebRTC voice activity detection."""
+from collections import deque
+from typing import Deque, Iterator, List, Optional, Tuple
+import webrtcvad
+from logging_config import get_logger
+from audio_features import frame_rms, frame_signal, pcm_to_array
+
+# Configure logging
+logger = get_logger(__name__)
+
+VALID_SAMPLERATES = (8000, 16000, 32000, 48000)
+VALID_FRAME_DURATIONS = (10, 20, 30)
+
+class VADSegmenter:
+    """
+    Runs a WebRTC VAD over fixed-size frames and cuts the audio into utterances.
+
+    A ring buffer of the last padding_duration ms of frames decides when speech
+    starts (most of the window is voiced) and ends (most of the window is
+    unvoiced). The voiced window is kept as leading padding so the first
+    syllable is not clipped, trailing silence is bounded by the same window,
+    and anything outside an utterance is dropped. Utterances longer than
+    max_segment_duration are split so long recordings can be recognized in pieces.
+    With an energy_threshold, frames quieter than it are treated as silence without
+    calling the VAD; their RMS is computed for the whole chunk in one vectorized pass.
+
+    The segmenter is stateful: feed() may be called with successive chunks of one
+    recording and flush() ends it. segments() handles a whole recording at once.
+    """
+
+    def __init__(self,
+                 vad: webrtcvad.Vad,
+                 samplerate: int = 16000,
+                 frame_duration: int = 30,
+                 padding_duration: int = 300,
+                 max_segment_duration: int = 15000,
+                 trigger_ratio: float = 0.9,
+                 energy_threshold: Optional[float] = None):
+        """
+        Initialize the segmenter.
+
+        :param vad: The webrtcvad.Vad instance used to classify frames.
+        :param samplerate: Sample rate of the audio, one of 8000, 16000, 32000 or 48000 Hz.
+        :param frame_duration: Frame length in ms, one of 10, 20 or 30.
+        :param padding_duration: Length in ms of the ring buffer used to detect speech start and end.
+        :param max_segment_duration: Longest utterance in ms before it is split.
+        :param trigger_ratio: Fraction of voiced (or unvoiced) frames in the ring buffer that starts (or ends) an utterance.
+        :param energy_threshold: Optional frame RMS (int16 scale) below which a frame is silence.
+        """
+        if samplerate not in VALID_SAMPLERATES:
+            raise ValueError(f"Unsupported sample rate for VAD: {samplerate}")
+        if frame_duration not in VALID_FRAME_DURATIONS:
+            raise ValueError(f"Unsupported VAD frame duration: {frame_duration} ms")
+
+        self.vad = vad
+        self.samplerate = samplerate
+        self.frame_duration = frame_duration
+        self.frame_bytes = int(samplerate * frame_duration / 1000) * 2
+        self.num_padding_frames = max(1, padding_duration // frame_duration)
+        self.max_segment_frames = max(1, max_segment_duration // frame_duration)
+        self.trigger_ratio = trigger_ratio
+        self.energy_threshold = energy_threshold
+        self.reset()
+
+    def reset(self):
+        """
+        Forget any partial frame or utterance in progress.
+        """
+        self.remainder = b""
+        self.ring_buffer: Deque[Tuple[bytes, bool]] = deque(maxlen=self.num_padding_frames)
+        self.triggered = False
+        self.voiced_frames: List[bytes] = []
+        # Speech decision of every whole frame of the last feed() call, e.g. to pick out the background noise
+        self.frame_speech: List[bool] = []
+
+    def whole_frames(self, audio_data: bytes) -> memoryview:
+        """
+        Prepend any partial frame left from the previous call and cut the audio at the last whole frame.
+
+        The new trailing partial frame is kept for the next call.
+
+        :param audio_data: 16-bit little-endian mono PCM bytes.
+        :return: A view of the audio covering only whole frames.
+        """
+        data = memoryview(self.remainder + bytes(audio_data)) if self.remainder else memoryview(audio_data)
+        whole = len(data) - len(data) % self.frame_bytes
+        self.remainder = data[whole:].tobytes()
+        return data[:whole]
+
+    def frames(self, audio_data: bytes) -> Iterator[bytes]:
+        """
+        Split audio into whole frames, keeping any trailing partial frame for the next call.
+
+        :param audio_data: 16-bit little-endian mono PCM bytes.
+        :return: An iterator over frame-sized byte strings.
+        """
+        data = self.whole_frames(audio_data)
+        for offset in range(0, len(data), self.frame_bytes):
+            yield data[offset:offset + self.frame_bytes].tobytes()
+
+    def feed(self, audio_data: bytes) -> List[bytes]:
+        """
+        Feed the next chunk of a recording and return the utterances completed by it.
+
+        :param audio_data: 16-bit little-endian mono PCM bytes.
+        :return: A list of PCM byte strings, one per completed utterance.
+        """
+        segments = []
+        self.frame_speech = []
+        data = self.whole_frames(audio_data)
+        loud = None
+        if self.energy_threshold is not None and len(data):
+            loud = frame_rms(frame_signal(pcm_to_array(data), self.frame_bytes // 2)) > self.energy_threshold
+
+        for index, offset in enumerate(range(0, len(data), self.frame_bytes)):
+            frame = data[offset:offset + self.frame_bytes].tobytes()
+            is_speech = (loud is None or bool(loud[index])) and self.vad.is_speech(frame, self.samplerate)
+            self.ring_buffer.append((frame, is_speech))
+            self.frame_speech.append(is_speech)
+
+            if not self.triggered:
+                num_voiced = sum(1 for _, speech in self.ring_buffer if speech)
+                if num_voiced > self.trigger_ratio * self.ring_buffer.maxlen:
+                    self.triggered = True
+                    self.voiced_frames = [f for f, _ in self.ring_buffer]
+                    self.ring_buffer.clear()
+                continue
+
+            self.voiced_frames.append(frame)
+            num_unvoiced = sum(1 for _, speech in self.ring_buffer if not speech)
+            if num_unvoiced > self.trigger_ratio * self.ring_buffer.maxlen:
+                segments.append(b"".join(self.voiced_frames))
+                self.triggered = False
+                self.voiced_frames = []
+                self.ring_buffer.clear()
+            elif len(self.voiced_frames) >= self.max_segment_frames:
+                segments.append(b"".join(self.voiced_frames))
+                self.voiced_frames = []
+        return segments
+
+    def flush(self) -> List[bytes]:
+        """
+        End the recording, returning the utterance still in progress if any.
+
+        :return: A list with the final utterance, or an empty list.
+        """
+        segments = [b"".join(self.voiced_frames)] if self.triggered and self.voiced_frames else []
+        self.reset()
+        return segments
+
+    def segments(self, audio_data: bytes) -> List[bytes]:
+        """
+        Cut a whole recording into trimmed utterances.
+
+        :param audio_data: 16-bit little-endian mono PCM bytes.
+        :return: A list of PCM byte strings, one per utterance; empty if no speech was found.
+        """
+        self.reset()
+        segments = self.feed(audio_data) + self.flush()
+        logger.debug("VAD found %d utterance(s) in %d bytes of audio", len(segments), len(audio_data))
+        return segments